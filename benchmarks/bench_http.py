@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+'''
+* bench_http.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Measure the scrape throughput of the web server with concurrent clients
+*
+* Run from the top of the repository:
+*   python -m benchmarks.bench_http [--size N] [--clients 1,8,32]
+*       [--duration SECONDS] [--server threaded|async] [--path /]
+*       [--encoding gzip] [--output FILE] [--compare FILE]
+*
+* The server runs in its own process, so the clients don't compete with it
+* for the GIL.
+*
+'''
+import argparse
+import multiprocessing
+import http.client
+import threading
+import socket
+import time
+import sys
+import os
+
+from benchmarks.results import summarise, save_results, compare_results
+
+
+#
+# Constants
+#
+DEFAULT_PORT = 8190
+DEFAULT_SIZE = 10000
+DEFAULT_CLIENTS = "1,8,32"
+DEFAULT_DURATION = 5.0
+
+
+###########################################################################
+#
+# Server
+#
+###########################################################################
+#
+# run_server
+#
+def run_server(port=DEFAULT_PORT, size=DEFAULT_SIZE, server="threaded", changes_per_sec=0):
+    '''
+    Fill the status and run the web server (in the server process)
+
+    Parameters:
+        port: The port to listen on
+        size: The number of entries in the status
+        server: "threaded" or "async"
+        changes_per_sec: How often to change an entry (0 for a static status)
+
+    Return Value:
+        None
+    '''
+    from src.application_status import Status
+
+    # Don't count logging each request
+    sys.stderr = open(os.devnull, "w")
+
+    for _index in range(size):
+        Status.set_static(name=f"group{_index // 100}.entry{_index % 100}", value=_index)
+
+    # Keep changing the status, so the caches are invalidated
+    if changes_per_sec:
+        def change():
+            _value = 0
+            while True:
+                _value += 1
+                Status.set_static(name="group0.entry0", value=_value)
+                time.sleep(1 / changes_per_sec)
+
+        threading.Thread(target=change, daemon=True).start()
+
+    if server == "async":
+        import asyncio
+        from src.application_status import start_async_web_server
+
+        async def serve():
+            _server = await start_async_web_server(hostname="127.0.0.1", port=port)
+            await _server.serve_forever()
+
+        asyncio.run(serve())
+
+    else:
+        from src.application_status import start_web_server
+        start_web_server(hostname="127.0.0.1", port=port, threaded=False)
+
+
+#
+# wait_for_server
+#
+def wait_for_server(port=DEFAULT_PORT, timeout=60):
+    '''
+    Wait for the server to accept connections
+
+    Parameters:
+        port: The port the server listens on
+        timeout: Seconds to wait
+
+    Return Value:
+        None
+    '''
+    _end = time.monotonic() + timeout
+    while time.monotonic() < _end:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+
+        except OSError:
+            time.sleep(0.05)
+
+    raise TimeoutError(f"Server not listening on port {port}")
+
+
+###########################################################################
+#
+# Clients
+#
+###########################################################################
+#
+# run_client
+#
+def run_client(port=DEFAULT_PORT, path="/", headers={}, deadline=0.0, latencies=None, errors=None):
+    '''
+    Send requests on a keep-alive connection until the deadline
+
+    Parameters:
+        port: The port the server listens on
+        path: The path to request
+        headers: The request headers
+        deadline: When to stop (time.perf_counter)
+        latencies: List the time taken by each request is added to (ns)
+        errors: List any errors are added to
+
+    Return Value:
+        None
+    '''
+    _connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    _clock = time.perf_counter_ns
+    _deadline = deadline * 1e9
+
+    try:
+        while _clock() < _deadline:
+            _start = _clock()
+            _connection.request("GET", path, headers=headers)
+            _response = _connection.getresponse()
+            _response.read()
+            latencies.append(_clock() - _start)
+
+            if _response.status != 200: errors.append(_response.status)
+            if _response.getheader("Connection", "").lower() == "close":
+                _connection.close()
+                _connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+    except Exception as _err:
+        errors.append(repr(_err))
+
+    finally:
+        _connection.close()
+
+
+#
+# bench_clients
+#
+def bench_clients(port=DEFAULT_PORT, clients=1, duration=DEFAULT_DURATION, path="/", headers={}):
+    '''
+    Measure the throughput with a number of concurrent clients
+
+    Parameters:
+        port: The port the server listens on
+        clients: The number of concurrent clients
+        duration: How long to run for (seconds)
+        path: The path to request
+        headers: The request headers
+
+    Return Value:
+        dict: The summary of the requests (with the number of errors)
+    '''
+    _latencies = []
+    _errors = []
+    _start = time.perf_counter()
+    _deadline = _start + duration
+
+    _threads = [ threading.Thread(target=run_client, kwargs={ "port": port, "path": path,
+            "headers": headers, "deadline": _deadline, "latencies": _latencies, "errors": _errors })
+            for _ in range(clients) ]
+    for _thread in _threads: _thread.start()
+    for _thread in _threads: _thread.join()
+
+    _summary = summarise(latencies=_latencies, elapsed=time.perf_counter() - _start)
+    _summary["errors"] = len(_errors)
+
+    return _summary
+
+
+#
+# main
+#
+def main():
+    ''' Run the benchmark '''
+    _parser = argparse.ArgumentParser(description="Scrape throughput of the web server")
+    _parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port for the server")
+    _parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="number of entries")
+    _parser.add_argument("--clients", default=DEFAULT_CLIENTS, help="comma separated client counts")
+    _parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per case")
+    _parser.add_argument("--server", choices=("threaded", "async"), default="threaded", help="web server")
+    _parser.add_argument("--path", default="/", help="path to request")
+    _parser.add_argument("--encoding", default=None, help="Accept-Encoding to send")
+    _parser.add_argument("--changes", type=float, default=0, help="status changes per second")
+    _parser.add_argument("--output", default=None, help="JSON file for the results")
+    _parser.add_argument("--compare", default=None, help="JSON results of a previous run")
+    _args = _parser.parse_args()
+
+    _server = multiprocessing.Process(target=run_server, daemon=True, kwargs={ "port": _args.port,
+            "size": _args.size, "server": _args.server, "changes_per_sec": _args.changes })
+    _server.start()
+
+    _headers = { "Accept-Encoding": _args.encoding } if _args.encoding else {}
+    _results = {}
+    try:
+        wait_for_server(port=_args.port)
+
+        print(f"{_args.server} server, {_args.size} entries, GET {_args.path}")
+        for _clients in [ int(_clients) for _clients in _args.clients.split(",") ]:
+            _summary = bench_clients(port=_args.port, clients=_clients, duration=_args.duration,
+                    path=_args.path, headers=_headers)
+            _results[f"{_args.server} size={_args.size} clients={_clients} path={_args.path}"] = _summary
+            print(f"  clients={_clients:<4} {_summary['ops_per_sec']:>10} req/s"
+                    f"  p50 {_summary['p50_us']:>10} us  p99 {_summary['p99_us']:>10} us"
+                    f"  errors {_summary['errors']}")
+
+    finally:
+        _server.terminate()
+        _server.join()
+
+    print(f"saved to {save_results(name='http', results=_results, path=_args.output)}")
+    if _args.compare: compare_results(previous_path=_args.compare, results=_results)
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+'''
+* bench_import.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Measure the time to import the package (in a new interpreter each run)
+*
+* Run from the top of the repository:
+*   python -m benchmarks.bench_import [--runs N] [--max-ms MS]
+*
+* With --max-ms the exit status is 1 if the median import time is over the
+* limit (to guard the cold start cost in CI)
+*
+'''
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+#
+# Constants
+#
+DEFAULT_RUNS = 20
+
+# What a command line tool does - import and set a value
+IMPORT_CODE = "from src.application_status import Status; Status.set_static(name='a.b', value=1)"
+
+# Modules that should only be imported when the web servers are used
+HEAVY_MODULES = ("asyncio", "concurrent.futures", "http.server", "socketserver", "email", "inspect", "logging")
+
+
+###########################################################################
+#
+# Benchmark
+#
+###########################################################################
+#
+# import_time
+#
+def import_time():
+    '''
+    Import the package in a new interpreter
+
+    Parameters:
+        None
+
+    Return Value:
+        tuple: (import time in microseconds, list of heavy modules imported)
+    '''
+    _code = f"{IMPORT_CODE}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    _result = subprocess.run([ sys.executable, "-X", "importtime", "-c", _code ],
+            capture_output=True, text=True, check=True)
+
+    # The cumulative time of the package is on its own line in the import time output
+    _time = 0
+    for _line in _result.stderr.splitlines():
+        _fields = [ _field.strip() for _field in _line.split("|") ]
+        if len(_fields) == 3 and _fields[2] == "src.application_status":
+            _time = int(_fields[1])
+
+    _heavy = [ _module for _module in _result.stdout.strip().split(",") if _module ]
+    return (_time, _heavy)
+
+
+#
+# main
+#
+def main():
+    ''' Run the benchmark '''
+    _parser = argparse.ArgumentParser(description="Time to import the package")
+    _parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="number of runs")
+    _parser.add_argument("--max-ms", type=float, default=None, help="fail if the median is over this")
+    _args = _parser.parse_args()
+
+    _times = []
+    for _ in range(_args.runs):
+        (_time, _heavy) = import_time()
+        _times.append(_time)
+
+    _median = statistics.median(_times) / 1000
+    print(f"import: median {_median:.2f} ms  min {min(_times) / 1000:.2f} ms  ({_args.runs} runs)")
+    print(f"heavy modules imported: {', '.join(_heavy) if _heavy else 'none'}")
+
+    if _args.max_ms is not None and _median > _args.max_ms:
+        print(f"over the limit of {_args.max_ms} ms")
+        sys.exit(1)
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    main()
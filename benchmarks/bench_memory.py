@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+'''
+* bench_memory.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Compare the memory used by the default and compact status layouts, and
+* by the cached encodings kept for exports
+*
+* Run from the top of the repository:
+*   python -m benchmarks.bench_memory [--entries N]
+*
+'''
+import argparse
+import tracemalloc
+import gc
+import time
+
+from src.application_status.application_status import ApplicationStatus
+
+
+#
+# Constants
+#
+DEFAULT_ENTRIES = 100000
+
+# Leaves under each per-connection node
+LEAVES = ("bytes_in", "bytes_out", "state")
+
+
+###########################################################################
+#
+# Benchmark
+#
+###########################################################################
+#
+# entry_name
+#
+def entry_name(index=0):
+    ''' The name of an entry (per-connection status) '''
+    return f"conn.c{index // len(LEAVES)}.{LEAVES[index % len(LEAVES)]}"
+
+
+#
+# measure_memory
+#
+def measure_memory(entries=DEFAULT_ENTRIES, compact=False):
+    '''
+    Build a status tree and measure the memory it uses.  The names are
+    created as the entries are set (as an application would), so any names
+    kept by the status are counted
+
+    Parameters:
+        entries: The number of entries
+        compact: True to use the compact layout
+
+    Return Value:
+        float: Bytes per entry
+    '''
+    gc.collect()
+    tracemalloc.start()
+    _before = tracemalloc.get_traced_memory()[0]
+
+    _status = ApplicationStatus(compact=compact)
+    for _index in range(entries):
+        _status.set_static(name=entry_name(index=_index), value=_index)
+
+    gc.collect()
+    _used = tracemalloc.get_traced_memory()[0] - _before
+    tracemalloc.stop()
+
+    return _used / entries
+
+
+#
+# measure_export_cache
+#
+def measure_export_cache(entries=DEFAULT_ENTRIES, compact=False, flat=False):
+    '''
+    Measure the memory kept by the status to speed up the next export (after
+    an export and a change to one entry), compared to the size of the export
+
+    Parameters:
+        entries: The number of entries
+        compact: True to use the compact layout
+        flat: True to set all of the entries in one node
+
+    Return Value:
+        tuple: (bytes kept, bytes in the export)
+    '''
+    _status = ApplicationStatus(compact=compact)
+    for _index in range(entries):
+        _name = f"flat.e{_index}" if flat else entry_name(index=_index)
+        _status.set_static(name=_name, value=_index)
+
+    gc.collect()
+    tracemalloc.start()
+    _before = tracemalloc.get_traced_memory()[0]
+
+    _size = len(_status.export_bytes())
+    _status.set_static(name="flat.e0" if flat else entry_name(index=0), value=-1)
+    _status.export_bytes()
+
+    gc.collect()
+    _used = tracemalloc.get_traced_memory()[0] - _before
+    tracemalloc.stop()
+
+    return (_used, _size)
+
+
+#
+# measure_time
+#
+def measure_time(entries=DEFAULT_ENTRIES, compact=False):
+    '''
+    Time setting and getting each entry
+
+    Parameters:
+        entries: The number of entries
+        compact: True to use the compact layout
+
+    Return Value:
+        tuple: (microseconds per set, microseconds per get)
+    '''
+    _names = [ entry_name(index=_index) for _index in range(entries) ]
+    _status = ApplicationStatus(compact=compact)
+
+    _start = time.perf_counter()
+    for (_index, _name) in enumerate(_names):
+        _status.set_static(name=_name, value=_index)
+    _set_time = time.perf_counter() - _start
+
+    _start = time.perf_counter()
+    for _name in _names:
+        _status.get(name=_name)
+    _get_time = time.perf_counter() - _start
+
+    return (_set_time / entries * 1e6, _get_time / entries * 1e6)
+
+
+#
+# main
+#
+def main():
+    ''' Run the benchmark '''
+    _parser = argparse.ArgumentParser(description="Memory used by the status layouts")
+    _parser.add_argument("--entries", type=int, default=DEFAULT_ENTRIES, help="number of entries")
+    _args = _parser.parse_args()
+
+    print(f"{_args.entries} entries")
+    for (_label, _compact) in (("dict", False), ("compact", True)):
+        _bytes = measure_memory(entries=_args.entries, compact=_compact)
+        (_set_us, _get_us) = measure_time(entries=_args.entries, compact=_compact)
+        print(f"  {_label:8} {_bytes:7.1f} bytes/entry  set {_set_us:5.2f} us  get {_get_us:5.2f} us")
+
+    print("export cache (times the size of the export)")
+    for (_label, _compact) in (("dict", False), ("compact", True)):
+        for (_shape, _flat) in (("nested", False), ("flat", True)):
+            (_used, _size) = measure_export_cache(entries=_args.entries, compact=_compact, flat=_flat)
+            print(f"  {_label:8} {_shape:7} {_used / _size:5.2f}x  ({_used / 1024:.0f} KiB for {_size / 1024:.0f} KiB)")
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+'''
+* bench_status.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Measure the operations on the status for a range of tree sizes and depths
+*
+* Run from the top of the repository:
+*   python -m benchmarks.bench_status [--sizes 10,1000,100000,1000000]
+*       [--depths 1,3,6] [--ops N] [--compact] [--output FILE] [--compare FILE]
+*
+'''
+import argparse
+import random
+import math
+import time
+
+from src.application_status.application_status import ApplicationStatus
+from benchmarks.results import summarise, save_results, compare_results
+
+
+#
+# Constants
+#
+DEFAULT_SIZES = "10,1000,100000,1000000"
+DEFAULT_DEPTHS = "1,3,6"
+
+# Most operations timed for each case, and the most time spent on each
+DEFAULT_OPS = 10000
+MAX_SECONDS = 2.0
+
+
+###########################################################################
+#
+# Benchmark
+#
+###########################################################################
+#
+# entry_names
+#
+def entry_names(size=10, depth=1):
+    '''
+    Get the names for a tree of entries
+
+    Parameters:
+        size: The number of entries
+        depth: The number of segments in each name
+
+    Return Value:
+        list: The entry names (dot format)
+    '''
+    _fan_out = max(2, math.ceil(size ** (1 / depth)))
+
+    _names = []
+    for _index in range(size):
+        _parts = []
+        for _ in range(depth):
+            _parts.append(f"n{_index % _fan_out}")
+            _index //= _fan_out
+
+        _names.append(".".join(reversed(_parts)))
+
+    return _names
+
+
+#
+# time_ops
+#
+def time_ops(func=None, args=[], max_seconds=MAX_SECONDS):
+    '''
+    Time an operation for each argument (stopping early if it takes too long)
+
+    Parameters:
+        func: The operation (called with one argument)
+        args: The arguments
+        max_seconds: Stop after this long (at least 3 operations are timed)
+
+    Return Value:
+        list: The time taken by each operation (nanoseconds)
+    '''
+    _clock = time.perf_counter_ns
+    _deadline = _clock() + max_seconds * 1e9
+
+    _latencies = []
+    for _arg in args:
+        _start = _clock()
+        func(_arg)
+        _end = _clock()
+        _latencies.append(_end - _start)
+
+        if _end > _deadline and len(_latencies) >= 3: break
+
+    return _latencies
+
+
+#
+# bench_case
+#
+def bench_case(size=10, depth=1, ops=DEFAULT_OPS, compact=False):
+    '''
+    Measure each operation on a tree of the given size and depth
+
+    Parameters:
+        size: The number of entries
+        depth: The number of segments in each name
+        ops: The most operations to time for each API
+        compact: True to use the compact layout
+
+    Return Value:
+        dict: The summary for each operation
+    '''
+    _names = entry_names(size=size, depth=depth)
+    _random = random.Random(size * 10 + depth)
+    _sample = [ _random.choice(_names) for _ in range(ops) ]
+
+    _status = ApplicationStatus(compact=compact)
+    _results = {}
+
+    # Adding entries (the whole tree is built, but only the first ops are kept)
+    _latencies = time_ops(func=lambda _name: _status.set_static(name=_name, value=0), args=_names,
+            max_seconds=float("inf"))
+    _results["set_static_new"] = summarise(latencies=_latencies[:ops])
+
+    _values = iter(range(1, len(_sample) + 1))
+    _results["set_static"] = summarise(latencies=time_ops(
+            func=lambda _name: _status.set_static(name=_name, value=next(_values)), args=_sample))
+
+    _current = [ (_name, _status.get(name=_name)) for _name in _sample ]
+    _results["set_static_unchanged"] = summarise(latencies=time_ops(
+            func=lambda _entry: _status.set_static(name=_entry[0], value=_entry[1]), args=_current))
+
+    _results["get"] = summarise(latencies=time_ops(func=lambda _name: _status.get(name=_name), args=_sample))
+
+    # Export after a change (re-encodes the path to the change), and unchanged (cached)
+    _values = iter(range(-1, -len(_sample) - 1, -1))
+    def export_changed(_name):
+        _status.set_static(name=_name, value=next(_values))
+        _status.export_bytes()
+
+    _results["export_changed"] = summarise(latencies=time_ops(func=export_changed, args=_sample))
+    _results["export_cached"] = summarise(latencies=time_ops(func=lambda _name: _status.export_bytes(),
+            args=_sample))
+
+    # Delete the parent of each sampled entry (or the entry, if not nested)
+    _parents = list(dict.fromkeys(_name.rpartition(".")[0] or _name for _name in _sample))
+    _results["delete_subtree"] = summarise(latencies=time_ops(
+            func=lambda _name: _status.delete(name=_name, subtree=True), args=_parents))
+
+    return _results
+
+
+#
+# main
+#
+def main():
+    ''' Run the benchmark '''
+    _parser = argparse.ArgumentParser(description="Operations on the status")
+    _parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated tree sizes")
+    _parser.add_argument("--depths", default=DEFAULT_DEPTHS, help="comma separated name depths")
+    _parser.add_argument("--ops", type=int, default=DEFAULT_OPS, help="most operations timed per case")
+    _parser.add_argument("--compact", action="store_true", help="use the compact layout")
+    _parser.add_argument("--output", default=None, help="JSON file for the results")
+    _parser.add_argument("--compare", default=None, help="JSON results of a previous run")
+    _args = _parser.parse_args()
+
+    _results = {}
+    for _size in [ int(_size) for _size in _args.sizes.split(",") ]:
+        for _depth in [ int(_depth) for _depth in _args.depths.split(",") ]:
+            _case = bench_case(size=_size, depth=_depth, ops=_args.ops, compact=_args.compact)
+
+            print(f"size={_size} depth={_depth}")
+            for (_op, _summary) in _case.items():
+                _results[f"{_op} size={_size} depth={_depth}"] = _summary
+                print(f"  {_op:22} {_summary['ops_per_sec']:>12} ops/s"
+                        f"  p50 {_summary['p50_us']:>10} us  p99 {_summary['p99_us']:>10} us")
+
+    print(f"saved to {save_results(name='status', results=_results, path=_args.output)}")
+    if _args.compare: compare_results(previous_path=_args.compare, results=_results)
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+'''
+* results.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Summarise benchmark timings and save them as JSON for comparison
+*
+'''
+import subprocess
+import platform
+import json
+import time
+import os
+
+
+#
+# Constants
+#
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+###########################################################################
+#
+# Timings
+#
+###########################################################################
+#
+# percentile
+#
+def percentile(ordered=[], fraction=0.5):
+    '''
+    Get a percentile from sorted samples (nearest rank)
+
+    Parameters:
+        ordered: The samples (sorted)
+        fraction: The percentile as a fraction (0.99 for p99)
+
+    Return Value:
+        float: The sample at the percentile. None if there are no samples
+    '''
+    if not ordered: return None
+
+    _rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[_rank]
+
+
+#
+# summarise
+#
+def summarise(latencies=[], elapsed=None):
+    '''
+    Summarise the latency of a set of operations
+
+    Parameters:
+        latencies: The time taken by each operation (nanoseconds)
+        elapsed: The total time taken (seconds). Defaults to the sum of the
+            latencies (ie the operations ran one after another)
+
+    Return Value:
+        dict: The number of operations, operations per second, and the mean and
+            percentile latencies (microseconds)
+    '''
+    _ordered = sorted(latencies)
+    _count = len(_ordered)
+    if elapsed is None: elapsed = sum(_ordered) / 1e9
+
+    def micro(value):
+        return round(value / 1000, 3) if value is not None else None
+
+    return {
+        "ops": _count,
+        "ops_per_sec": round(_count / elapsed, 1) if elapsed else None,
+        "mean_us": micro(sum(_ordered) / _count) if _count else None,
+        "p50_us": micro(percentile(ordered=_ordered, fraction=0.50)),
+        "p90_us": micro(percentile(ordered=_ordered, fraction=0.90)),
+        "p99_us": micro(percentile(ordered=_ordered, fraction=0.99)),
+        "max_us": micro(_ordered[-1]) if _count else None,
+    }
+
+
+###########################################################################
+#
+# Saving and comparing
+#
+###########################################################################
+#
+# environment
+#
+def environment():
+    '''
+    Describe where the benchmark ran
+
+    Parameters:
+        None
+
+    Return Value:
+        dict: The Python version, platform, git commit and time
+    '''
+    try:
+        _commit = subprocess.run([ "git", "rev-parse", "--short", "HEAD" ], capture_output=True,
+                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        _commit = None
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": _commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+#
+# save_results
+#
+def save_results(name="", results=None, path=None):
+    '''
+    Save benchmark results as JSON
+
+    Parameters:
+        name: The name of the benchmark
+        results: The results (JSON serialisable)
+        path: The file to save to. Defaults to
+            benchmarks/results/<name>-<time>.json
+
+    Return Value:
+        string: The path saved to
+    '''
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+    with open(path, "w") as _file:
+        json.dump({ "benchmark": name, "environment": environment(), "results": results }, _file, indent=2)
+        _file.write("\n")
+
+    return path
+
+
+#
+# compare_results
+#
+def compare_results(previous_path="", results=None, key="ops_per_sec"):
+    '''
+    Print how the results compare to a previous run
+
+    Parameters:
+        previous_path: The JSON file saved by a previous run
+        results: The results of this run (a dict of summaries by case)
+        key: The value to compare
+
+    Return Value:
+        None
+    '''
+    with open(previous_path) as _file:
+        _previous = json.load(_file)["results"]
+
+    print(f"compared to {previous_path} ({key}):")
+    for (_case, _summary) in results.items():
+        _old = _previous.get(_case, {}).get(key)
+        _new = _summary.get(key)
+        if not _old or _new is None: continue
+
+        print(f"  {_case:40} {_old:>14} -> {_new:>14}  ({(_new - _old) / _old * 100:+.1f}%)")
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
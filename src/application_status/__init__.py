@@ -9,7 +9,50 @@
 * Module initialisation
 *
 '''
-__all__ = [ "ApplicationStatus", "Status", "BasicWebServer", "start_web_server", "stop_web_server" ]
+import importlib
+
+__all__ = [ "ApplicationStatus", "Status", "BasicWebServer", "PooledHTTPServer", "start_web_server", "stop_web_server",
+            "start_async_web_server", "stop_async_web_server", "Metrics", "MetricsExporter",
+            "SharedStatusRegion" ]
 
 from .application_status import ApplicationStatus, Status
-from .web_server import BasicWebServer, start_web_server, stop_web_server
+
+
+#
+# Globals
+#
+# Loaded when first used, so importing the package to set the status doesn't
+# pay for the web servers - { name: module }
+_lazy_dict = {
+    "BasicWebServer": ".web_server",
+    "PooledHTTPServer": ".web_server",
+    "start_web_server": ".web_server",
+    "stop_web_server": ".web_server",
+    "start_async_web_server": ".async_web_server",
+    "stop_async_web_server": ".async_web_server",
+    "Metrics": ".metrics",
+    "MetricsExporter": ".metrics",
+    "SharedStatusRegion": ".shared_status",
+}
+
+
+#
+# __getattr__
+#
+def __getattr__(name):
+    ''' Import the module for a lazily loaded name (PEP 562) '''
+    if name not in _lazy_dict: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    _value = getattr(importlib.import_module(_lazy_dict[name], __name__), name)
+
+    # Only load it once
+    globals()[name] = _value
+    return _value
+
+
+#
+# __dir__
+#
+def __dir__():
+    ''' Include the lazily loaded names '''
+    return sorted(set(globals()) | set(_lazy_dict))
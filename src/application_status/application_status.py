@@ -10,14 +10,57 @@
 *
 '''
 from threading import Thread, Lock, Event
-import schedule
-import time
+from collections import deque
+from collections.abc import Awaitable
+import weakref
+import types
+import struct
+import zlib
 import json
+import time
+import sys
+import os
+
+from .scheduler import Scheduler
+from .collector import Collector
+from .subscriptions import ChangeDispatcher
+from .history import History, DEFAULT_HISTORY_SAMPLES
 
 
 #
 # Constants
 #
+# Marker for an entry that doesn't exist (as None is a valid value)
+NOT_FOUND = object()
+
+# Default number of threads running the update functions
+DEFAULT_COLLECTOR_WORKERS = 8
+
+# Number of recent changes kept in the change log
+CHANGE_LOG_SIZE = 10000
+
+# Scheduler job publishing to shared memory (a tuple, so it can't clash with an entry name)
+SHARED_JOB = ("shared",)
+
+# Scheduler job saving snapshots
+SNAPSHOT_JOB = ("snapshot",)
+
+# Snapshot file header: magic, length and CRC32 of the body (which is JSON)
+SNAPSHOT_MAGIC = b"APPSNAP2"
+SNAPSHOT_HEADER = struct.Struct("<8sQI")
+
+# Target size of each chunk of a streamed export (bytes)
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Members of a node encoded (and cached) together for an export
+EXPORT_BLOCK_SIZE = 256
+
+
+#
+# Globals
+#
+# Instances to reset in a forked child
+_instance_set = weakref.WeakSet()
 
 
 ###########################################################################
@@ -29,24 +72,87 @@ import json
 # ApplicationConfig
 #
 class ApplicationStatus():
-    ''' Application Status '''
+    '''
+    Application Status
+
+    With compact=True the status uses less memory for very large trees: the
+    name segments are interned (so a segment repeated under many nodes is
+    stored once) and there is no index of the entries (getting and setting
+    an entry walks the tree, which is slower)
+    '''
     #
     # __init__
     #
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, compact=False, **kwargs):
         ''' Init method for class '''
         super().__init__(*args, **kwargs)
 
+        self.compact = compact
+
         # Private Instance Attributes
         self.__lock = Lock()
         self.__stop_running_jobs = Event()
         self.__status_dict = {}
-        self.__job_dict = {}
+        self.__scheduler = Scheduler()
+        self.__collector_dict = {}
+        self.__lazy_dict = {}
+        self.__task_dict = {}
+        self.__jobs_task = None
+        self.__loop = None
+        self.__version = 0
+        self.__instance_id = os.urandom(4).hex()
+        self.__export_snapshot = None
+        self.__fragment_dict = {}
+        self.__prefix_dict = {}
+        self.__block_dict = {}
+        self.__index = {}
+        self.__pool_lock = Lock()
+        self.__executor = None
+        self.__queued = 0
+        self.__active = 0
+        self.__change_log = deque(maxlen=CHANGE_LOG_SIZE)
+        self.__listener_list = ()
+        self.__dispatcher = None
+        self.__restored = {}
+        self.__snapshot_lock = Lock()
+        self.__snapshot_version = None
+        self.__history_dict = {}
 
         self.update_thread = None
         self.webserver_thread = None
         self.webserver = None
         self.join_timeout = 30
+        self.collector_workers = DEFAULT_COLLECTOR_WORKERS
+        self.shared_region = None
+        self.shared_slot = None
+        self.restart_after_fork = True
+        self.snapshot_path = None
+        self.stream_exports = False
+
+        _instance_set.add(self)
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # version
+    #
+    @property
+    def version(self):
+        ''' Monotonically increasing counter, bumped on every change to the status '''
+        return self.__version
+
+
+    #
+    # instance_id
+    #
+    @property
+    def instance_id(self):
+        ''' Random ID for this instance (versions restart from 0 in a new instance) '''
+        return self.__instance_id
 
 
     ###########################################################################
@@ -55,24 +161,171 @@ class ApplicationStatus():
     #
     ###########################################################################
     #
-    # run_thread
+    # _run_pooled
     #
-    @staticmethod
-    def run_thread(func=None):
+    def _run_pooled(self, func=None):
         '''
-        Run the scheduled job in a thread
+        Run a job on a pool thread, keeping count of running jobs
 
         Parameters:
-            None
+            func: The function to run
 
         Return Value:
             None
         '''
+        self.__pool_lock.acquire()
+        self.__queued -= 1
+        self.__active += 1
+        self.__pool_lock.release()
+
+        try:
+            func()
+        finally:
+            self.__pool_lock.acquire()
+            self.__active -= 1
+            self.__pool_lock.release()
+
+
+    #
+    # run_thread
+    #
+    def run_thread(self, func=None):
+        '''
+        Run the scheduled job on the pool of collector threads
+
+        Parameters:
+            func: The function to run
+
+        Return Value:
+            boolean: True if the job was queued, False if the pool was shut
+                down (by stop_updates) before it could be
+        '''
         assert func
         assert callable(func)
 
-        _thread = Thread(target=func)
-        _thread.start()
+        self.__pool_lock.acquire()
+        try:
+            if not self.__executor:
+                # Imported when first needed (it is slow to import)
+                from concurrent.futures import ThreadPoolExecutor
+
+                self.__executor = ThreadPoolExecutor(max_workers=max(1, self.collector_workers),
+                        thread_name_prefix="status-collector")
+
+            _executor = self.__executor
+            self.__queued += 1
+
+        finally:
+            self.__pool_lock.release()
+
+        try:
+            _executor.submit(self._run_pooled, func)
+
+        except RuntimeError:
+            self.__pool_lock.acquire()
+            self.__queued -= 1
+            self.__pool_lock.release()
+            return False
+
+        return True
+
+
+    #
+    # collector_pool_stats
+    #
+    def collector_pool_stats(self):
+        '''
+        Get the state of the pool of collector threads
+
+        Parameters:
+            None
+
+        Return Value:
+            dict: The number of workers, and jobs running and waiting to run
+        '''
+        return {
+            "workers": max(1, self.collector_workers),
+            "active": self.__active,
+            "queued": self.__queued,
+        }
+
+
+    #
+    # _run_collector
+    #
+    def _run_collector(self, collector=None, run_id=0):
+        '''
+        Run a collector and update the entry with the value (runs on the pool)
+
+        Parameters:
+            collector: The Collector for the entry
+            run_id: The ID of the run (from Collector.start)
+
+        Return Value:
+            None
+        '''
+        _start = time.perf_counter()
+        try:
+            _value = collector.func()
+            if isinstance(_value, types.CoroutineType):
+                # Imported when first needed (it is slow to import)
+                import asyncio
+
+                _value = asyncio.run(_value)
+
+        except Exception as _err:
+            collector.complete(run_id=run_id, duration=time.perf_counter() - _start, error=_err)
+            return
+
+        # Don't update the entry if it has been deleted or the collector replaced
+        def update_status_value():
+            if self.__collector_dict.get(collector.name) is collector:
+                self._set_entry_from_dot(name=collector.name, value=_value)
+
+        collector.complete(run_id=run_id, func=update_status_value,
+                duration=time.perf_counter() - _start)
+
+
+    #
+    # _dispatch_collector
+    #
+    def _dispatch_collector(self, collector=None):
+        '''
+        Start a run of the collector on the pool, unless a run is still in flight
+
+        Parameters:
+            collector: The Collector for the entry
+
+        Return Value:
+            None
+        '''
+        _run_id = collector.start()
+        if _run_id is None: return
+
+        # Don't leave the collector running if the job couldn't be queued
+        if not self.run_thread(lambda: self._run_collector(collector=collector, run_id=_run_id)):
+            collector.complete(run_id=_run_id)
+
+
+    #
+    # collector_stats
+    #
+    def collector_stats(self, name=None):
+        '''
+        Get the state of the collectors (the functions registered with set)
+
+        Parameters:
+            name: The entry name (dot format). Gets all collectors if not set
+
+        Return Value:
+            dict: The state of the collector (None if not found), or a dict of
+                the state of all collectors by name
+        '''
+        if name:
+            _collector = self.__collector_dict.get(name)
+            return _collector.stats() if _collector else None
+
+        return { _name: _collector.stats() for (_name, _collector) in list(self.__collector_dict.items()) }
 
 
     #
@@ -89,9 +342,10 @@ class ApplicationStatus():
             None
         '''
         while not self.__stop_running_jobs.is_set():
-            # Run any pending scheduled tasks
-            schedule.run_pending()
-            time.sleep(1)
+            # Run any pending scheduled tasks, then sleep until the next is due
+            _delay = self.__scheduler.run_pending()
+            if self.__stop_running_jobs.is_set(): break
+            self.__scheduler.wait(timeout=_delay)
 
 
     #
@@ -137,6 +391,7 @@ class ApplicationStatus():
         # Try to end the update process
         try:
             self.__stop_running_jobs.set()
+            self.__scheduler.wake()
         except:
             pass
 
@@ -144,209 +399,1240 @@ class ApplicationStatus():
         self.update_thread.join(timeout=self.join_timeout)
         self.update_thread = None
 
+        # Save the latest values
+        if self.snapshot_path:
+            try:
+                self.save_snapshot()
+            except Exception:
+                pass
+
+        # Release the collector threads (the pool is created again if needed)
+        self.__pool_lock.acquire()
+        if self.__executor: self.__executor.shutdown(wait=False)
+        self.__executor = None
+        self.__pool_lock.release()
+
 
     ###########################################################################
     #
-    # Helper/Convenience Functions
+    # Functions to share the status with other processes
     #
     ###########################################################################
     #
-    # _valid_entry_type
+    # share
     #
-    @staticmethod
-    def _valid_entry_type(entry=None):
+    def share(self, region=None, slot=None, interval=1):
         '''
-        Check the entry is a type we can handle correctly
+        Share the status through a shared memory region.  A process with a
+        slot publishes its status to the slot now and then every interval
+        while the updates are running (start_updates or start_async_updates -
+        otherwise call publish_shared to publish), and the web server can show
+        the merged status of every process in the region
 
         Parameters:
-            entry: The entry
+            region: The SharedStatusRegion
+            slot: The slot to publish to (only this process may use it). None
+                to only read the region (eg the web server process)
+            interval: How often to publish (seconds, may be a float)
 
         Return Value:
-            boolean: True if successful, false otherwise
+            None
         '''
-        # Simple lookup of type
-        if not entry: return True
-        if isinstance(entry, str): return True
-        if isinstance(entry, int): return True
-        if isinstance(entry, float): return True
-        if isinstance(entry, bool): return True
-        if isinstance(entry, list): return True
-        if isinstance(entry, tuple): return True
+        assert region
+        assert slot is None or 0 <= slot < region.slots
+        assert interval > 0
 
-        # Not supported
-        return False
+        self.__scheduler.remove(name=SHARED_JOB)
+        self.shared_region = region
+        self.shared_slot = slot
+        if slot is None: return
+
+        self.__scheduler.add(name=SHARED_JOB, func=self.publish_shared, interval=interval)
+        self.publish_shared()
 
 
     #
-    # _set_entry_from_dot
+    # unshare
     #
-    def _set_entry_from_dot(self, name=None, value=None):
+    def unshare(self):
         '''
-        Set the entry based on a dot name
+        Stop sharing the status
 
         Parameters:
-            name: The entry name
-            value: The value for the entry
+            None
 
         Return Value:
-            bool: True if successful, false otherwise
+            None
         '''
-        assert name
+        self.__scheduler.remove(name=SHARED_JOB)
+        self.shared_region = None
+        self.shared_slot = None
 
-        if not self._valid_entry_type(entry=value):
-            raise ValueError(f"Values of type: {type(value)} are not supported") 
 
-        _entry = self.__status_dict
+    #
+    # publish_shared
+    #
+    def publish_shared(self):
+        '''
+        Publish the status to this process's slot in the shared region.  The
+        cached export is copied in, so this takes no locks shared with the
+        other processes and doesn't slow down changes to the status
 
-        _tmp_name = ""
-        _rest = name
-        while _rest:
-            # Split the name
-            (_part, _, _rest) = _rest.partition(".")
-            _tmp_name = f"{_tmp_name}.{_part}" if _tmp_name else _part
+        Parameters:
+            None
 
-            if not _part in _entry:
-                if not _rest:
-                    # This is the entry to add the value to
-                    self.__lock.acquire()
-                    _entry[_part] = value
-                    self.__lock.release()
-                    _part = None
+        Return Value:
+            boolean: True if published, False if not sharing
+        '''
+        _region = self.shared_region
+        _slot = self.shared_slot
+        if not _region or _slot is None: return False
 
-                else:
-                    # Create a nested dict (as there is more to the dot path)
-                    self.__lock.acquire()
-                    _entry[_part] = {}
-                    self.__lock.release()
-                    _entry = _entry[_part]
+        _region.publish(slot=_slot, payload=self.export_bytes(refresh=False))
+        return True
 
-            else:
-                if not _rest:
-                    # Make sure this is not a dict and then add the entry
-                    if isinstance(_entry[_part], dict):
-                        raise ValueError(f"Name has sub entries: {_tmp_name}")
 
-                    self.__lock.acquire()
-                    _entry[_part] = value
-                    self.__lock.release()
-                    _part = None
+    ###########################################################################
+    #
+    # Functions to save and restore the status
+    #
+    ###########################################################################
+    #
+    # persist
+    #
+    def persist(self, path="", interval=60):
+        '''
+        Save a snapshot of the status every interval (while the updates are
+        running, in a thread or on an event loop), and when the updates are
+        stopped
 
-                else:
-                    if not isinstance(_entry[_part], dict):
-                        raise ValueError(f"Invalid nesting of values under: {_tmp_name}")
+        Parameters:
+            path: The file to save the snapshots to
+            interval: How often to save (seconds, may be a float)
 
-                    _entry = _entry[_part]
+        Return Value:
+            None
+        '''
+        assert path
+        assert interval > 0
 
-        # Return the entry
-        return True
+        self.snapshot_path = path
+        self.__scheduler.add(name=SNAPSHOT_JOB, interval=interval,
+                func=lambda: self.run_thread(func=self.save_snapshot))
 
 
     #
-    # _get_entry_from_dot
+    # save_snapshot
     #
-    def _get_entry_from_dot(self, name=None):
+    def save_snapshot(self, path=None):
         '''
-        Get the entry based on a dot name
+        Save a snapshot of the status.  The file is replaced atomically, so it
+        always holds a complete snapshot.  Nothing is written if the status
+        hasn't changed since the last snapshot
 
         Parameters:
-            name: The entry name
+            path: The file to save to (defaults to the path given to persist)
 
         Return Value:
-            value: The entry being requested
+            boolean: True if saved, False if not (unchanged, or already saving)
         '''
-        assert name
+        if not path: path = self.snapshot_path
+        assert path
 
-        _entry = self.__status_dict
-        _value = None
+        # Skip if a save is already in progress
+        if not self.__snapshot_lock.acquire(blocking=False): return False
 
-        _rest = name
-        while _rest:
-            # Split the name
-            (_part, _, _rest) = _rest.partition(".")
+        try:
+            # Each entry with the time its collector last succeeded (so restored
+            # values can be checked for freshness)
+            self.__lock.acquire()
+            try:
+                # A collector returning the same value doesn't change the
+                # version, but its last success still needs to be saved
+                _updated_times = tuple(_collector.last_success for _collector in self.__collector_dict.values())
+                _version = (self.__instance_id, self.__version, path, _updated_times)
+                if _version == self.__snapshot_version: return False
+
+                _entries = []
+                for (_name, _value) in self._leaves():
+                    _collector = self.__collector_dict.get(_name)
+                    _updated = _collector.last_success if _collector else None
+                    _entries.append((_name, _value, _updated))
+
+                _snapshot = { "saved": time.time(), "entries": _entries }
+                try:
+                    _body = json.dumps(_snapshot).encode("utf-8")
+                except (TypeError, ValueError):
+                    # Leave out any entries with values that can't be saved
+                    _snapshot["entries"] = [ _entry for _entry in _entries if self._can_encode(value=_entry[1]) ]
+                    _body = json.dumps(_snapshot).encode("utf-8")
+
+            finally:
+                self.__lock.release()
+
+            _temp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(_temp_path, "wb") as _file:
+                    _file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(_body), zlib.crc32(_body)))
+                    _file.write(_body)
+                    _file.flush()
+                    os.fsync(_file.fileno())
+
+                os.replace(_temp_path, path)
+
+            except BaseException:
+                try:
+                    os.remove(_temp_path)
+                except OSError:
+                    pass
+
+                raise
+
+            self.__snapshot_version = _version
+            return True
+
+        finally:
+            self.__snapshot_lock.release()
 
-            # Is the name in the status dict?
-            if _part in _entry:
-                _entry = _entry[_part]
-            else:
-                break
 
-            if not _rest:
-                # This should be the value
-                _value = _entry
+    #
+    # _can_encode
+    #
+    @staticmethod
+    def _can_encode(value=None):
+        ''' Check if a value can be saved in a snapshot '''
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            return False
 
-        # Return the entry
-        return _value
+        return True
 
 
     #
-    # _delete_entry_from_dot
+    # _log_warning
     #
-    def _delete_entry_from_dot(self, name=None, subtree=False):
+    @staticmethod
+    def _log_warning(*args):
+        ''' Log a warning (logging is imported when first needed, as it is slow to import) '''
+        import logging
+
+        logging.getLogger(__name__).warning(*args)
+
+
+    #
+    # _parse_snapshot
+    #
+    @staticmethod
+    def _parse_snapshot(data=b""):
         '''
-        Delete the entry based on a dot name
+        Check and decode the contents of a snapshot file
 
         Parameters:
-            name: The entry name
-            subtree: If True, also delete any child entries
+            data: The contents of the file (bytes)
 
         Return Value:
-            value: True if successful, false if not found (exception raised on error)
+            list: The (name, value, updated) entries. None if the snapshot
+                isn't valid
         '''
-        assert name
+        if len(data) < SNAPSHOT_HEADER.size: return None
 
-        _entry = self.__status_dict
+        (_magic, _length, _crc) = SNAPSHOT_HEADER.unpack_from(data)
+        _body = data[SNAPSHOT_HEADER.size:]
+        if _magic != SNAPSHOT_MAGIC or len(_body) != _length or zlib.crc32(_body) != _crc:
+            return None
 
-        _rest = name
-        _tmp_name = ""
-        while _rest:
-            # Split the name
-            (_part, _, _rest) = _rest.partition(".")
-            _tmp_name = f"{_tmp_name}.{_part}" if _tmp_name else _part
+        try:
+            _entries = json.loads(_body)["entries"]
+        except (ValueError, TypeError, KeyError):
+            return None
 
-            # Is the name in the status dict?
-            if _part in _entry:
-                if not _rest:
-                    # This should be the value
-                    if isinstance(_entry[_part], dict):
-                        # This is a subtree - Can we delete?
-                        if subtree:
-                            # Delete all the subtree entries
-                            _entries = list(_entry[_part].keys())
-                            for _key in _entries:
-                                _subname = f"{_tmp_name}.{_key}" if _tmp_name else _key
-                                self._delete_entry_from_dot(name=_subname, subtree=subtree)
+        if not isinstance(_entries, list): return None
+        for _entry in _entries:
+            if not isinstance(_entry, list) or len(_entry) != 3 or not isinstance(_entry[0], str):
+                return None
 
-                        else:
-                            raise ValueError(f"Cannot delete subtree: {name}")
+            if _entry[2] is not None and not isinstance(_entry[2], (int, float)): return None
 
-                    else:
-                        self.__lock.acquire()
+        return _entries
 
-                        # Remove any schedules
-                        if name in self.__job_dict:
-                            schedule.cancel_job(self.__job_dict[name])
-                            del self.__job_dict[name]
 
-                        # Delete the value
-                        del _entry[_part]
+    #
+    # load_snapshot
+    #
+    def load_snapshot(self, path=""):
+        '''
+        Restore the entries from a snapshot.  Call at startup, before the
+        entries are registered with set() - a collector whose restored value
+        is still fresh (newer than its update interval) isn't run until its
+        next update is due.  A snapshot that can't be read is logged and
+        ignored (the status starts empty)
 
-                        self.__lock.release()
+        Parameters:
+            path: The snapshot file
 
-                else:
-                    # Move on to the next part
-                    _entry = _entry[_part]
+        Return Value:
+            int: The number of entries restored (0 if there is no snapshot)
+        '''
+        assert path
 
+        try:
+            with open(path, "rb") as _file:
+                _data = _file.read()
+        except FileNotFoundError:
+            return 0
+        except OSError as _error:
+            self._log_warning("Unable to read snapshot %s: %s", path, _error)
+            return 0
+
+        _entries = self._parse_snapshot(data=_data)
+        if _entries is None:
+            self._log_warning("Ignoring invalid snapshot: %s", path)
+            return 0
+
+        for (_name, _value, _updated) in _entries:
+            self._set_entry_from_dot(name=_name, value=_value)
+
+            self.__lock.acquire()
+            if _updated is None:
+                self.__restored.pop(_name, None)
             else:
-                # Does not exist
-                return False
+                self.__restored[_name] = _updated
 
-        # Return the entry
-        return True
+            self.__lock.release()
+
+        return len(_entries)
 
 
     ###########################################################################
     #
-    # Manage status info
+    # Functions to keep the history of entries
+    #
+    ###########################################################################
+    #
+    # track_history
+    #
+    def track_history(self, name="", samples=DEFAULT_HISTORY_SAMPLES, retention=None):
+        '''
+        Keep the recent numeric values of an entry (each change is a sample)
+
+        Parameters:
+            name: The entry name (dot format)
+            samples: The number of samples to keep
+            retention: Ignore samples older than this (seconds). Keep all of
+                the samples if not set
+
+        Return Value:
+            None
+        '''
+        assert name
+
+        _history = History(samples=samples, retention=retention)
+
+        self.__lock.acquire()
+        _value = self._get_entry_from_dot(name=name, default=None)
+        if isinstance(_value, (int, float)) and not isinstance(_value, bool):
+            _history.add(timestamp=time.time(), value=_value)
+
+        self.__history_dict[name] = _history
+        self.__lock.release()
+
+
+    #
+    # untrack_history
+    #
+    def untrack_history(self, name=""):
+        '''
+        Stop keeping the history of an entry (and drop the samples)
+
+        Parameters:
+            name: The entry name (dot format)
+
+        Return Value:
+            boolean: True if removed, False if the history wasn't kept
+        '''
+        self.__lock.acquire()
+        _history = self.__history_dict.pop(name, None)
+        self.__lock.release()
+
+        return _history is not None
+
+
+    #
+    # history
+    #
+    def history(self, name="", period=None, step=None, end=None):
+        '''
+        Get the history of an entry summarised in buckets (see History.query)
+
+        Parameters:
+            name: The entry name (dot format)
+            period: How far back to go (seconds). Defaults to the retention,
+                or an hour if there is none
+            step: The length of each bucket (seconds). Defaults to a sixtieth
+                of the period
+            end: The end of the last bucket (time.time). Defaults to now
+
+        Return Value:
+            list: A dict for each bucket. None if the history isn't kept
+        '''
+        _history = self.__history_dict.get(name)
+        if not _history: return None
+
+        if period is None: period = _history.retention or 3600
+        if period <= 0: raise ValueError(f"Invalid period: {period}")
+        if step is None: step = period / 60
+        if end is None: end = time.time()
+
+        return _history.query(start=end - period, end=end, step=step)
+
+
+    ###########################################################################
+    #
+    # Functions to handle forking
+    #
+    ###########################################################################
+    #
+    # _before_fork
+    #
+    def _before_fork(self):
+        '''
+        Hold the lock while forking, so the child gets a consistent copy of
+        the status (not one in the middle of a change)
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+
+
+    #
+    # _after_fork_in_parent
+    #
+    def _after_fork_in_parent(self):
+        '''
+        Release the lock held while forking
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock.release()
+
+
+    #
+    # _after_fork_in_child
+    #
+    def _after_fork_in_child(self):
+        '''
+        Reset the status in a forked child.  Only the forking thread exists
+        in the child, so the locks are replaced, the collectors are scheduled
+        again (with fresh timing and health) and the references to the
+        update, collector and web server threads are dropped.  If the updates
+        were running in the parent (in a thread or on an event loop) they are
+        restarted in a thread, unless restart_after_fork is False
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        _restart = self.restart_after_fork and (self.update_thread or self.__loop)
+
+        self.__lock = Lock()
+        self.__pool_lock = Lock()
+        self.__stop_running_jobs = Event()
+        self.__executor = None
+        self.__queued = 0
+        self.__active = 0
+        self.__loop = None
+        self.__task_dict = {}
+        self.__jobs_task = None
+
+        self.update_thread = None
+        self.webserver_thread = None
+        self.webserver = None
+
+        # The slot and snapshots belong to the parent - the child must use its own
+        self.shared_slot = None
+        self.snapshot_path = None
+        self.__snapshot_lock = Lock()
+
+        # Runs in flight in the parent will never complete here
+        self.__scheduler = Scheduler()
+        for (_name, _old) in list(self.__collector_dict.items()):
+            _collector = Collector(name=_name, func=_old.func, update=_old.update, timeout=_old.timeout,
+                    lazy=_old.lazy, stale_while_revalidate=_old.stale_while_revalidate)
+            self.__collector_dict[_name] = _collector
+
+            # Lazy entries are only run when read
+            if _collector.lazy:
+                self.__lazy_dict[_name] = _collector
+                continue
+
+            self.__scheduler.add(name=_name, interval=_collector.update,
+                    func=lambda _collector=_collector: self._dispatch_collector(collector=_collector))
+
+        for _history in self.__history_dict.values():
+            _history._after_fork()
+
+        if self.__dispatcher: self.__dispatcher._after_fork()
+
+        if _restart: self.start_updates()
+
+
+    ###########################################################################
+    #
+    # Functions to schedule updates on an asyncio event loop
+    #
+    ###########################################################################
+    #
+    # _run_async_collector
+    #
+    async def _run_async_collector(self, collector=None):
+        '''
+        Keep updating an entry from the event loop
+
+        Parameters:
+            collector: The Collector for the entry
+
+        Return Value:
+            None
+        '''
+        import asyncio
+
+        _loop = asyncio.get_running_loop()
+        _next = _loop.time()
+
+        # Wait for the next update if the value is still fresh (eg restored from a snapshot)
+        _delay = collector.due_in()
+        if _delay:
+            _next += _delay
+            await asyncio.sleep(_delay)
+
+        while True:
+            # Skip the update if a run is still in flight
+            _run_id = collector.start()
+            if _run_id is not None:
+                _start = time.perf_counter()
+                try:
+                    _value = collector.func()
+                    if isinstance(_value, Awaitable):
+                        _value = await asyncio.wait_for(_value, timeout=collector.timeout)
+
+                    collector.complete(run_id=_run_id,
+                            func=lambda: self._set_entry_from_dot(name=collector.name, value=_value),
+                            duration=time.perf_counter() - _start)
+
+                except asyncio.TimeoutError:
+                    collector.timed_out(run_id=_run_id, duration=time.perf_counter() - _start)
+
+                except asyncio.CancelledError:
+                    # Don't leave the collector running when the task is cancelled
+                    collector.complete(run_id=_run_id)
+                    raise
+
+                except Exception as _err:
+                    collector.complete(run_id=_run_id, duration=time.perf_counter() - _start, error=_err)
+
+            # Skip any updates that were due while the collector was running
+            _next += collector.update
+            _now = _loop.time()
+            if _next < _now:
+                _missed = int((_now - _next) / collector.update) + 1
+                collector.skipped(count=_missed)
+                _next += _missed * collector.update
+
+            await asyncio.sleep(_next - _now)
+
+
+    #
+    # _run_async_jobs
+    #
+    async def _run_async_jobs(self):
+        '''
+        Run the scheduled jobs that aren't entries (publishing to shared
+        memory and saving snapshots) from the event loop
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        import asyncio
+
+        _loop = asyncio.get_running_loop()
+        _wake = asyncio.Event()
+
+        def wake():
+            try:
+                _loop.call_soon_threadsafe(_wake.set)
+            except RuntimeError:
+                pass
+
+        _scheduler = self.__scheduler
+        _scheduler.wake_func = wake
+        try:
+            while True:
+                # Any change from here on wakes the next wait
+                _wake.clear()
+                _delay = _scheduler.run_pending()
+                try:
+                    await asyncio.wait_for(_wake.wait(), timeout=_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+        finally:
+            if _scheduler.wake_func is wake: _scheduler.wake_func = None
+
+
+    #
+    # _start_async_collector
+    #
+    def _start_async_collector(self, name=""):
+        '''
+        Create the task to update an entry on the event loop (safe to call
+        from any thread)
+
+        Parameters:
+            name: The entry name (dot format)
+
+        Return Value:
+            None
+        '''
+        import asyncio
+
+        _collector = self.__collector_dict[name]
+
+        def create_task():
+            _task = self.__loop.create_task(self._run_async_collector(collector=_collector))
+            self.__task_dict[name] = _task
+
+        try:
+            _on_loop = asyncio.get_running_loop() is self.__loop
+        except RuntimeError:
+            _on_loop = False
+
+        if _on_loop:
+            create_task()
+        else:
+            self.__loop.call_soon_threadsafe(create_task)
+
+
+    #
+    # _cancel_collector
+    #
+    def _cancel_collector(self, name=""):
+        '''
+        Stop any scheduled or running updates for an entry
+
+        Parameters:
+            name: The entry name (dot format)
+
+        Return Value:
+            None
+        '''
+        self.__scheduler.remove(name=name)
+
+        if name in self.__task_dict:
+            _task = self.__task_dict.pop(name)
+            if self.__loop and not self.__loop.is_closed():
+                self.__loop.call_soon_threadsafe(_task.cancel)
+
+
+    #
+    # start_async_updates
+    #
+    def start_async_updates(self):
+        '''
+        Run the update functions as tasks on the running event loop instead
+        of in threads.  Call from a coroutine before registering entries with
+        set() - coroutine functions are awaited, normal functions are called
+        directly on the loop.  The other scheduled jobs (see share and
+        persist) are also run from the loop.
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        # Imported when first needed (it is slow to import)
+        import asyncio
+
+        _loop = asyncio.get_running_loop()
+        if self.__loop is _loop: return
+
+        self.__lock.acquire()
+        self.__loop = _loop
+
+        # Move any updates scheduled in threads onto the loop
+        for _name in list(self.__collector_dict.keys()):
+            if self.__collector_dict[_name].lazy: continue
+
+            self._cancel_collector(name=_name)
+            self._start_async_collector(name=_name)
+
+        self.__jobs_task = _loop.create_task(self._run_async_jobs())
+        self.__lock.release()
+
+
+    #
+    # stop_async_updates
+    #
+    def stop_async_updates(self):
+        '''
+        Cancel the update tasks on the event loop
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        for _name in list(self.__task_dict.keys()):
+            self._cancel_collector(name=_name)
+
+        _jobs_task = self.__jobs_task
+        if _jobs_task and self.__loop and not self.__loop.is_closed():
+            self.__loop.call_soon_threadsafe(_jobs_task.cancel)
+
+        _stopped = self.__loop is not None
+        self.__jobs_task = None
+        self.__loop = None
+        self.__lock.release()
+
+        # Save the latest values
+        if _stopped and self.snapshot_path:
+            try:
+                self.save_snapshot()
+            except Exception:
+                pass
+
+
+    ###########################################################################
+    #
+    # Helper/Convenience Functions
+    #
+    ###########################################################################
+    #
+    # _valid_entry_type
+    #
+    @staticmethod
+    def _valid_entry_type(entry=None):
+        '''
+        Check the entry is a type we can handle correctly
+
+        Parameters:
+            entry: The entry
+
+        Return Value:
+            boolean: True if successful, false otherwise
+        '''
+        # Simple lookup of type
+        if not entry: return True
+        if isinstance(entry, str): return True
+        if isinstance(entry, int): return True
+        if isinstance(entry, float): return True
+        if isinstance(entry, bool): return True
+        if isinstance(entry, list): return True
+        if isinstance(entry, tuple): return True
+
+        # Not supported
+        return False
+
+
+    #
+    # _unchanged
+    #
+    @staticmethod
+    def _unchanged(current=None, value=None):
+        '''
+        Check if writing a value to an entry would leave it the same.  Setting
+        a list (or tuple) that is already the entry's value is always a
+        change, as it may have been changed in place
+
+        Parameters:
+            current: The value in the entry
+            value: The value being written
+
+        Return Value:
+            boolean: True if the value is the same, False otherwise
+        '''
+        if type(current) is not type(value) or current != value: return False
+
+        return current is not value or not isinstance(value, (list, tuple))
+
+
+    #
+    # _changed
+    #
+    def _changed(self, name=None, value=None, deleted=False):
+        '''
+        Record a change to an entry (call with the lock held).  Bumps the
+        version, drops the cached JSON for each node on the path to the entry,
+        and passes the change to the change log and listeners
+
+        Parameters:
+            name: The entry name
+            value: The new value for the entry
+            deleted: True if the entry was deleted
+
+        Return Value:
+            None
+        '''
+        self.__version += 1
+
+        _change = (self.__version, name, value, deleted)
+        self.__change_log.append(_change)
+
+        # Add numeric values to the history of the entry (if kept)
+        if self.__history_dict and not deleted and name in self.__history_dict:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.__history_dict[name].add(timestamp=time.time(), value=value)
+        for _listener in self.__listener_list:
+            try:
+                _listener(_change)
+            except Exception:
+                pass
+
+        # Drop the encoding of each node on the path, and of the block holding
+        # the changed member
+        _fragments = self.__fragment_dict
+        _fragments.pop("", None)
+
+        _parent = ""
+        _start = 0
+        _index = name.find(".")
+        while _index >= 0:
+            _path = name[:_index]
+            _fragments.pop(_path, None)
+            if self.__block_dict: self._dirty_block(path=_parent, key=name[_start:_index], node=True)
+
+            _parent = _path
+            _start = _index + 1
+            _index = name.find(".", _start)
+
+        _fragments.pop(name, None)
+        if self.__block_dict: self._dirty_block(path=_parent, key=name[_start:], deleted=deleted)
+
+
+    #
+    # _dirty_block
+    #
+    def _dirty_block(self, path="", key="", node=False, deleted=False):
+        '''
+        Drop the cached encoding of the block holding a member of a node (call
+        with the lock held).  A new member is added to the last block, and a
+        deleted member removed from its block, so the blocks stay in the same
+        order as the node
+
+        Parameters:
+            path: The dot name of the node
+            key: The key of the member
+            node: True if the member is a node (a block only refers to a node,
+                so its encoding doesn't change with the node)
+            deleted: True if the member was deleted from the node
+
+        Return Value:
+            None
+        '''
+        _blocks = self.__block_dict.get(path)
+        if _blocks is None: return
+
+        (_block_list, _block_of) = _blocks
+        _block = _block_of.get(key)
+        if _block is None:
+            if deleted: return
+
+            if _block_list and len(_block_list[-1][0]) < EXPORT_BLOCK_SIZE:
+                _block = _block_list[-1]
+            else:
+                _block = [ [], None ]
+                _block_list.append(_block)
+
+            _block[0].append(key)
+            _block_of[key] = _block
+
+        elif deleted:
+            _block[0].remove(key)
+            del _block_of[key]
+            if not _block[0]: _block_list.remove(_block)
+
+        elif node:
+            return
+
+        _block[1] = None
+
+
+    #
+    # _set_entry_from_dot
+    #
+    def _set_entry_from_dot(self, name=None, value=None):
+        '''
+        Set the entry based on a dot name
+
+        Parameters:
+            name: The entry name
+            value: The value for the entry
+
+        Return Value:
+            bool: True if successful, false otherwise
+        '''
+        assert name
+
+        if not self._valid_entry_type(entry=value):
+            raise ValueError(f"Values of type: {type(value)} are not supported") 
+
+        # Existing entries can be found directly from the index
+        self.__lock.acquire()
+        try:
+            _slot = self.__index.get(name)
+            if _slot:
+                # Writing the same value again isn't a change
+                if self._unchanged(current=_slot[0][_slot[1]], value=value): return True
+
+                _slot[0][_slot[1]] = value
+                self._changed(name=name, value=value)
+                return True
+
+            # Walk the path holding the lock, so writers adding entries under
+            # the same new node can't each create their own copy of it
+            _entry = self.__status_dict
+
+            _tmp_name = ""
+            _rest = name
+            while _rest:
+                # Split the name
+                (_part, _, _rest) = _rest.partition(".")
+                _tmp_name = f"{_tmp_name}.{_part}" if _tmp_name else _part
+
+                if not _part in _entry:
+                    # Share the segment with the other entries using it
+                    if self.compact: _part = sys.intern(_part)
+
+                    if not _rest:
+                        # This is the entry to add the value to
+                        _entry[_part] = value
+                        if not self.compact: self.__index[name] = (_entry, _part)
+                        self._changed(name=name, value=value)
+
+                    else:
+                        # Create a nested dict (as there is more to the dot path)
+                        _entry[_part] = {}
+                        _entry = _entry[_part]
+
+                else:
+                    if not _rest:
+                        # Make sure this is not a dict and then add the entry
+                        if isinstance(_entry[_part], dict):
+                            raise ValueError(f"Name has sub entries: {_tmp_name}")
+
+                        # Writing the same value again isn't a change
+                        if self._unchanged(current=_entry[_part], value=value): return True
+
+                        _entry[_part] = value
+                        if not self.compact: self.__index[name] = (_entry, _part)
+                        self._changed(name=name, value=value)
+
+                    else:
+                        if not isinstance(_entry[_part], dict):
+                            raise ValueError(f"Invalid nesting of values under: {_tmp_name}")
+
+                        _entry = _entry[_part]
+
+        finally:
+            self.__lock.release()
+
+        # Return the entry
+        return True
+
+
+    #
+    # _leaves
+    #
+    def _leaves(self):
+        '''
+        Get all of the values in the status (call with the lock held)
+
+        Parameters:
+            None
+
+        Return Value:
+            list: (name, value) tuples, with the name in dot format
+        '''
+        if not self.compact:
+            return [ (_name, _slot[0][_slot[1]]) for (_name, _slot) in self.__index.items() ]
+
+        # No index, so walk the tree
+        _leaves = []
+        _stack = [ ("", self.__status_dict) ]
+        while _stack:
+            (_path, _node) = _stack.pop()
+            for (_key, _value) in _node.items():
+                _name = f"{_path}.{_key}" if _path else _key
+                if isinstance(_value, dict) and _value:
+                    _stack.append((_name, _value))
+                elif not isinstance(_value, dict):
+                    _leaves.append((_name, _value))
+
+        return _leaves
+
+
+    #
+    # _get_entry_from_dot
+    #
+    def _get_entry_from_dot(self, name=None, default=None):
+        '''
+        Get the entry based on a dot name
+
+        Parameters:
+            name: The entry name
+            default: The value to return if the entry is not found
+
+        Return Value:
+            value: The entry being requested
+        '''
+        assert name
+
+        # Values can be found directly from the index
+        _slot = self.__index.get(name)
+        if _slot: return _slot[0].get(_slot[1], default)
+
+        _entry = self.__status_dict
+        _value = default
+
+        _rest = name
+        while _rest:
+            # Split the name
+            (_part, _, _rest) = _rest.partition(".")
+
+            # Is the name in the status dict?
+            if isinstance(_entry, dict) and _part in _entry:
+                _entry = _entry[_part]
+            else:
+                break
+
+            if not _rest:
+                # This should be the value
+                _value = _entry
+
+        # Return the entry
+        return _value
+
+
+    #
+    # _delete_entry_from_dot
+    #
+    def _delete_entry_from_dot(self, name=None, subtree=False):
+        '''
+        Delete the entry based on a dot name
+
+        Parameters:
+            name: The entry name
+            subtree: If True, also delete any child entries
+
+        Return Value:
+            value: True if successful, false if not found (exception raised on error)
+        '''
+        assert name
+
+        _entry = self.__status_dict
+
+        _rest = name
+        _tmp_name = ""
+        while _rest:
+            # Split the name
+            (_part, _, _rest) = _rest.partition(".")
+            _tmp_name = f"{_tmp_name}.{_part}" if _tmp_name else _part
+
+            # Is the name in the status dict?
+            if _part in _entry:
+                if not _rest:
+                    # This should be the value
+                    if isinstance(_entry[_part], dict):
+                        # This is a subtree - Can we delete?
+                        if subtree:
+                            # Delete all the subtree entries
+                            _entries = list(_entry[_part].keys())
+                            for _key in _entries:
+                                _subname = f"{_tmp_name}.{_key}" if _tmp_name else _key
+                                self._delete_entry_from_dot(name=_subname, subtree=subtree)
+
+                        else:
+                            raise ValueError(f"Cannot delete subtree: {name}")
+
+                    else:
+                        self.__lock.acquire()
+
+                        # Remove any schedules
+                        self._cancel_collector(name=name)
+                        self.__collector_dict.pop(name, None)
+                        self.__lazy_dict.pop(name, None)
+                        self.__history_dict.pop(name, None)
+
+                        # Delete the value
+                        del _entry[_part]
+                        self.__index.pop(name, None)
+                        self._changed(name=name, deleted=True)
+
+                        self.__lock.release()
+
+                else:
+                    # Move on to the next part
+                    _entry = _entry[_part]
+
+            else:
+                # Does not exist
+                return False
+
+        # Return the entry
+        return True
+
+
+    ###########################################################################
+    #
+    # Change notifications
+    #
+    ###########################################################################
+    #
+    # _changes_since
+    #
+    def _changes_since(self, version=0):
+        '''
+        Get the changes after a version from the change log (call with the
+        lock held)
+
+        Parameters:
+            version: The version to get the changes after
+
+        Return Value:
+            list: (version, name, value, deleted) tuples. None if the changes
+                are no longer (or not yet) in the log
+        '''
+        if version == self.__version: return []
+        if version > self.__version or version < 0: return None
+        if not self.__change_log: return None
+
+        # Versions in the log are consecutive
+        _start = version + 1 - self.__change_log[0][0]
+        if _start < 0: return None
+
+        return [ self.__change_log[_index] for _index in range(_start, len(self.__change_log)) ]
+
+
+    #
+    # add_change_listener
+    #
+    def add_change_listener(self, func=None, since=None):
+        '''
+        Add a function to be called with each change to the status.  The
+        function is called while the status is locked, so it must not block
+        or change the status.
+
+        Parameters:
+            func: Function called with a (version, name, value, deleted) tuple
+            since: A version the caller already has. If the changes after it
+                are still in the change log they are returned instead of
+                a snapshot
+
+        Return Value:
+            tuple: (version, snapshot, changes) - either the status in JSON
+                format (bytes) at the version, with changes as an empty list,
+                or snapshot is None and changes lists the changes after since
+        '''
+        assert callable(func)
+
+        self.__lock.acquire()
+        try:
+            self.__listener_list = self.__listener_list + (func,)
+
+            _changes = None if since is None else self._changes_since(version=since)
+            if _changes is not None: return (self.__version, None, _changes)
+
+            return (self.__version, self._encode_node(node=self.__status_dict, path=""), [])
+
+        finally:
+            self.__lock.release()
+
+
+    #
+    # remove_change_listener
+    #
+    def remove_change_listener(self, func=None):
+        '''
+        Remove a function added with add_change_listener
+
+        Parameters:
+            func: The function
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        self.__listener_list = tuple(_listener for _listener in self.__listener_list if _listener != func)
+        self.__lock.release()
+
+
+    #
+    # subscribe
+    #
+    def subscribe(self, prefix="", callback=None):
+        '''
+        Call a function when entries under a prefix change.  Writing the value
+        an entry already has is not a change.  The function is called on a
+        separate thread, with the changes made since it was last called.
+
+        Parameters:
+            prefix: The entry name (dot format) - the entry and everything
+                under it is included. "" for all entries
+            callback: Function called with a list of (version, name, value,
+                deleted) tuples
+
+        Return Value:
+            Subscription: The subscription (to pass to unsubscribe)
+        '''
+        assert callable(callback)
+
+        self.__lock.acquire()
+        if not self.__dispatcher:
+            self.__dispatcher = ChangeDispatcher()
+            self.__listener_list = self.__listener_list + (self.__dispatcher.publish,)
+
+        self.__lock.release()
+
+        return self.__dispatcher.add(prefix=prefix, callback=callback)
+
+
+    #
+    # unsubscribe
+    #
+    def unsubscribe(self, subscription=None):
+        '''
+        Stop calling the function for a subscription
+
+        Parameters:
+            subscription: The subscription returned by subscribe
+
+        Return Value:
+            boolean: True if successful, False if the subscription wasn't found
+        '''
+        if not self.__dispatcher: return False
+
+        return self.__dispatcher.remove(subscription=subscription)
+
+
+    ###########################################################################
+    #
+    # Manage status info
     #
     ###########################################################################
     #
@@ -367,16 +1653,83 @@ class ApplicationStatus():
 
 
     #
-    # set
+    # set
+    #
+    def set(self, name="", func=None, update=600, timeout=None):
+        '''
+        Set an entry in the dict
+
+        Parameters:
+            name: The entry name (dot format)
+            func: The function to run to get the value for the entry (may be a
+                coroutine function)
+            update: How often to run the function (seconds, may be a float)
+            timeout: Seconds after which a run is abandoned (its value is not
+                used). A new run is not started while one is in progress
+                unless the timeout has passed
+
+        Return Value:
+            boolean: True if successful, false otherwise (exception will be raised)
+        '''
+        assert name
+        assert func
+        assert callable(func)
+        assert update > 0
+        assert timeout is None or timeout > 0
+
+        # Set update interval to max of 1 hour
+        if update > 3600: update = 3600
+
+        _collector = Collector(name=name, func=func, update=update, timeout=timeout)
+        self._use_restored(collector=_collector)
+
+        self.__lock.acquire()
+        self._cancel_collector(name=name)
+        self.__collector_dict[name] = _collector
+        self.__lazy_dict.pop(name, None)
+
+        # Run on the event loop if asyncio updates have been started
+        if self.__loop:
+            self._start_async_collector(name=name)
+            self.__lock.release()
+            return True
+
+        self.__lock.release()
+
+        # Schedule the function to update the value, and get the first value now
+        # (unless a restored value is still fresh)
+        _delay = _collector.due_in()
+        self.__scheduler.add(name=name, func=lambda: self._dispatch_collector(collector=_collector),
+                interval=update, delay=_delay or None)
+        if not _delay: self._dispatch_collector(collector=_collector)
+
+        return True
+
+
+    #
+    # set_lazy
     #
-    def set(self, name="", func=None, update=600):
+    def set_lazy(self, name="", func=None, ttl=60, stale_while_revalidate=False, timeout=None):
         '''
-        Set an entry in the dict
+        Set an entry that is only updated when it is read.  The function isn't
+        scheduled - it is run on the pool when get, items or an export finds
+        the value older than the TTL, and readers at the same time share the
+        one run.  A failed run is tried again by the next reader.  Reads from a
+        running event loop don't wait for the function - await
+        refresh_async first to get an up to date value.  The function may be a
+        coroutine function
 
         Parameters:
             name: The entry name (dot format)
             func: The function to run to get the value for the entry
-            update: How often to run the function
+            ttl: How long a value is used for before it is out of date
+                (seconds, may be a float)
+            stale_while_revalidate: If True, readers of an out of date value
+                get it straight away and the function is run in the background
+                (readers only wait if there is no value yet)
+            timeout: The most seconds readers wait for a run (they get the
+                current value if it takes longer). A run still going after
+                this is abandoned by the next reader (its value is not used)
 
         Return Value:
             boolean: True if successful, false otherwise (exception will be raised)
@@ -384,26 +1737,183 @@ class ApplicationStatus():
         assert name
         assert func
         assert callable(func)
-        assert update > 0
+        assert ttl > 0
+        assert timeout is None or timeout > 0
 
-        # Set update interval to max of 1 hour
-        if update > 3600: update = 3600
+        _collector = Collector(name=name, func=func, update=ttl, timeout=timeout, lazy=True,
+                stale_while_revalidate=stale_while_revalidate)
+        self._use_restored(collector=_collector)
+
+        self.__lock.acquire()
+        self._cancel_collector(name=name)
+        self.__collector_dict[name] = _collector
+        self.__lazy_dict[name] = _collector
+        self.__lock.release()
+
+        return True
 
-        # Create the entry with an empty value 
-        self._set_entry_from_dot(name=name, value=None)
 
-        # Create a function to update the value
-        def update_status_value():
-            _value = func()
-            self._set_entry_from_dot(name=name, value=_value)
+    #
+    # _use_restored
+    #
+    def _use_restored(self, collector=None):
+        '''
+        Keep the value of an entry restored from a snapshot for its new
+        collector, otherwise create the entry with an empty value
+
+        Parameters:
+            collector: The Collector for the entry
+
+        Return Value:
+            None
+        '''
+        _name = collector.name
 
-        # Schedule the function to update the value
-        _job = schedule.every(update).seconds.do(self.run_thread, update_status_value)
-        _job.run()
         self.__lock.acquire()
-        self.__job_dict[name] = _job
+        _restored = self.__restored.pop(_name, None)
+        if _restored is not None and self._get_entry_from_dot(name=_name, default=NOT_FOUND) is not NOT_FOUND:
+            collector.last_success = _restored
         self.__lock.release()
 
+        if collector.last_success is None:
+            self._set_entry_from_dot(name=_name, value=None)
+
+
+    #
+    # _refresh_lazy
+    #
+    def _refresh_lazy(self, collector=None, on_loop=False):
+        '''
+        Start a run of a lazy collector on the pool if the value of its entry
+        is out of date (see set_lazy)
+
+        Parameters:
+            collector: The Collector for the entry
+            on_loop: True if called from a running event loop, which mustn't
+                be blocked - the current value is used
+
+        Return Value:
+            boolean: True if the reader should wait for the run, False if the
+                current value can be used
+        '''
+        if collector.due_in(): return False
+
+        # Readers share a run already in flight (unless it is past its
+        # timeout, when starting again abandons it)
+        if not collector.running or collector.overdue(): self._dispatch_collector(collector=collector)
+
+        # Keep using the current value while it is updated in the background
+        if on_loop or (collector.stale_while_revalidate and collector.last_success is not None):
+            return False
+
+        return True
+
+
+    #
+    # refresh
+    #
+    def refresh(self, name=""):
+        '''
+        Bring the lazy entries (see set_lazy) at or under a name up to date.
+        Called by get, items and the exports.  On a running event loop the
+        out of date entries are updated on the pool and the current values
+        are used, so the loop isn't blocked (see refresh_async)
+
+        Parameters:
+            name: The entry name (dot format). All of the lazy entries if not set
+
+        Return Value:
+            None
+        '''
+        if not self.__lazy_dict: return
+
+        # Start all of the runs before waiting for any of them
+        _on_loop = self._on_event_loop()
+        _start = time.monotonic()
+        _waiting = [ _collector for _collector in self._lazy_collectors(name=name)
+                if self._refresh_lazy(collector=_collector, on_loop=_on_loop) ]
+
+        for _collector in _waiting:
+            _timeout = _collector.timeout
+            if _timeout is not None: _timeout = max(0, _start + _timeout - time.monotonic())
+            _collector.wait(timeout=_timeout)
+
+
+    #
+    # refresh_async
+    #
+    async def refresh_async(self, name=""):
+        '''
+        Bring the lazy entries (see set_lazy) at or under a name up to date
+        from a coroutine.  The out of date entries are updated on the pool,
+        and the runs are awaited without blocking the event loop
+
+        Parameters:
+            name: The entry name (dot format). All of the lazy entries if not set
+
+        Return Value:
+            None
+        '''
+        if not self.__lazy_dict: return
+
+        # Imported when first needed (it is slow to import)
+        import asyncio
+
+        _loop = asyncio.get_running_loop()
+        _waits = []
+        for _collector in self._lazy_collectors(name=name):
+            if self._refresh_lazy(collector=_collector):
+                _waits.append(_loop.run_in_executor(None, _collector.wait, _collector.timeout))
+
+        if _waits: await asyncio.gather(*_waits)
+
+
+    #
+    # _lazy_collectors
+    #
+    def _lazy_collectors(self, name=""):
+        '''
+        Get the collectors of the lazy entries at or under a name
+
+        Parameters:
+            name: The entry name (dot format). All of the lazy entries if not set
+
+        Return Value:
+            list: The Collectors
+        '''
+        _collector = self.__lazy_dict.get(name)
+        if _collector is not None: return [ _collector ]
+
+        _prefix = f"{name}."
+        return [ _collector for (_name, _collector) in list(self.__lazy_dict.items())
+                if not name or _name.startswith(_prefix) ]
+
+
+    #
+    # _on_event_loop
+    #
+    @staticmethod
+    def _on_event_loop():
+        '''
+        Check if running on an event loop (asyncio is only imported by the
+        application, so there can't be a loop if it hasn't been)
+
+        Parameters:
+            None
+
+        Return Value:
+            boolean: True if there is a running event loop on this thread
+        '''
+        _asyncio = sys.modules.get("asyncio")
+        if _asyncio is None: return False
+
+        try:
+            _asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        return True
+
 
     #
     # get
@@ -421,6 +1931,8 @@ class ApplicationStatus():
         '''
         assert name
 
+        if self.__lazy_dict: self.refresh(name=name)
+
         _entry_value = self._get_entry_from_dot(name=name)
         if not _entry_value:
             _entry_value = default
@@ -428,6 +1940,28 @@ class ApplicationStatus():
         return _entry_value
 
 
+    #
+    # items
+    #
+    def items(self):
+        '''
+        Get all of the values in the status
+
+        Parameters:
+            None
+
+        Return Value:
+            list: (name, value) tuples, with the name in dot format
+        '''
+        self.refresh()
+
+        self.__lock.acquire()
+        _items = self._leaves()
+        self.__lock.release()
+
+        return _items
+
+
     #
     # delete
     #
@@ -447,6 +1981,120 @@ class ApplicationStatus():
         return self._delete_entry_from_dot(name=name, subtree=subtree)
 
 
+    #
+    # _encode_node
+    #
+    def _encode_node(self, node=None, path=""):
+        '''
+        Encode a node of the status dict as JSON, reusing the cached encoding
+        of any node that hasn't changed (call with the lock held).  The
+        members of a node are encoded in blocks (EXPORT_BLOCK_SIZE members
+        each), and the encoding of each block is kept, so a change to one
+        member only re-encodes its block.  A block only refers to the members
+        that are nodes (their cached encodings are joined in), so little is
+        cached beyond the encoded nodes.  Nodes that fit in one block, and the
+        compact layout, don't keep the blocks, to save memory
+
+        Parameters:
+            node: The dict to encode
+            path: The dot name of the node ("" for the top of the status)
+
+        Return Value:
+            bytes: The node in JSON format (UTF-8)
+        '''
+        _fragment = self.__fragment_dict.get(path)
+        if _fragment is not None: return _fragment
+
+        _blocks = self.__block_dict.get(path)
+        if _blocks is None and (self.compact or len(node) <= EXPORT_BLOCK_SIZE):
+            # Not worth keeping the blocks - encode the whole node
+            if not any(isinstance(_value, dict) for _value in node.values()):
+                _fragment = json.dumps(node).encode("utf-8")
+                self.__fragment_dict[path] = _fragment
+                return _fragment
+
+            _pieces = self._encode_members(node=node, keys=node, path=path if self.compact else None)
+        else:
+            if _blocks is None:
+                _keys = list(node)
+                _block_list = [ [ _keys[_index:_index + EXPORT_BLOCK_SIZE], None ]
+                        for _index in range(0, len(_keys), EXPORT_BLOCK_SIZE) ]
+                _blocks = (_block_list, { _key: _block for _block in _block_list for _key in _block[0] })
+                self.__block_dict[path] = _blocks
+
+            _pieces = []
+            for _block in _blocks[0]:
+                if _block[1] is None: _block[1] = self._encode_members(node=node, keys=_block[0])
+                _pieces.extend(_block[1])
+
+        # Join the runs of members with the encodings of the members that are nodes
+        _parts = [ b"{" ]
+        for _piece in _pieces:
+            if len(_parts) > 1: _parts.append(b", ")
+
+            if isinstance(_piece, bytes):
+                _parts.append(_piece)
+            else:
+                (_key, _prefix) = _piece
+                _parts.append(_prefix)
+                _parts.append(self._encode_node(node=node[_key], path=f"{path}.{_key}" if path else _key))
+
+        _parts.append(b"}")
+        _fragment = b"".join(_parts)
+        self.__fragment_dict[path] = _fragment
+
+        return _fragment
+
+
+    #
+    # _encode_members
+    #
+    def _encode_members(self, node=None, keys=(), path=None):
+        '''
+        Encode members of a node (call with the lock held).  Each run of
+        members that aren't nodes is encoded together, and each member that is
+        a node is left as its key and "key": prefix
+
+        Parameters:
+            node: The dict holding the members
+            keys: The keys of the members (in order)
+            path: The dot name of the node, to keep the prefixes (for the
+                compact layout, which doesn't keep the blocks). None to not
+                keep them
+
+        Return Value:
+            list: The pieces - bytes for a run of members, (key, prefix) for
+                a member that is a node
+        '''
+        _prefixes = {}
+        if path is not None:
+            _prefixes = self.__prefix_dict.get(path)
+            if _prefixes is None: _prefixes = self.__prefix_dict[path] = {}
+
+        _pieces = []
+        _values = {}
+        for _key in keys:
+            _value = node[_key]
+            if not isinstance(_value, dict):
+                _values[_key] = _value
+                continue
+
+            if _values:
+                _pieces.append(json.dumps(_values).encode("utf-8")[1:-1])
+                _values = {}
+
+            _prefix = _prefixes.get(_key)
+            if _prefix is None:
+                _prefix = json.dumps(_key).encode("utf-8") + b": "
+                if path is not None: _prefixes[_key] = _prefix
+
+            _pieces.append((_key, _prefix))
+
+        if _values: _pieces.append(json.dumps(_values).encode("utf-8")[1:-1])
+
+        return _pieces
+
+
     #
     # export
     #
@@ -460,10 +2108,314 @@ class ApplicationStatus():
         Return Value:
             string: The status in JSON format
         '''
+        self.refresh()
+
+        _snapshot = self.__export_snapshot
+        if _snapshot and _snapshot[0] == self.__version:
+            return _snapshot[1]
+
+        _version = self.__version
+        _text = self.export_bytes(refresh=False).decode("utf-8")
+        self.__export_snapshot = (_version, _text)
+
+        return _text
+
+
+    #
+    # export_bytes
+    #
+    def export_bytes(self, name="", refresh=True):
+        '''
+        Export the status (or part of it) in JSON format, encoded as UTF-8
+
+        Parameters:
+            name: The entry name (dot format) to export. Exports all of the
+                status if not set
+            refresh: If True, bring the lazy entries up to date first (see
+                set_lazy).  Background exports pass False, so they don't run
+                lazy entries that nobody has asked for
+
+        Return Value:
+            bytes: The status in JSON format. None if the name is not found
+        '''
+        if refresh: self.refresh(name=name)
+
+        # Use the cached encoding if nothing has changed
+        _fragment = self.__fragment_dict.get(name)
+        if _fragment is not None: return _fragment
+
+        # Encode while holding the lock so the dict can't change underneath us
+        self.__lock.acquire()
         try:
-            return json.dumps(self.__status_dict)
+            _entry = self.__status_dict
+            if name:
+                _entry = self._get_entry_from_dot(name=name, default=NOT_FOUND)
+                if _entry is NOT_FOUND: return None
+
+            if isinstance(_entry, dict):
+                return self._encode_node(node=_entry, path=name)
+
+            return json.dumps(_entry).encode("utf-8")
+
         except:
-            return ""
+            return b""
+
+        finally:
+            self.__lock.release()
+
+
+    #
+    # _iter_node
+    #
+    def _iter_node(self, node=None, path=""):
+        '''
+        Generate the JSON for a node in pieces, using any cached encodings but
+        without adding to them (call with the lock held - the caller may
+        release it between pieces, so only the keys are taken from the node up
+        front and each value is looked up when it is reached)
+
+        Parameters:
+            node: The dict to encode
+            path: The dot name of the node ("" for the top of the status)
+
+        Return Value:
+            generator: The pieces of the JSON (bytes)
+        '''
+        _fragment = self.__fragment_dict.get(path)
+        if _fragment is not None:
+            yield _fragment
+            return
+
+        _separator = b"{"
+        for _key in list(node):
+            _value = node.get(_key, NOT_FOUND)
+            if _value is NOT_FOUND: continue
+
+            if isinstance(_value, dict):
+                yield _separator + json.dumps(_key).encode("utf-8") + b": "
+                yield from self._iter_node(node=_value, path=f"{path}.{_key}" if path else _key)
+            else:
+                yield _separator + json.dumps(_key).encode("utf-8") + b": " + json.dumps(_value).encode("utf-8")
+
+            _separator = b", "
+
+        yield b"{}" if _separator == b"{" else b"}"
+
+
+    #
+    # _iter_chunks
+    #
+    def _iter_chunks(self, entry=None, name="", chunk_size=EXPORT_CHUNK_SIZE):
+        '''
+        Generate the JSON for an entry in chunks, holding the lock while each
+        chunk is encoded (but not while it is used)
+
+        Parameters:
+            entry: The entry (a dict for a node)
+            name: The entry name (dot format)
+            chunk_size: The target size of each chunk (bytes)
+
+        Return Value:
+            generator: The chunks of the JSON (bytes)
+        '''
+        _pieces = self._iter_node(node=entry, path=name)
+        _done = False
+        while not _done:
+            _chunk = []
+            _size = 0
+
+            self.__lock.acquire()
+            try:
+                for _piece in _pieces:
+                    _chunk.append(_piece)
+                    _size += len(_piece)
+                    if _size >= chunk_size: break
+                else:
+                    _done = True
+
+            finally:
+                self.__lock.release()
+
+            if _chunk: yield b"".join(_chunk) if len(_chunk) > 1 else _chunk[0]
+
+
+    #
+    # iter_export
+    #
+    def iter_export(self, name="", chunk_size=EXPORT_CHUNK_SIZE):
+        '''
+        Export the status (or part of it) in JSON format as a series of chunks
+        (encoded as UTF-8), so the whole of a very large status is never held
+        in memory.  The status can change between chunks - each value is
+        exported as it was when its chunk was encoded
+
+        Parameters:
+            name: The entry name (dot format) to export. Exports all of the
+                status if not set
+            chunk_size: The target size of each chunk (bytes)
+
+        Return Value:
+            generator: The chunks of the JSON (bytes). None if the name is not
+                found
+        '''
+        assert chunk_size > 0
+
+        self.refresh(name=name)
+
+        self.__lock.acquire()
+        try:
+            _entry = self.__status_dict
+            if name:
+                _entry = self._get_entry_from_dot(name=name, default=NOT_FOUND)
+                if _entry is NOT_FOUND: return None
+
+            if not isinstance(_entry, dict):
+                return (_chunk for _chunk in [ json.dumps(_entry).encode("utf-8") ])
+
+        finally:
+            self.__lock.release()
+
+        return self._iter_chunks(entry=_entry, name=name, chunk_size=chunk_size)
+
+
+    #
+    # export_to
+    #
+    def export_to(self, fp=None, name="", chunk_size=EXPORT_CHUNK_SIZE):
+        '''
+        Write the status (or part of it) in JSON format to a file, one chunk
+        at a time (see iter_export)
+
+        Parameters:
+            fp: The file to write to (opened in binary mode, or anything with
+                a write method taking bytes - such as a socket file)
+            name: The entry name (dot format) to export. Exports all of the
+                status if not set
+            chunk_size: The target size of each chunk (bytes)
+
+        Return Value:
+            int: The number of bytes written. None if the name is not found
+        '''
+        assert fp
+
+        _chunks = self.iter_export(name=name, chunk_size=chunk_size)
+        if _chunks is None: return None
+
+        _written = 0
+        for _chunk in _chunks:
+            fp.write(_chunk)
+            _written += len(_chunk)
+
+        return _written
+
+
+    #
+    # export_since_bytes
+    #
+    def export_since_bytes(self, version=0, instance_id=None):
+        '''
+        Export the changes to the status after a version in JSON format,
+        encoded as UTF-8.  The result has the current version, and either the
+        values set and the names deleted since the version:
+            {"version": 12, "instance": "...", "full": false,
+                "set": {"db.pool.size": 10}, "deleted": ["db.name"]}
+        or the full status, if the changes are no longer in the change log:
+            {"version": 12, "instance": "...", "full": true, "status": {...}}
+
+        Parameters:
+            version: The version the caller already has
+            instance_id: The instance the version came from. The full status is
+                exported if it is not this instance
+
+        Return Value:
+            bytes: The changes in JSON format
+        '''
+        self.refresh()
+
+        self.__lock.acquire()
+        try:
+            _changes = None
+            if instance_id is None or instance_id == self.__instance_id:
+                _changes = self._changes_since(version=version)
+
+            _head = json.dumps({ "version": self.__version, "instance": self.__instance_id })[:-1]
+
+            if _changes is None:
+                _status = self._encode_node(node=self.__status_dict, path="")
+                return f"{_head}, \"full\": true, \"status\": ".encode("utf-8") + _status + b"}"
+
+            # Only the last change to each entry matters
+            _set_dict = {}
+            _deleted_dict = {}
+            for (_, _name, _value, _deleted) in _changes:
+                if _deleted:
+                    _set_dict.pop(_name, None)
+                    _deleted_dict[_name] = True
+                else:
+                    _deleted_dict.pop(_name, None)
+                    _set_dict[_name] = _value
+
+            _delta = json.dumps({ "full": False, "set": _set_dict, "deleted": list(_deleted_dict) })
+            return f"{_head}, {_delta[1:]}".encode("utf-8")
+
+        finally:
+            self.__lock.release()
+
+
+    #
+    # export_since
+    #
+    def export_since(self, version=0, instance_id=None):
+        '''
+        Export the changes to the status after a version in JSON format (see
+        export_since_bytes)
+
+        Parameters:
+            version: The version the caller already has
+            instance_id: The instance the version came from
+
+        Return Value:
+            string: The changes in JSON format
+        '''
+        return self.export_since_bytes(version=version, instance_id=instance_id).decode("utf-8")
+
+
+###########################################################################
+#
+# Fork handlers
+#
+###########################################################################
+#
+# _before_fork
+#
+def _before_fork():
+    ''' Hold the lock of each instance while forking '''
+    for _instance in list(_instance_set):
+        _instance._before_fork()
+
+
+#
+# _after_fork_in_parent
+#
+def _after_fork_in_parent():
+    ''' Release the locks held while forking '''
+    for _instance in list(_instance_set):
+        _instance._after_fork_in_parent()
+
+
+#
+# _after_fork_in_child
+#
+def _after_fork_in_child():
+    ''' Reset each instance in the child '''
+    for _instance in list(_instance_set):
+        _instance._after_fork_in_child()
+
+
+# Not available on all platforms (eg Windows can't fork)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent,
+            after_in_child=_after_fork_in_child)
 
 
 ###########################################################################
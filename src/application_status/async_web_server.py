@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+'''
+* async_web_server.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Application Status Info - asyncio web server
+*
+'''
+from http import HTTPStatus
+import asyncio
+
+from .application_status import Status
+from .web_response import build_response, refresh_response, HTML_CONTENT_TYPE
+from .stream import close_streams
+
+
+#
+# Constants
+#
+# Seconds an idle keep-alive connection is held open
+KEEPALIVE_TIMEOUT = 5
+
+# Limits on the size of a request
+MAX_REQUEST_LINE = 65536
+MAX_HEADERS = 100
+
+
+###########################################################################
+#
+# Request handling
+#
+###########################################################################
+#
+# _read_request
+#
+async def _read_request(reader):
+    '''
+    Read a request line and headers from the connection
+
+    Parameters:
+        reader: The asyncio StreamReader for the connection
+
+    Return Value:
+        tuple: (method, path, version, headers) or None if the connection closed
+    '''
+    _line = await asyncio.wait_for(reader.readline(), timeout=KEEPALIVE_TIMEOUT)
+    if not _line: return None
+    if len(_line) > MAX_REQUEST_LINE: raise ValueError("Request line too long")
+
+    _words = _line.decode("iso-8859-1").split()
+    if len(_words) != 3: raise ValueError("Invalid request line")
+    (_method, _path, _version) = _words
+
+    # Headers are stored with lower case names
+    _headers = {}
+    while True:
+        _line = await asyncio.wait_for(reader.readline(), timeout=KEEPALIVE_TIMEOUT)
+        if _line in (b"\r\n", b"\n", b""): break
+        if len(_headers) >= MAX_HEADERS: raise ValueError("Too many headers")
+
+        (_name, _, _value) = _line.decode("iso-8859-1").partition(":")
+        _headers[_name.strip().lower()] = _value.strip()
+
+    return (_method, _path, _version, _headers)
+
+
+#
+# _write_response
+#
+def _write_response(writer, code=200, headers=[], body=b"", reason=None, keep_alive=True):
+    '''
+    Write a complete response with a Content-Length
+
+    Parameters:
+        writer: The asyncio StreamWriter for the connection
+        code: The HTTP status code
+        headers: List of (header, value) tuples to send
+        body: The body of the response (bytes)
+        reason: The reason phrase (defaults to the standard phrase for the code)
+        keep_alive: If False, tell the client the connection will be closed
+
+    Return Value:
+        None
+    '''
+    if not reason: reason = HTTPStatus(code).phrase
+
+    _lines = [ f"HTTP/1.1 {code} {reason}" ]
+    for (_header, _value) in headers:
+        _lines.append(f"{_header}: {_value}")
+
+    # A Not Modified response never has a body
+    if code != 304: _lines.append(f"Content-Length: {len(body)}")
+    if not keep_alive: _lines.append("Connection: close")
+
+    writer.write(("\r\n".join(_lines) + "\r\n\r\n").encode("iso-8859-1") + body)
+
+
+#
+# _write_stream
+#
+async def _write_stream(writer, code=200, headers=[], body=None, chunked=False, keep_alive=True):
+    '''
+    Write a response with the body from an async generator.  The end of the
+    body is marked by the last chunk if it is chunked, otherwise by closing
+    the connection
+
+    Parameters:
+        writer: The asyncio StreamWriter for the connection
+        code: The HTTP status code
+        headers: List of (header, value) tuples to send (including
+            Transfer-Encoding if chunked)
+        body: Async generator of bytes
+        chunked: True to send the body with Transfer-Encoding: chunked
+        keep_alive: If False, tell the client the connection will be closed
+            (always closed if not chunked)
+
+    Return Value:
+        None
+    '''
+    _lines = [ f"HTTP/1.1 {code} {HTTPStatus(code).phrase}" ]
+    for (_header, _value) in headers:
+        _lines.append(f"{_header}: {_value}")
+
+    if not chunked or not keep_alive: _lines.append("Connection: close")
+    writer.write(("\r\n".join(_lines) + "\r\n\r\n").encode("iso-8859-1"))
+
+    try:
+        async for _chunk in body:
+            # An empty chunk would end the body
+            if not _chunk: continue
+
+            if chunked: _chunk = b"%x\r\n%s\r\n" % (len(_chunk), _chunk)
+
+            writer.write(_chunk)
+            await writer.drain()
+
+        if chunked: writer.write(b"0\r\n\r\n")
+
+    finally:
+        await body.aclose()
+
+
+#
+# handle_connection
+#
+async def handle_connection(reader, writer):
+    '''
+    Serve requests on a connection until it is closed
+
+    Parameters:
+        reader: The asyncio StreamReader for the connection
+        writer: The asyncio StreamWriter for the connection
+
+    Return Value:
+        None
+    '''
+    try:
+        while True:
+            try:
+                _request = await _read_request(reader)
+            except ValueError:
+                _write_response(writer, code=400, keep_alive=False)
+                break
+
+            if not _request: break
+            (_method, _path, _version, _headers) = _request
+
+            # HTTP/1.1 connections persist unless the client asks otherwise
+            _connection = _headers.get("connection", "").lower()
+            _keep_alive = _version == "HTTP/1.1" and _connection != "close"
+            if _version == "HTTP/1.0" and _connection == "keep-alive": _keep_alive = True
+
+            if _method == "GET":
+                await refresh_response(path=_path)
+                (_code, _resp_headers, _body) = build_response(path=_path, headers=_headers,
+                        asynchronous=True)
+                if not isinstance(_body, bytes):
+                    _chunked = ("Transfer-Encoding", "chunked") in _resp_headers
+
+                    # HTTP/1.0 clients don't understand chunks
+                    if _chunked and _version == "HTTP/1.0":
+                        _resp_headers = [ _header for _header in _resp_headers
+                                if _header[0] != "Transfer-Encoding" ]
+                        _chunked = False
+
+                    await _write_stream(writer, code=_code, headers=_resp_headers, body=_body,
+                            chunked=_chunked, keep_alive=_keep_alive)
+                    if not _chunked: break
+
+                else:
+                    _write_response(writer, code=_code, headers=_resp_headers, body=_body,
+                            keep_alive=_keep_alive)
+            else:
+                # Any request body isn't read, so the connection can't be used again
+                _write_response(writer, code=501, headers=[ ("Content-type", HTML_CONTENT_TYPE) ],
+                        reason=f"Unsupported method ({_method!r})", keep_alive=False)
+                _keep_alive = False
+
+            await writer.drain()
+            if not _keep_alive: break
+
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+
+    finally:
+        writer.close()
+
+
+###########################################################################
+#
+# Web Server control
+#
+###########################################################################
+#
+# start_async_web_server
+#
+async def start_async_web_server(hostname="localhost", port=8180):
+    '''
+    Start the web server on the running event loop
+
+    Parameters:
+        hostname: The hostname/ip address for the server
+        port: The port to listen on
+
+    Return Value:
+        asyncio.Server: The server (already accepting connections)
+    '''
+    Status.webserver = await asyncio.start_server(handle_connection, host=hostname, port=port)
+    Status.webserver_thread = None
+
+    return Status.webserver
+
+
+#
+# stop_async_web_server
+#
+async def stop_async_web_server(server=None):
+    '''
+    Stop the web server started with start_async_web_server
+
+    Parameters:
+        server: The server to stop (defaults to the running status server)
+
+    Return Value:
+        None
+    '''
+    if not server: server = Status.webserver
+    if not server: return
+
+    server.close()
+    close_streams()
+    await server.wait_closed()
+    if server is Status.webserver: Status.webserver = None
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+'''
+* collector.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* State of a function that keeps a status entry up to date
+*
+'''
+from threading import Lock, Event
+from collections import deque
+import bisect
+import time
+
+
+#
+# Constants
+#
+# Upper bounds (seconds) of the buckets in the latency histogram
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+# Number of recent runs included in the latency histogram
+LATENCY_WINDOW = 100
+
+
+###########################################################################
+#
+# Collector Class
+#
+###########################################################################
+class Collector():
+    '''
+    A function (registered with ApplicationStatus.set) that updates an entry.
+    Only one run of a collector is in flight at a time - ticks that arrive
+    while a run is in progress are skipped and counted as overruns.  A run
+    that takes longer than the timeout is abandoned (its value isn't used),
+    but no new run starts until it returns, so a hung function can only ever
+    hold one thread.
+
+    A lazy collector (registered with ApplicationStatus.set_lazy) isn't
+    scheduled - it is run when the entry is read and the value is older than
+    the update interval (the TTL), with other readers waiting for that run.
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, name="", func=None, update=600, timeout=None, lazy=False, stale_while_revalidate=False):
+        ''' Init method for class '''
+        assert name
+        assert callable(func)
+
+        # Private Instance Attributes
+        self.__lock = Lock()
+        self.__run_id = 0
+        self.__started = 0.0
+        self.__done = None
+        self.__abandoned = None
+
+        self.name = name
+        self.func = func
+        self.update = update
+        self.timeout = timeout
+        self.lazy = lazy
+        self.stale_while_revalidate = stale_while_revalidate
+
+        self.running = False
+        self.overruns = 0
+        self.timeouts = 0
+
+        # Timing and health of the runs
+        self.runs = 0
+        self.errors = 0
+        self.last_duration = None
+        self.last_error = None
+        self.last_error_time = None
+        self.last_success = None
+
+        # Rolling histogram - the bucket of each recent run, and a count per bucket
+        self.__recent = deque()
+        self.__histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+    ###########################################################################
+    #
+    # Track runs
+    #
+    ###########################################################################
+    #
+    # start
+    #
+    def start(self):
+        '''
+        Start a run, unless one is already in flight.  A run that has been
+        going for longer than the timeout is abandoned (its value won't be
+        used), and no run is started until it returns
+
+        Parameters:
+            None
+
+        Return Value:
+            int: The ID of the new run. None if the run should be skipped
+        '''
+        _now = time.monotonic()
+
+        self.__lock.acquire()
+        try:
+            # An abandoned run still holds a thread
+            if self.__abandoned is not None:
+                self.overruns += 1
+                return None
+
+            if self.running:
+                if not self.timeout or _now - self.__started < self.timeout:
+                    self.overruns += 1
+                    return None
+
+                # Abandon the run, releasing anyone waiting for it
+                self.timeouts += 1
+                self.__abandoned = self.__run_id
+                self.__run_id += 1
+                self.running = False
+                self.__done.set()
+                return None
+
+            self.running = True
+            self.__started = _now
+            self.__run_id += 1
+            self.__done = Event()
+
+            return self.__run_id
+
+        finally:
+            self.__lock.release()
+
+
+    #
+    # _record
+    #
+    def _record(self, duration=0.0, error=None):
+        '''
+        Record the timing and result of a run (call with the lock held)
+
+        Parameters:
+            duration: How long the run took (seconds)
+            error: The exception raised by the run (None if successful)
+
+        Return Value:
+            None
+        '''
+        self.runs += 1
+        self.last_duration = duration
+
+        # Add to the histogram, dropping the oldest run once the window is full
+        _bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        self.__recent.append(_bucket)
+        self.__histogram[_bucket] += 1
+        if len(self.__recent) > LATENCY_WINDOW:
+            self.__histogram[self.__recent.popleft()] -= 1
+
+        if error:
+            self.errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            self.last_error_time = time.time()
+        else:
+            self.last_success = time.time()
+
+
+    #
+    # complete
+    #
+    def complete(self, run_id=0, func=None, duration=None, error=None):
+        '''
+        Finish a run, calling func if this is still the current run (so an
+        abandoned run can't overwrite a newer value)
+
+        Parameters:
+            run_id: The ID returned by start()
+            func: The function to call (with no arguments) if the run is current
+                and successful
+            duration: How long the run took (seconds). The run isn't recorded
+                if not set
+            error: The exception raised by the run (None if successful)
+
+        Return Value:
+            boolean: True if the run was current, False if it was abandoned
+        '''
+        self.__lock.acquire()
+        try:
+            if run_id == self.__abandoned: self.__abandoned = None
+
+            _current = run_id == self.__run_id
+            if _current:
+                self.running = False
+
+                if func and not error:
+                    try:
+                        func()
+                    except Exception as _err:
+                        error = _err
+
+            if duration is not None: self._record(duration=duration, error=error)
+            if _current: self.__done.set()
+
+            return _current
+
+        finally:
+            self.__lock.release()
+
+
+    #
+    # skipped
+    #
+    def skipped(self, count=1):
+        '''
+        Record runs that were skipped as a run was still in progress
+
+        Parameters:
+            count: The number of runs skipped
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        self.overruns += count
+        self.__lock.release()
+
+
+    #
+    # timed_out
+    #
+    def timed_out(self, run_id=0, duration=None):
+        '''
+        Finish a run that was stopped as it took longer than the timeout
+
+        Parameters:
+            run_id: The ID returned by start()
+            duration: How long the run took (seconds). The run isn't recorded
+                if not set
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        self.timeouts += 1
+        if run_id == self.__abandoned: self.__abandoned = None
+        if duration is not None:
+            self._record(duration=duration, error=TimeoutError(f"Timed out after {self.timeout}s"))
+
+        if run_id == self.__run_id:
+            self.running = False
+            self.__done.set()
+
+        self.__lock.release()
+
+
+    #
+    # wait
+    #
+    def wait(self, timeout=None):
+        '''
+        Wait for the run in flight (if any) to finish
+
+        Parameters:
+            timeout: The most seconds to wait (waits until the run finishes if
+                not set)
+
+        Return Value:
+            boolean: True if no run is in flight, False if the wait timed out
+        '''
+        self.__lock.acquire()
+        _done = self.__done if self.running else None
+        self.__lock.release()
+
+        return _done.wait(timeout=timeout) if _done else True
+
+
+    #
+    # overdue
+    #
+    def overdue(self):
+        '''
+        Check if the run in flight has been going for longer than the timeout
+
+        Parameters:
+            None
+
+        Return Value:
+            boolean: True if the run is overdue (it is abandoned by the next start)
+        '''
+        self.__lock.acquire()
+        _overdue = self.running and bool(self.timeout) and time.monotonic() - self.__started >= self.timeout
+        self.__lock.release()
+
+        return _overdue
+
+
+    #
+    # due_in
+    #
+    def due_in(self):
+        '''
+        Get the time until the collector is next due to run, based on its last
+        success (which may have been restored from a snapshot)
+
+        Parameters:
+            None
+
+        Return Value:
+            float: Seconds until the next run (0 if it is due now)
+        '''
+        if self.last_success is None: return 0
+
+        _age = time.time() - self.last_success
+        if _age < 0 or _age >= self.update: return 0
+
+        return self.update - _age
+
+
+    #
+    # stats
+    #
+    def stats(self):
+        '''
+        Get the state of the collector
+
+        Parameters:
+            None
+
+        Return Value:
+            dict: The state of the collector
+        '''
+        self.__lock.acquire()
+
+        # Count of recent runs by the upper bound of their latency bucket
+        _histogram = {}
+        for (_index, _count) in enumerate(self.__histogram):
+            _bound = str(LATENCY_BUCKETS[_index]) if _index < len(LATENCY_BUCKETS) else "+Inf"
+            _histogram[_bound] = _count
+
+        _stats = {
+            "update": self.update,
+            "timeout": self.timeout,
+            "lazy": self.lazy,
+            "running": self.running,
+            "runs": self.runs,
+            "errors": self.errors,
+            "overruns": self.overruns,
+            "timeouts": self.timeouts,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "last_error_time": self.last_error_time,
+            "last_success": self.last_success,
+            "latency_histogram": _histogram,
+        }
+
+        self.__lock.release()
+
+        return _stats
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+'''
+* history.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Recent values of a numeric status entry
+*
+'''
+from threading import Lock
+from array import array
+import math
+import time
+
+
+#
+# Constants
+#
+DEFAULT_HISTORY_SAMPLES = 3600
+
+# Most buckets returned by a query
+MAX_HISTORY_BUCKETS = 10000
+
+
+###########################################################################
+#
+# History Class
+#
+###########################################################################
+class History():
+    '''
+    A fixed size ring buffer of (time, value) samples, held in arrays of
+    doubles so the samples aren't Python objects.  Once the buffer is full
+    each new sample replaces the oldest.
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, samples=DEFAULT_HISTORY_SAMPLES, retention=None):
+        '''
+        Init method for class
+
+        Parameters:
+            samples: The number of samples to keep
+            retention: Ignore samples older than this (seconds). Keep all of
+                the samples if not set
+        '''
+        assert samples > 0
+        assert retention is None or retention > 0
+
+        # Private Instance Attributes
+        self.__lock = Lock()
+        self.__times = array("d", bytes(8 * samples))
+        self.__values = array("d", bytes(8 * samples))
+        self.__first = 0
+        self.__count = 0
+
+        self.samples = samples
+        self.retention = retention
+
+
+    #
+    # __len__
+    #
+    def __len__(self):
+        ''' The number of samples held '''
+        return self.__count
+
+
+    #
+    # _after_fork
+    #
+    def _after_fork(self):
+        '''
+        Reset the lock in a forked child (it may have been held by a thread
+        that doesn't exist in the child)
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock = Lock()
+
+
+    #
+    # add
+    #
+    def add(self, timestamp=0.0, value=0.0):
+        '''
+        Add a sample
+
+        Parameters:
+            timestamp: The time of the sample (time.time)
+            value: The value
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+
+        _size = self.samples
+        if self.__count:
+            # Keep the times in order, even if the clock goes backwards
+            _previous = self.__times[(self.__first + self.__count - 1) % _size]
+            if timestamp < _previous: timestamp = _previous
+
+        if self.__count < _size:
+            _slot = (self.__first + self.__count) % _size
+            self.__count += 1
+        else:
+            _slot = self.__first
+            self.__first = (self.__first + 1) % _size
+
+        self.__times[_slot] = timestamp
+        self.__values[_slot] = value
+
+        self.__lock.release()
+
+
+    #
+    # _find
+    #
+    def _find(self, timestamp=0.0):
+        '''
+        Find the first sample at or after a time (call with the lock held)
+
+        Parameters:
+            timestamp: The time
+
+        Return Value:
+            int: The position of the sample (oldest is 0). The number of
+                samples if there is none
+        '''
+        _times = self.__times
+        _first = self.__first
+        _size = self.samples
+
+        (_low, _high) = (0, self.__count)
+        while _low < _high:
+            _middle = (_low + _high) // 2
+            if _times[(_first + _middle) % _size] < timestamp:
+                _low = _middle + 1
+            else:
+                _high = _middle
+
+        return _low
+
+
+    #
+    # query
+    #
+    def query(self, start=0.0, end=0.0, step=1.0):
+        '''
+        Summarise the samples between two times in buckets.  Each bucket
+        includes the value in effect at its start (the last earlier sample),
+        so a value that didn't change during a bucket is still reported
+
+        Parameters:
+            start: The start of the first bucket (time.time)
+            end: The end of the last bucket (time.time)
+            step: The length of each bucket (seconds)
+
+        Return Value:
+            list: A dict for each bucket - the time it starts, the min, max and
+                average values (None if there is no value yet), and the number
+                of samples in the bucket
+        '''
+        if step <= 0: raise ValueError(f"Invalid step: {step}")
+        if end <= start: return []
+
+        _bucket_count = math.ceil((end - start) / step)
+        if _bucket_count > MAX_HISTORY_BUCKETS: raise ValueError(f"Too many buckets: {_bucket_count}")
+
+        self.__lock.acquire()
+        try:
+            _times = self.__times
+            _values = self.__values
+            _first = self.__first
+            _size = self.samples
+            _count = self.__count
+
+            # Samples outside the retention period are ignored
+            _oldest = self._find(timestamp=time.time() - self.retention) if self.retention else 0
+
+            _index = max(self._find(timestamp=start), _oldest)
+            _last = _values[(_first + _index - 1) % _size] if _index > _oldest else None
+
+            _bucket_list = []
+            for _bucket in range(_bucket_count):
+                _bucket_end = min(start + (_bucket + 1) * step, end)
+
+                if _last is None:
+                    (_min, _max, _sum, _values_seen) = (None, None, 0.0, 0)
+                else:
+                    (_min, _max, _sum, _values_seen) = (_last, _last, _last, 1)
+
+                _samples = 0
+                while _index < _count:
+                    _slot = (_first + _index) % _size
+                    if _times[_slot] >= _bucket_end: break
+
+                    _last = _values[_slot]
+                    if _min is None or _last < _min: _min = _last
+                    if _max is None or _last > _max: _max = _last
+                    _sum += _last
+                    _values_seen += 1
+                    _samples += 1
+                    _index += 1
+
+                _bucket_list.append({
+                    "time": start + _bucket * step,
+                    "min": _min,
+                    "max": _max,
+                    "avg": _sum / _values_seen if _values_seen else None,
+                    "count": _samples,
+                })
+
+            return _bucket_list
+
+        finally:
+            self.__lock.release()
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+'''
+* metrics.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Render the status in the Prometheus text exposition format
+*
+'''
+from threading import Lock
+import re
+
+from .application_status import Status
+
+
+#
+# Constants
+#
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Characters not allowed in a metric name
+INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+###########################################################################
+#
+# MetricsExporter Class
+#
+###########################################################################
+class MetricsExporter():
+    '''
+    Convert the numeric values in the status to Prometheus metrics.  The
+    dot name becomes the metric name (db.pool.size -> db_pool_size), unless
+    a label rule matches the name.
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, *args, **kwargs):
+        ''' Init method for class '''
+        super().__init__(*args, **kwargs)
+
+        # Private Instance Attributes
+        self.__lock = Lock()
+        self.__rule_list = []
+        self.__generation = 0
+        self.__cache = None
+
+        self.prefix = ""
+
+
+    ###########################################################################
+    #
+    # Label rules
+    #
+    ###########################################################################
+    #
+    # add_label_rule
+    #
+    def add_label_rule(self, pattern="", metric=""):
+        '''
+        Add a rule to extract labels from entry names.  The named groups in
+        the pattern become labels, eg the pattern
+        r"shard\\.(?P<shard>[^.]+)\\.connections" with metric "shard_connections"
+        renders shard.a.connections as shard_connections{shard="a"}
+
+        Parameters:
+            pattern: Regular expression matched against the whole dot name
+            metric: The metric name to use for matching entries
+
+        Return Value:
+            None
+        '''
+        assert pattern
+        assert metric
+
+        _rule = (re.compile(pattern), self.metric_name(name=metric))
+
+        self.__lock.acquire()
+        self.__rule_list.append(_rule)
+        self.__generation += 1
+        self.__lock.release()
+
+
+    #
+    # clear_label_rules
+    #
+    def clear_label_rules(self):
+        '''
+        Remove all of the label rules
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        self.__rule_list = []
+        self.__generation += 1
+        self.__lock.release()
+
+
+    ###########################################################################
+    #
+    # Rendering
+    #
+    ###########################################################################
+    #
+    # metric_name
+    #
+    @staticmethod
+    def metric_name(name=""):
+        '''
+        Convert a dot name to a valid metric name
+
+        Parameters:
+            name: The entry name (dot format)
+
+        Return Value:
+            string: The metric name
+        '''
+        _name = INVALID_NAME_CHARS.sub("_", name.replace(".", "_"))
+        if _name[:1].isdigit(): _name = f"_{_name}"
+
+        return _name
+
+
+    #
+    # escape_label
+    #
+    @staticmethod
+    def escape_label(value=""):
+        '''
+        Escape a label value
+
+        Parameters:
+            value: The label value
+
+        Return Value:
+            string: The escaped value
+        '''
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+    #
+    # format_value
+    #
+    @staticmethod
+    def format_value(value=0):
+        '''
+        Format a sample value
+
+        Parameters:
+            value: The value (int, float or bool)
+
+        Return Value:
+            string: The formatted value
+        '''
+        if isinstance(value, bool): return "1" if value else "0"
+        if isinstance(value, int): return str(value)
+        if value != value: return "NaN"
+        if value in (float("inf"), float("-inf")): return "+Inf" if value > 0 else "-Inf"
+
+        return repr(value)
+
+
+    #
+    # render
+    #
+    def render(self):
+        '''
+        Render the numeric values in the status as metrics, reusing the last
+        render if the status hasn't changed
+
+        Parameters:
+            None
+
+        Return Value:
+            bytes: The metrics in the text exposition format (UTF-8)
+        '''
+        # Update any lazy entries first, so the cached render can be checked
+        Status.refresh()
+
+        _version = Status.version
+        _generation = self.__generation
+        _prefix = self.prefix
+
+        _cache = self.__cache
+        if _cache and _cache[0:3] == (_version, _generation, _prefix): return _cache[3]
+
+        _rule_list = self.__rule_list
+        _metric_dict = {}
+
+        for (_name, _value) in Status.items():
+            if not isinstance(_value, (int, float)): continue
+
+            # Use the first matching rule, otherwise convert the name
+            _metric = None
+            _labels = ""
+            for (_pattern, _rule_metric) in _rule_list:
+                _match = _pattern.fullmatch(_name)
+                if not _match: continue
+
+                _metric = _rule_metric
+                _labels = ",".join(
+                        f'{_label}="{self.escape_label(value=_text or "")}"'
+                        for (_label, _text) in _match.groupdict().items())
+                break
+
+            if not _metric: _metric = self.metric_name(name=_name)
+            if _prefix: _metric = f"{self.metric_name(name=_prefix)}_{_metric}"
+
+            _sample = f"{_metric}{{{_labels}}}" if _labels else _metric
+            _metric_dict.setdefault(_metric, []).append(f"{_sample} {self.format_value(value=_value)}")
+
+        _lines = []
+        for (_metric, _samples) in sorted(_metric_dict.items()):
+            _lines.append(f"# TYPE {_metric} gauge")
+            _lines.extend(_samples)
+
+        _body = ("\n".join(_lines) + "\n").encode("utf-8") if _lines else b""
+        self.__cache = (_version, _generation, _prefix, _body)
+
+        return _body
+
+
+###########################################################################
+#
+# Define the instance - Can be imported wherever needed:
+#   from application_status.metrics import Metrics
+#
+###########################################################################
+Metrics = MetricsExporter()
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+'''
+* scheduler.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Deadline driven scheduler for the status update functions
+*
+'''
+from threading import Lock, Event
+import heapq
+import time
+
+
+#
+# Constants
+#
+
+
+###########################################################################
+#
+# Scheduler Class
+#
+###########################################################################
+class Scheduler():
+    '''
+    Run named jobs at a fixed interval.  Jobs are kept in a heap ordered by
+    when they are next due, so the runner only needs to wake when the first
+    job is due (or when the jobs change).
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, *args, **kwargs):
+        ''' Init method for class '''
+        super().__init__(*args, **kwargs)
+
+        # Private Instance Attributes
+        self.__lock = Lock()
+        self.__wake_event = Event()
+
+        # Heap of (due time, sequence, name) - entries are dropped lazily once
+        # the sequence no longer matches the job
+        self.__heap = []
+        self.__job_dict = {}
+        self.__sequence = 0
+
+        # Called (from any thread) when the jobs change, for a runner that
+        # can't wait on the scheduler (eg a task on an event loop)
+        self.wake_func = None
+
+
+    #
+    # __len__
+    #
+    def __len__(self):
+        ''' The number of jobs '''
+        return len(self.__job_dict)
+
+
+    #
+    # __contains__
+    #
+    def __contains__(self, name):
+        ''' Check if there is a job with this name '''
+        return name in self.__job_dict
+
+
+    ###########################################################################
+    #
+    # Manage jobs
+    #
+    ###########################################################################
+    #
+    # _push
+    #
+    def _push(self, name="", due=0.0):
+        '''
+        Add the next run of a job to the heap (call with the lock held)
+
+        Parameters:
+            name: The job name
+            due: When the job is due (time.monotonic)
+
+        Return Value:
+            None
+        '''
+        self.__sequence += 1
+        self.__job_dict[name][2] = self.__sequence
+        heapq.heappush(self.__heap, (due, self.__sequence, name))
+
+
+    #
+    # add
+    #
+    def add(self, name="", func=None, interval=60, delay=None):
+        '''
+        Add a job, replacing any job with the same name
+
+        Parameters:
+            name: The job name
+            func: The function to run (takes no arguments)
+            interval: How often to run the function (seconds, may be a float)
+            delay: Seconds until the first run (defaults to the interval)
+
+        Return Value:
+            None
+        '''
+        assert name
+        assert callable(func)
+        assert interval > 0
+
+        if delay is None: delay = interval
+
+        self.__lock.acquire()
+        self.__job_dict[name] = [ func, interval, 0 ]
+        self._push(name=name, due=time.monotonic() + max(0, delay))
+        self.__lock.release()
+
+        # The runner may need to wake earlier than it planned
+        self.wake()
+
+
+    #
+    # remove
+    #
+    def remove(self, name=""):
+        '''
+        Remove a job
+
+        Parameters:
+            name: The job name
+
+        Return Value:
+            boolean: True if the job was removed, False if not found
+        '''
+        self.__lock.acquire()
+        _job = self.__job_dict.pop(name, None)
+        self.__lock.release()
+
+        if not _job: return False
+
+        self.wake()
+        return True
+
+
+    #
+    # clear
+    #
+    def clear(self):
+        '''
+        Remove all of the jobs
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        self.__job_dict = {}
+        self.__heap = []
+        self.__lock.release()
+
+        self.wake()
+
+
+    ###########################################################################
+    #
+    # Run jobs
+    #
+    ###########################################################################
+    #
+    # run_pending
+    #
+    def run_pending(self):
+        '''
+        Run the jobs that are due
+
+        Parameters:
+            None
+
+        Return Value:
+            float: Seconds until the next job is due. None if there are no jobs
+        '''
+        # Any change from here on should wake the next wait
+        self.__wake_event.clear()
+
+        _due_list = []
+        _now = time.monotonic()
+
+        self.__lock.acquire()
+        while self.__heap:
+            (_due, _sequence, _name) = self.__heap[0]
+
+            # Drop runs for jobs that have been removed or replaced
+            _job = self.__job_dict.get(_name)
+            if not _job or _job[2] != _sequence:
+                heapq.heappop(self.__heap)
+                continue
+
+            if _due > _now: break
+
+            heapq.heappop(self.__heap)
+            _due_list.append(_job[0])
+
+            # Keep to the interval, unless we have fallen a whole interval behind
+            _next = _due + _job[1]
+            if _next <= _now: _next = _now + _job[1]
+            self._push(name=_name, due=_next)
+
+        _delay = max(0.0, self.__heap[0][0] - _now) if self.__heap else None
+        self.__lock.release()
+
+        # A failing job shouldn't stop the others
+        for _func in _due_list:
+            try:
+                _func()
+            except Exception:
+                pass
+
+        return _delay
+
+
+    #
+    # wait
+    #
+    def wait(self, timeout=None):
+        '''
+        Wait until the timeout expires or the scheduler is woken
+
+        Parameters:
+            timeout: Seconds to wait. None to wait until woken
+
+        Return Value:
+            boolean: True if woken, False if the timeout expired
+        '''
+        return self.__wake_event.wait(timeout=timeout)
+
+
+    #
+    # wake
+    #
+    def wake(self):
+        '''
+        Wake anything waiting on the scheduler
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__wake_event.set()
+
+        _wake_func = self.wake_func
+        if _wake_func: _wake_func()
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
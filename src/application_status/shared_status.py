@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+'''
+* shared_status.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Share the status of several processes through shared memory
+*
+'''
+import struct
+import mmap
+import json
+import time
+import os
+
+
+#
+# Constants
+#
+MAGIC = b"APPSTAT1"
+
+# File header: magic, number of slots, size of each slot
+HEADER = struct.Struct("<8sII")
+
+# Slot header: sequence, payload length, pid, publish time
+SLOT_HEADER = struct.Struct("<QIId")
+
+DEFAULT_SLOTS = 16
+DEFAULT_SLOT_SIZE = 1024 * 1024
+
+# Times to retry reading a slot that is being written
+READ_RETRIES = 100
+
+# Ways to merge the status of the processes
+MERGE_MODES = ("namespace", "sum", "max")
+
+
+###########################################################################
+#
+# SharedStatusRegion Class
+#
+###########################################################################
+class SharedStatusRegion():
+    '''
+    A memory mapped file divided into slots, with each process publishing
+    its status (as JSON) into its own slot.  Each slot has one writer, so no
+    locks are needed - the sequence number is odd while a slot is being
+    written, and readers retry if it is odd or changes while they read.
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, path="", slots=DEFAULT_SLOTS, slot_size=DEFAULT_SLOT_SIZE, create=False):
+        '''
+        Init method for class
+
+        Parameters:
+            path: The file to map (shared by all of the processes)
+            slots: The number of slots (if creating the file)
+            slot_size: The size of each slot in bytes (if creating the file)
+            create: If True, create (or reset) the file
+        '''
+        assert path
+
+        self.path = path
+
+        if create:
+            assert slots > 0
+            assert slot_size > SLOT_HEADER.size
+
+            _fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.ftruncate(_fd, HEADER.size + slots * slot_size)
+        else:
+            _fd = os.open(path, os.O_RDWR)
+
+        try:
+            self.__map = mmap.mmap(_fd, 0)
+        finally:
+            os.close(_fd)
+
+        if create:
+            HEADER.pack_into(self.__map, 0, MAGIC, slots, slot_size)
+
+        (_magic, self.slots, self.slot_size) = HEADER.unpack_from(self.__map, 0)
+        if _magic != MAGIC: raise ValueError(f"Not a shared status file: {path}")
+
+        # Private Instance Attributes
+        self.__parsed = {}
+        self.__merged = {}
+
+
+    #
+    # _offset
+    #
+    def _offset(self, slot=0):
+        '''
+        Get the offset of a slot in the file
+
+        Parameters:
+            slot: The slot number
+
+        Return Value:
+            int: The offset
+        '''
+        if slot < 0 or slot >= self.slots: raise ValueError(f"Invalid slot: {slot}")
+
+        return HEADER.size + slot * self.slot_size
+
+
+    #
+    # close
+    #
+    def close(self):
+        '''
+        Unmap the file
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__map.close()
+
+
+    ###########################################################################
+    #
+    # Write
+    #
+    ###########################################################################
+    #
+    # publish
+    #
+    def publish(self, slot=0, payload=b""):
+        '''
+        Write the payload to a slot (only one process may write each slot)
+
+        Parameters:
+            slot: The slot number
+            payload: The status in JSON format (bytes)
+
+        Return Value:
+            None
+        '''
+        _offset = self._offset(slot=slot)
+        if len(payload) > self.slot_size - SLOT_HEADER.size:
+            raise ValueError(f"Status too large for slot: {len(payload)} bytes")
+
+        (_sequence, _, _, _) = SLOT_HEADER.unpack_from(self.__map, _offset)
+        if _sequence % 2: _sequence += 1
+
+        # Odd while writing
+        struct.pack_into("<Q", self.__map, _offset, _sequence + 1)
+
+        _start = _offset + SLOT_HEADER.size
+        self.__map[_start:_start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.__map, _offset, _sequence + 1, len(payload), os.getpid(), time.time())
+
+        struct.pack_into("<Q", self.__map, _offset, _sequence + 2)
+
+
+    ###########################################################################
+    #
+    # Read
+    #
+    ###########################################################################
+    #
+    # sequence
+    #
+    def sequence(self, slot=0):
+        '''
+        Get the sequence number of a slot (changes each time it is published)
+
+        Parameters:
+            slot: The slot number
+
+        Return Value:
+            int: The sequence number (0 if never published)
+        '''
+        return struct.unpack_from("<Q", self.__map, self._offset(slot=slot))[0]
+
+
+    #
+    # read
+    #
+    def read(self, slot=0):
+        '''
+        Read the payload from a slot
+
+        Parameters:
+            slot: The slot number
+
+        Return Value:
+            tuple: (sequence, pid, publish time, payload). None if the slot has
+                never been published or is busy
+        '''
+        _offset = self._offset(slot=slot)
+
+        for _ in range(READ_RETRIES):
+            (_sequence, _length, _pid, _published) = SLOT_HEADER.unpack_from(self.__map, _offset)
+            if _sequence == 0: return None
+            if _sequence % 2: continue
+
+            _start = _offset + SLOT_HEADER.size
+            _payload = self.__map[_start:_start + _length]
+
+            # Make sure the slot wasn't written while we read it
+            if self.sequence(slot=slot) == _sequence:
+                return (_sequence, _pid, _published, _payload)
+
+        return None
+
+
+    #
+    # read_all
+    #
+    def read_all(self, max_age=None):
+        '''
+        Read the status of every process
+
+        Parameters:
+            max_age: Ignore slots not published within this many seconds
+
+        Return Value:
+            dict: The status (parsed) by slot number
+        '''
+        _now = time.time()
+        _status_dict = {}
+
+        for _slot in range(self.slots):
+            _read = self.read(slot=_slot)
+            if not _read: continue
+
+            (_sequence, _pid, _published, _payload) = _read
+            if max_age is not None and _now - _published > max_age: continue
+
+            # Only parse a slot again if it has changed
+            _parsed = self.__parsed.get(_slot)
+            if not _parsed or _parsed[0] != _sequence:
+                try:
+                    _parsed = (_sequence, json.loads(_payload))
+                except ValueError:
+                    continue
+
+                self.__parsed[_slot] = _parsed
+
+            _status_dict[_slot] = _parsed[1]
+
+        return _status_dict
+
+
+    ###########################################################################
+    #
+    # Merge
+    #
+    ###########################################################################
+    #
+    # _merge_into
+    #
+    @classmethod
+    def _merge_into(cls, target=None, source=None, mode="sum"):
+        '''
+        Merge one status into another, combining numbers with sum or max
+        (anything else keeps the first value found)
+
+        Parameters:
+            target: The merged status (dict - updated)
+            source: The status to merge in (dict)
+            mode: "sum" or "max"
+
+        Return Value:
+            None
+        '''
+        for (_key, _value) in source.items():
+            if _key not in target:
+                target[_key] = _value if not isinstance(_value, dict) else {}
+                if isinstance(_value, dict): cls._merge_into(target=target[_key], source=_value, mode=mode)
+                continue
+
+            _current = target[_key]
+            if isinstance(_current, dict) and isinstance(_value, dict):
+                cls._merge_into(target=_current, source=_value, mode=mode)
+
+            elif cls._is_number(_current) and cls._is_number(_value):
+                target[_key] = _current + _value if mode == "sum" else max(_current, _value)
+
+
+    #
+    # _is_number
+    #
+    @staticmethod
+    def _is_number(value=None):
+        ''' Check if a value is a number (but not a bool) '''
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+    #
+    # merged
+    #
+    def merged(self, mode="namespace", max_age=None):
+        '''
+        Merge the status of all of the processes
+
+        Parameters:
+            mode: "namespace" to put each process under "worker-<slot>", or
+                "sum"/"max" to combine the numbers from each process
+            max_age: Ignore slots not published within this many seconds
+
+        Return Value:
+            dict: The merged status
+        '''
+        if mode not in MERGE_MODES: raise ValueError(f"Invalid merge mode: {mode}")
+
+        _status_dict = self.read_all(max_age=max_age)
+        if mode == "namespace":
+            return { f"worker-{_slot}": _status for (_slot, _status) in _status_dict.items() }
+
+        _merged = {}
+        for _slot in sorted(_status_dict):
+            self._merge_into(target=_merged, source=_status_dict[_slot], mode=mode)
+
+        return _merged
+
+
+    #
+    # merged_bytes
+    #
+    def merged_bytes(self, mode="namespace", max_age=None):
+        '''
+        Merge the status of all of the processes in JSON format, reusing the
+        last merge if no process has published since
+
+        Parameters:
+            mode: "namespace", "sum" or "max" (see merged)
+            max_age: Ignore slots not published within this many seconds
+
+        Return Value:
+            bytes: The merged status in JSON format (UTF-8)
+        '''
+        _sequences = tuple(self.sequence(slot=_slot) for _slot in range(self.slots))
+
+        # The age of slots changes without them being published
+        _cached = self.__merged.get(mode)
+        if max_age is None and _cached and _cached[0] == _sequences: return _cached[1]
+
+        _body = json.dumps(self.merged(mode=mode, max_age=max_age)).encode("utf-8")
+        if max_age is None: self.__merged[mode] = (_sequences, _body)
+
+        return _body
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
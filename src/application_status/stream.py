@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+'''
+* stream.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Stream changes to the status as Server-Sent Events
+*
+'''
+from threading import Lock, Event
+from collections import deque
+import asyncio
+import json
+import os
+
+from .application_status import Status
+
+
+#
+# Constants
+#
+SSE_CONTENT_TYPE = "text/event-stream"
+
+# Changes buffered for a subscriber before it is resynced with a snapshot
+MAX_BUFFERED_CHANGES = 1000
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_KEEPALIVE = 15
+
+
+#
+# Globals
+#
+_subscriber_set = set()
+_subscriber_lock = Lock()
+
+
+###########################################################################
+#
+# ChangeSubscriber Class
+#
+###########################################################################
+class ChangeSubscriber():
+    '''
+    Buffer the changes for one stream.  Changes are added on the writer's
+    thread, so adding never blocks - if the buffer fills up (the client isn't
+    keeping up) the buffer is dropped and the client is sent a new snapshot.
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, notify=None, max_buffered=MAX_BUFFERED_CHANGES):
+        ''' Init method for class '''
+        # Private Instance Attributes
+        self.__lock = Lock()
+        self.__buffer = deque()
+        self.__max_buffered = max_buffered
+
+        self.notify = notify
+        self.resync = False
+        self.closed = False
+
+
+    #
+    # push
+    #
+    def push(self, change=None):
+        '''
+        Add a change to the buffer (called by the status for each change)
+
+        Parameters:
+            change: (version, name, value, deleted) tuple
+
+        Return Value:
+            None
+        '''
+        self.__lock.acquire()
+        if not self.resync:
+            if len(self.__buffer) >= self.__max_buffered:
+                self.__buffer.clear()
+                self.resync = True
+            else:
+                self.__buffer.append(change)
+
+        self.__lock.release()
+
+        if self.notify: self.notify()
+
+
+    #
+    # take
+    #
+    def take(self):
+        '''
+        Take the buffered changes
+
+        Parameters:
+            None
+
+        Return Value:
+            tuple: (resync, changes) - if resync is True, the changes were
+                dropped and the client needs a new snapshot
+        '''
+        self.__lock.acquire()
+        _changes = list(self.__buffer)
+        self.__buffer.clear()
+        _resync = self.resync
+        self.resync = False
+        self.__lock.release()
+
+        return (_resync, _changes)
+
+
+    #
+    # close
+    #
+    def close(self):
+        '''
+        Mark the stream as closed and wake it
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.closed = True
+        if self.notify: self.notify()
+
+
+###########################################################################
+#
+# Event formatting
+#
+###########################################################################
+#
+# event_id
+#
+def event_id(version=0):
+    '''
+    Get the event ID for a version
+
+    Parameters:
+        version: The status version
+
+    Return Value:
+        string: The event ID
+    '''
+    return f"{Status.instance_id}-{version}"
+
+
+#
+# parse_event_id
+#
+def parse_event_id(last_event_id=""):
+    '''
+    Get the version from the ID of the last event a client received
+
+    Parameters:
+        last_event_id: The value of the Last-Event-ID header
+
+    Return Value:
+        int: The version. None if the ID is not valid for this status
+    '''
+    (_instance, _, _version) = (last_event_id or "").strip().rpartition("-")
+    if _instance != Status.instance_id or not _version.isdigit(): return None
+
+    return int(_version)
+
+
+#
+# format_event
+#
+def format_event(event="", version=0, data=b""):
+    '''
+    Format a Server-Sent Event
+
+    Parameters:
+        event: The event type
+        version: The status version (used as the event ID)
+        data: The event data - JSON, which has no new lines (bytes)
+
+    Return Value:
+        bytes: The formatted event
+    '''
+    return f"id: {event_id(version=version)}\nevent: {event}\ndata: ".encode("utf-8") + data + b"\n\n"
+
+
+#
+# format_changes
+#
+def format_changes(changes=[]):
+    '''
+    Format changes as set/delete events
+
+    Parameters:
+        changes: List of (version, name, value, deleted) tuples
+
+    Return Value:
+        bytes: The formatted events
+    '''
+    _events = []
+    for (_version, _name, _value, _deleted) in changes:
+        if _deleted:
+            _data = json.dumps({ "name": _name })
+            _events.append(format_event(event="delete", version=_version, data=_data.encode("utf-8")))
+        else:
+            _data = json.dumps({ "name": _name, "value": _value })
+            _events.append(format_event(event="set", version=_version, data=_data.encode("utf-8")))
+
+    return b"".join(_events)
+
+
+###########################################################################
+#
+# Streams
+#
+###########################################################################
+#
+# _open_stream
+#
+def _open_stream(notify=None, last_event_id=""):
+    '''
+    Subscribe to the changes and get the first events to send
+
+    Parameters:
+        notify: Function called (on the writer's thread) when there are changes
+        last_event_id: The value of the Last-Event-ID header
+
+    Return Value:
+        tuple: (ChangeSubscriber, first events as bytes)
+    '''
+    _subscriber = ChangeSubscriber(notify=notify)
+
+    _subscriber_lock.acquire()
+    _subscriber_set.add(_subscriber)
+    _subscriber_lock.release()
+
+    # Resume from the last event if we still have the changes, otherwise send a snapshot
+    (_version, _snapshot, _changes) = Status.add_change_listener(func=_subscriber.push,
+            since=parse_event_id(last_event_id=last_event_id))
+
+    if _snapshot is None: return (_subscriber, format_changes(changes=_changes))
+
+    return (_subscriber, format_event(event="snapshot", version=_version, data=_snapshot))
+
+
+#
+# _next_events
+#
+def _next_events(subscriber=None):
+    '''
+    Get the events for the changes buffered for a subscriber
+
+    Parameters:
+        subscriber: The ChangeSubscriber
+
+    Return Value:
+        bytes: The events (empty if there are none)
+    '''
+    (_resync, _changes) = subscriber.take()
+    if not _resync: return format_changes(changes=_changes)
+
+    # The client fell behind - send a new snapshot instead
+    _version = Status.version
+    return format_event(event="snapshot", version=_version, data=Status.export_bytes(refresh=False))
+
+
+#
+# _close_stream
+#
+def _close_stream(subscriber=None):
+    '''
+    Stop sending changes to a subscriber
+
+    Parameters:
+        subscriber: The ChangeSubscriber
+
+    Return Value:
+        None
+    '''
+    Status.remove_change_listener(func=subscriber.push)
+
+    _subscriber_lock.acquire()
+    _subscriber_set.discard(subscriber)
+    _subscriber_lock.release()
+
+
+#
+# iter_stream
+#
+def iter_stream(last_event_id=""):
+    '''
+    Generate the events for a stream (for the threaded web servers)
+
+    Parameters:
+        last_event_id: The value of the Last-Event-ID header
+
+    Return Value:
+        generator: The events as bytes
+    '''
+    _event = Event()
+    (_subscriber, _first) = _open_stream(notify=_event.set, last_event_id=last_event_id)
+
+    try:
+        yield _first if _first else b": connected\n\n"
+
+        while not _subscriber.closed:
+            if not _event.wait(timeout=STREAM_KEEPALIVE):
+                yield b": keep-alive\n\n"
+                continue
+
+            _event.clear()
+            if _subscriber.closed: break
+
+            _events = _next_events(subscriber=_subscriber)
+            if _events: yield _events
+
+    finally:
+        _close_stream(subscriber=_subscriber)
+
+
+#
+# aiter_stream
+#
+async def aiter_stream(last_event_id=""):
+    '''
+    Generate the events for a stream (for the asyncio web server)
+
+    Parameters:
+        last_event_id: The value of the Last-Event-ID header
+
+    Return Value:
+        async generator: The events as bytes
+    '''
+    _loop = asyncio.get_running_loop()
+    _event = asyncio.Event()
+
+    def notify():
+        try:
+            _loop.call_soon_threadsafe(_event.set)
+        except RuntimeError:
+            pass
+
+    (_subscriber, _first) = _open_stream(notify=notify, last_event_id=last_event_id)
+
+    try:
+        yield _first if _first else b": connected\n\n"
+
+        while not _subscriber.closed:
+            try:
+                await asyncio.wait_for(_event.wait(), timeout=STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+
+            _event.clear()
+            if _subscriber.closed: break
+
+            _events = _next_events(subscriber=_subscriber)
+            if _events: yield _events
+
+    finally:
+        _close_stream(subscriber=_subscriber)
+
+
+#
+# close_streams
+#
+def close_streams():
+    '''
+    End all of the open streams (when the web server is stopped)
+
+    Parameters:
+        None
+
+    Return Value:
+        None
+    '''
+    _subscriber_lock.acquire()
+    _subscriber_list = list(_subscriber_set)
+    _subscriber_lock.release()
+
+    for _subscriber in _subscriber_list:
+        _subscriber.close()
+
+
+#
+# _after_fork_in_child
+#
+def _after_fork_in_child():
+    '''
+    Drop the streams in a forked child (their connections belong to the
+    parent's web server)
+
+    Parameters:
+        None
+
+    Return Value:
+        None
+    '''
+    global _subscriber_lock
+
+    _subscriber_lock = Lock()
+    for _subscriber in list(_subscriber_set):
+        Status.remove_change_listener(func=_subscriber.push)
+
+    _subscriber_set.clear()
+
+
+# Not available on all platforms (eg Windows can't fork)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+'''
+* subscriptions.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+*
+* Call subscribers when the entries under a prefix change
+*
+'''
+from threading import Thread, Lock, Event
+from collections import deque
+
+
+#
+# Constants
+#
+
+
+###########################################################################
+#
+# Subscription Class
+#
+###########################################################################
+class Subscription():
+    '''
+    A callback for the changes to the entries under a prefix
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, prefix="", callback=None):
+        ''' Init method for class '''
+        assert callable(callback)
+
+        self.prefix = prefix
+        self.callback = callback
+        self.active = True
+
+
+###########################################################################
+#
+# ChangeDispatcher Class
+#
+###########################################################################
+class ChangeDispatcher():
+    '''
+    Match changes to subscriptions and call the subscribers on a separate
+    thread.  Subscriptions are indexed by prefix, so matching a change only
+    looks at the prefixes of its name (not every subscription).  Changes
+    that arrive while the subscribers are being called are passed on
+    together in the next batch.
+    '''
+    #
+    # __init__
+    #
+    def __init__(self, *args, **kwargs):
+        ''' Init method for class '''
+        super().__init__(*args, **kwargs)
+
+        # Private Instance Attributes
+        self.__lock = Lock()
+        self.__wake_event = Event()
+        self.__prefix_dict = {}
+        self.__pending = deque()
+        self.__thread = None
+
+
+    #
+    # __len__
+    #
+    def __len__(self):
+        ''' The number of subscriptions '''
+        return sum(len(_list) for _list in list(self.__prefix_dict.values()))
+
+
+    ###########################################################################
+    #
+    # Manage subscriptions
+    #
+    ###########################################################################
+    #
+    # add
+    #
+    def add(self, prefix="", callback=None):
+        '''
+        Add a subscription
+
+        Parameters:
+            prefix: The entry name prefix (dot format, "" for all entries)
+            callback: Function called with a list of (version, name, value,
+                deleted) tuples
+
+        Return Value:
+            Subscription: The subscription (to pass to remove)
+        '''
+        _subscription = Subscription(prefix=prefix, callback=callback)
+
+        self.__lock.acquire()
+        self.__prefix_dict[prefix] = self.__prefix_dict.get(prefix, ()) + (_subscription,)
+
+        # Start the thread to call the subscribers
+        if not self.__thread:
+            self.__thread = Thread(target=self.run, name="status-subscriptions", daemon=True)
+            self.__thread.start()
+
+        self.__lock.release()
+
+        return _subscription
+
+
+    #
+    # remove
+    #
+    def remove(self, subscription=None):
+        '''
+        Remove a subscription
+
+        Parameters:
+            subscription: The subscription returned by add
+
+        Return Value:
+            boolean: True if removed, False if not found
+        '''
+        self.__lock.acquire()
+        try:
+            _list = self.__prefix_dict.get(subscription.prefix, ())
+            if subscription not in _list: return False
+
+            _list = tuple(_sub for _sub in _list if _sub is not subscription)
+            if _list:
+                self.__prefix_dict[subscription.prefix] = _list
+            else:
+                del self.__prefix_dict[subscription.prefix]
+
+            subscription.active = False
+            return True
+
+        finally:
+            self.__lock.release()
+
+
+    #
+    # _after_fork
+    #
+    def _after_fork(self):
+        '''
+        Reset the dispatcher in a forked child (the lock may have been held by
+        a thread that doesn't exist in the child, and the dispatcher thread
+        isn't running)
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.__lock = Lock()
+        self.__wake_event = Event()
+        self.__thread = None
+
+        if self.__prefix_dict:
+            self.__thread = Thread(target=self.run, name="status-subscriptions", daemon=True)
+            self.__thread.start()
+
+        if self.__pending: self.__wake_event.set()
+
+
+    ###########################################################################
+    #
+    # Dispatch changes
+    #
+    ###########################################################################
+    #
+    # publish
+    #
+    def publish(self, change=None):
+        '''
+        Queue a change for the matching subscribers (a status change listener,
+        so it is called with the status locked and must not block)
+
+        Parameters:
+            change: (version, name, value, deleted) tuple
+
+        Return Value:
+            None
+        '''
+        _prefix_dict = self.__prefix_dict
+        if not _prefix_dict: return
+
+        # Look up the name and each of its prefixes
+        _name = change[1]
+        _matches = list(_prefix_dict.get("", ()))
+
+        _index = _name.find(".")
+        while _index >= 0:
+            _matches.extend(_prefix_dict.get(_name[:_index], ()))
+            _index = _name.find(".", _index + 1)
+
+        _matches.extend(_prefix_dict.get(_name, ()))
+        if not _matches: return
+
+        for _subscription in _matches:
+            self.__pending.append((_subscription, change))
+
+        self.__wake_event.set()
+
+
+    #
+    # dispatch_pending
+    #
+    def dispatch_pending(self):
+        '''
+        Call each subscriber once with the changes queued for it
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        _batch_dict = {}
+        while self.__pending:
+            (_subscription, _change) = self.__pending.popleft()
+            _batch_dict.setdefault(_subscription, []).append(_change)
+
+        for (_subscription, _changes) in _batch_dict.items():
+            if not _subscription.active: continue
+
+            try:
+                _subscription.callback(_changes)
+            except Exception:
+                pass
+
+
+    #
+    # run
+    #
+    def run(self):
+        '''
+        Call the subscribers as changes arrive (runs in its own thread)
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        while True:
+            self.__wake_event.wait()
+            self.__wake_event.clear()
+            self.dispatch_pending()
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+'''
+* web_response.py
+*
+* Copyright (c) 2025 Jason Piszcyk
+*
+* @author: Jason Piszcyk
+* 
+* Build the responses returned by the web servers
+*
+'''
+from urllib.parse import urlsplit, unquote, parse_qs
+import json
+import zlib
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+from .application_status import Status
+from .metrics import Metrics, METRICS_CONTENT_TYPE
+from .stream import iter_stream, aiter_stream, SSE_CONTENT_TYPE
+
+
+#
+# Constants
+#
+JSON_CONTENT_TYPE = "application/json"
+HTML_CONTENT_TYPE = "text/html"
+
+# Reserved paths (not mapped to entries in the status)
+COLLECTORS_PATH = "/_internal/collectors"
+METRICS_PATH = "/metrics"
+STREAM_PATH = "/stream"
+WORKERS_PATH = "/_internal/workers"
+HISTORY_PATH = "/_internal/history"
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Supported encodings (in order of preference)
+ENCODINGS = ("zstd", "gzip", "deflate") if zstd else ("gzip", "deflate")
+
+
+#
+# Globals
+#
+# Compressed bodies for the current status version -
+#   { (name, encoding): (uncompressed body, compressed body) }
+_compressed_version = None
+_compressed_dict = {}
+
+
+###########################################################################
+#
+# Response handling
+#
+###########################################################################
+#
+# path_to_name
+#
+def path_to_name(path="/"):
+    '''
+    Convert a request path to an entry name (eg /db/pool -> db.pool)
+
+    Parameters:
+        path: The path requested (may include a query string)
+
+    Return Value:
+        string: The entry name ("" for the root). None if the path is not valid
+    '''
+    _path = unquote(urlsplit(path).path).strip("/")
+    if not _path: return ""
+
+    _parts = _path.split("/")
+    for _part in _parts:
+        if not _part or "." in _part: return None
+
+    return ".".join(_parts)
+
+
+#
+# parse_since
+#
+def parse_since(path="/"):
+    '''
+    Get the version from the since parameter in the query string.  The
+    version can be given as "<instance>-<version>" (as in the ETag, which may
+    also end with the content encoding) or just the version number
+
+    Parameters:
+        path: The path requested (including the query string)
+
+    Return Value:
+        tuple: (version, instance ID or None). None if there is no valid since
+    '''
+    _since = parse_qs(urlsplit(path).query).get("since")
+    if not _since: return None
+
+    _since = _since[-1].strip()
+    if _since.startswith("W/"): _since = _since[2:]
+    _since = _since.strip('"')
+    (_rest, _, _encoding) = _since.rpartition("-")
+    if _encoding in ENCODINGS: _since = _rest
+
+    (_instance, _, _version) = _since.rpartition("-")
+    if not _version.isdigit(): return None
+
+    return (int(_version), _instance or None)
+
+
+#
+# etag_matches
+#
+def etag_matches(etag="", if_none_match=""):
+    '''
+    Check if an ETag is in the value of an If-None-Match header (using the
+    weak comparison)
+
+    Parameters:
+        etag: The current ETag
+        if_none_match: The value of the If-None-Match header
+
+    Return Value:
+        boolean: True if the ETag matches, False otherwise
+    '''
+    if not if_none_match: return False
+    if if_none_match.strip() == "*": return True
+
+    for _tag in if_none_match.split(","):
+        _tag = _tag.strip()
+        if _tag.startswith("W/"): _tag = _tag[2:]
+        if _tag == etag: return True
+
+    return False
+
+
+#
+# choose_encoding
+#
+def choose_encoding(accept_encoding=""):
+    '''
+    Choose the content encoding to use from the Accept-Encoding header
+
+    Parameters:
+        accept_encoding: The value of the Accept-Encoding header
+
+    Return Value:
+        string: The encoding to use. None to send the body as is
+    '''
+    if not accept_encoding: return None
+
+    _accepted = set()
+    for _item in accept_encoding.lower().split(","):
+        (_coding, _, _params) = _item.partition(";")
+
+        # Skip anything the client has said it won't accept (q=0)
+        _params = _params.replace(" ", "")
+        if _params.startswith("q="):
+            try:
+                if float(_params[2:]) <= 0: continue
+            except ValueError:
+                continue
+
+        _accepted.add(_coding.strip())
+
+    for _encoding in ENCODINGS:
+        if _encoding in _accepted or "*" in _accepted: return _encoding
+
+    return None
+
+
+#
+# compress_body
+#
+def compress_body(body=b"", encoding="gzip"):
+    '''
+    Compress the body
+
+    Parameters:
+        body: The body to compress
+        encoding: The encoding to use (zstd, gzip or deflate)
+
+    Return Value:
+        bytes: The compressed body
+    '''
+    if encoding == "zstd": return zstd.compress(body)
+
+    _compressor = new_compressor(encoding=encoding)
+    return _compressor.compress(body) + _compressor.flush()
+
+
+#
+# new_compressor
+#
+def new_compressor(encoding="gzip"):
+    '''
+    Create a compressor, to compress a body in pieces
+
+    Parameters:
+        encoding: The encoding to use (zstd, gzip or deflate)
+
+    Return Value:
+        object: The compressor (with compress and flush methods)
+    '''
+    if encoding == "zstd": return zstd.ZstdCompressor()
+
+    # gzip uses the gzip wrapper around the zlib stream
+    return zlib.compressobj(6, zlib.DEFLATED, 31 if encoding == "gzip" else 15)
+
+
+#
+# compress_stream
+#
+def compress_stream(chunks=None, encoding="gzip"):
+    '''
+    Compress a body as it is generated
+
+    Parameters:
+        chunks: Generator of the body (bytes)
+        encoding: The encoding to use (zstd, gzip or deflate)
+
+    Return Value:
+        generator: The compressed body (bytes)
+    '''
+    _compressor = new_compressor(encoding=encoding)
+    try:
+        for _chunk in chunks:
+            _compressed = _compressor.compress(_chunk)
+            if _compressed: yield _compressed
+
+        yield _compressor.flush()
+
+    finally:
+        chunks.close()
+
+
+#
+# _aiter_chunks
+#
+async def _aiter_chunks(chunks=None):
+    '''
+    Pass on the chunks of a body from a generator, for the asyncio web server
+
+    Parameters:
+        chunks: Generator of the body (bytes)
+
+    Return Value:
+        async generator: The body (bytes)
+    '''
+    try:
+        for _chunk in chunks:
+            yield _chunk
+
+    finally:
+        chunks.close()
+
+
+#
+# get_compressed_body
+#
+def get_compressed_body(name="", version=0, body=b"", encoding="gzip"):
+    '''
+    Get the compressed body, compressing it only once for each version of
+    the status
+
+    Parameters:
+        name: The name the body is for (entry name or path)
+        version: The status version the body is for
+        body: The body to compress
+        encoding: The encoding to use
+
+    Return Value:
+        bytes: The compressed body
+    '''
+    global _compressed_version, _compressed_dict
+
+    # Throw away everything compressed for an old version
+    if _compressed_version != version:
+        _compressed_dict = {}
+        _compressed_version = version
+
+    # Cached bodies are reused, so only compress if the body is a new one
+    _key = (name, encoding)
+    _cached = _compressed_dict.get(_key)
+    if _cached and _cached[0] is body: return _cached[1]
+
+    _compressed = compress_body(body=body, encoding=encoding)
+    _compressed_dict[_key] = (body, _compressed)
+
+    return _compressed
+
+
+#
+# _compress_response
+#
+def _compress_response(name="", version=0, headers=None, response_headers=[], body=b""):
+    '''
+    Compress the body of a response if the client allows it
+
+    Parameters:
+        name: The name the body is for (entry name or path)
+        version: The status version the body is for
+        headers: The request headers (a mapping with lower case lookups)
+        response_headers: The response headers (Content-Encoding is added)
+        body: The body of the response
+
+    Return Value:
+        bytes: The body to send
+    '''
+    _encoding = choose_encoding(accept_encoding=headers.get("accept-encoding", ""))
+    if not _encoding or len(body) < MIN_COMPRESS_SIZE: return body
+
+    response_headers.append(("Content-Encoding", _encoding))
+    return get_compressed_body(name=name, version=version, body=body, encoding=_encoding)
+
+
+#
+# _compress_uncached
+#
+def _compress_uncached(headers=None, response_headers=[], body=b""):
+    '''
+    Compress the body of a response that isn't tied to a status version (so
+    can't be cached), if the client allows it
+
+    Parameters:
+        headers: The request headers (a mapping with lower case lookups)
+        response_headers: The response headers (Content-Encoding is added)
+        body: The body of the response
+
+    Return Value:
+        bytes: The body to send
+    '''
+    _encoding = choose_encoding(accept_encoding=headers.get("accept-encoding", ""))
+    if not _encoding or len(body) < MIN_COMPRESS_SIZE: return body
+
+    response_headers.append(("Content-Encoding", _encoding))
+    return compress_body(body=body, encoding=_encoding)
+
+
+#
+# _stream_response
+#
+def _stream_response(name="", encoding=None, response_headers=[], asynchronous=False):
+    '''
+    Build the response for an entry in the status, with the JSON sent in
+    chunks as it is encoded (Transfer-Encoding: chunked)
+
+    Parameters:
+        name: The entry name
+        encoding: The encoding to compress with (None to send as is)
+        response_headers: The response headers (Content-type etc are added)
+        asynchronous: True if called from the asyncio web server
+
+    Return Value:
+        tuple: (status code, list of (header, value) tuples, body) - the body
+            is a generator of bytes
+    '''
+    _chunks = Status.iter_export(name=name)
+    if _chunks is None:
+        return (404, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    response_headers.insert(0, ("Content-type", JSON_CONTENT_TYPE))
+    response_headers.append(("Transfer-Encoding", "chunked"))
+
+    # The size isn't known up front, so anything streamed is compressed
+    if encoding:
+        response_headers.append(("Content-Encoding", encoding))
+        _chunks = compress_stream(chunks=_chunks, encoding=encoding)
+
+    if asynchronous: _chunks = _aiter_chunks(chunks=_chunks)
+
+    return (200, response_headers, _chunks)
+
+
+#
+# _status_response
+#
+def _status_response(path="/", headers=None, asynchronous=False):
+    '''
+    Build the response for an entry in the status
+
+    Parameters:
+        path: The path requested
+        headers: The request headers (a mapping with lower case lookups)
+        asynchronous: True if called from the asyncio web server
+
+    Return Value:
+        tuple: (status code, list of (header, value) tuples, body) - the body
+            is bytes, or a generator of bytes if exports are streamed
+    '''
+    # The path maps to an entry in the status (/ for all of it)
+    _name = path_to_name(path=path)
+    if _name is None:
+        return (404, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    # Update any lazy entries first, so the ETag covers them
+    Status.refresh(name=_name)
+
+    # Get the version before the body, so the ETag is never newer than the body
+    _version = Status.version
+    _headers = [ ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding") ]
+    _encoding = choose_encoding(accept_encoding=headers.get("accept-encoding", ""))
+
+    # Only the changes since a version (for the root path)
+    _since = parse_since(path=path) if not _name else None
+    _stream = not _since and Status.stream_exports
+
+    # The body is cached, so getting it is cheap even if it isn't sent
+    if not _stream:
+        if _since:
+            _body = Status.export_since_bytes(version=_since[0], instance_id=_since[1])
+            _name = "?since"
+        else:
+            _body = Status.export_bytes(name=_name)
+
+        if _body is None:
+            return (404, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+        if len(_body) < MIN_COMPRESS_SIZE: _encoding = None
+
+    # Each content coding is a different representation, so has its own ETag
+    _etag = f"{Status.instance_id}-{_version}"
+    _etag = f'"{_etag}-{_encoding}"' if _encoding else f'"{_etag}"'
+    _headers.insert(0, ("ETag", _etag))
+
+    # Nothing has changed since the client last asked
+    if etag_matches(etag=_etag, if_none_match=headers.get("if-none-match", "")):
+        return (304, _headers, b"")
+
+    if _stream:
+        return _stream_response(name=_name, encoding=_encoding, response_headers=_headers,
+                asynchronous=asynchronous)
+
+    _headers.insert(0, ("Content-type", JSON_CONTENT_TYPE))
+    if _encoding:
+        _headers.append(("Content-Encoding", _encoding))
+        _body = get_compressed_body(name=_name, version=_version, body=_body, encoding=_encoding)
+
+    return (200, _headers, _body)
+
+
+#
+# _history_response
+#
+def _history_response(path="/", headers=None):
+    '''
+    Build the response for the history of an entry
+    (/_internal/history/<name>?range=<seconds>&step=<seconds>)
+
+    Parameters:
+        path: The path requested (including the query string)
+        headers: The request headers (a mapping with lower case lookups)
+
+    Return Value:
+        tuple: (status code, list of (header, value) tuples, body as bytes)
+    '''
+    _url = urlsplit(path)
+    _name = path_to_name(path=_url.path[len(HISTORY_PATH):])
+    if not _name:
+        return (404, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    _query = parse_qs(_url.query)
+    try:
+        _period = float(_query["range"][-1]) if "range" in _query else None
+        _step = float(_query["step"][-1]) if "step" in _query else None
+        _buckets = Status.history(name=_name, period=_period, step=_step)
+    except ValueError:
+        return (400, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    if _buckets is None:
+        return (404, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    _body = json.dumps({ "name": _name, "buckets": _buckets }).encode("utf-8")
+    _headers = [ ("Content-type", JSON_CONTENT_TYPE), ("Cache-Control", "no-cache"),
+            ("Vary", "Accept-Encoding") ]
+
+    _body = _compress_uncached(headers=headers, response_headers=_headers, body=_body)
+
+    return (200, _headers, _body)
+
+
+#
+# _workers_response
+#
+def _workers_response(path="/", headers=None):
+    '''
+    Build the response for the merged status of the processes sharing the
+    status.  The query string selects how to merge (mode=namespace, sum or
+    max) and can ignore processes that have stopped publishing (max_age in
+    seconds)
+
+    Parameters:
+        path: The path requested (including the query string)
+        headers: The request headers (a mapping with lower case lookups)
+
+    Return Value:
+        tuple: (status code, list of (header, value) tuples, body as bytes)
+    '''
+    _region = Status.shared_region
+    if not _region:
+        return (404, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    _query = parse_qs(urlsplit(path).query)
+    _mode = _query.get("mode", ["namespace"])[-1]
+    try:
+        _max_age = float(_query["max_age"][-1]) if "max_age" in _query else None
+        _body = _region.merged_bytes(mode=_mode, max_age=_max_age)
+    except ValueError:
+        return (400, [ ("Content-type", HTML_CONTENT_TYPE) ], b"")
+
+    _headers = [ ("Content-type", JSON_CONTENT_TYPE), ("Cache-Control", "no-cache"),
+            ("Vary", "Accept-Encoding") ]
+
+    _body = _compress_uncached(headers=headers, response_headers=_headers, body=_body)
+
+    return (200, _headers, _body)
+
+
+#
+# refresh_response
+#
+async def refresh_response(path="/"):
+    '''
+    Bring the lazy entries a response uses up to date without blocking the
+    event loop (for the asyncio web server - call before build_response, as
+    the entries aren't waited for when it is called on the loop)
+
+    Parameters:
+        path: The path requested
+
+    Return Value:
+        None
+    '''
+    _path = urlsplit(path).path.rstrip("/")
+
+    if _path == METRICS_PATH:
+        await Status.refresh_async()
+        return
+
+    # The other reserved paths don't use the values
+    if _path in (COLLECTORS_PATH, STREAM_PATH, WORKERS_PATH) or _path.startswith(f"{HISTORY_PATH}/"):
+        return
+
+    _name = path_to_name(path=path)
+    if _name is not None: await Status.refresh_async(name=_name)
+
+
+#
+# build_response
+#
+def build_response(path="/", headers=None, asynchronous=False, streams=True):
+    '''
+    Build the response to a GET request (shared by all of the web servers)
+
+    Parameters:
+        path: The path requested
+        headers: The request headers (a mapping with lower case lookups)
+        asynchronous: True if called from the asyncio web server (streams are
+            returned as async generators)
+        streams: False if the server can't send a stream without holding up
+            its other requests (/stream is refused with a 503)
+
+    Return Value:
+        tuple: (status code, list of (header, value) tuples, body) - the body
+            is bytes, or a generator of bytes for a stream
+    '''
+    if headers is None: headers = {}
+    _path = urlsplit(path).path.rstrip("/")
+
+    # Timing and health of the collectors
+    if _path == COLLECTORS_PATH:
+        _body = json.dumps(Status.collector_stats()).encode("utf-8")
+        return (200, [ ("Content-type", JSON_CONTENT_TYPE), ("Cache-Control", "no-cache") ], _body)
+
+    # Numeric values as Prometheus metrics
+    if _path == METRICS_PATH:
+        _version = Status.version
+        _headers = [ ("Content-type", METRICS_CONTENT_TYPE), ("Vary", "Accept-Encoding") ]
+        _body = _compress_response(name=METRICS_PATH, version=_version, headers=headers,
+                response_headers=_headers, body=Metrics.render())
+
+        return (200, _headers, _body)
+
+    # Changes to the status as Server-Sent Events
+    if _path == STREAM_PATH:
+        if not streams:
+            return (503, [ ("Content-type", HTML_CONTENT_TYPE), ("Retry-After", "60") ], b"")
+
+        _last_event_id = headers.get("last-event-id", "")
+        _headers = [ ("Content-type", SSE_CONTENT_TYPE), ("Cache-Control", "no-cache") ]
+        if asynchronous:
+            return (200, _headers, aiter_stream(last_event_id=_last_event_id))
+
+        return (200, _headers, iter_stream(last_event_id=_last_event_id))
+
+    # Recent values of an entry
+    if _path.startswith(f"{HISTORY_PATH}/"):
+        return _history_response(path=path, headers=headers)
+
+    # Merged status of the processes sharing the status
+    if _path == WORKERS_PATH:
+        return _workers_response(path=path, headers=headers)
+
+    return _status_response(path=path, headers=headers, asynchronous=asynchronous)
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -10,14 +10,32 @@
 *
 '''
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Lock
+import selectors
+import select
+import socket
+import time
 
 from .application_status import Status
+from .web_response import build_response, HTML_CONTENT_TYPE
+from .stream import close_streams
 
 
 #
 # Constants
 #
+# Worker threads used to serve connections in concurrent mode
+DEFAULT_MAX_WORKERS = 8
+
+# Streams (each sent from its own thread) open at once in concurrent mode
+DEFAULT_MAX_STREAMS = 64
+
+# Seconds an idle keep-alive connection is kept open
+KEEPALIVE_TIMEOUT = 5
+
+# Seconds a worker waits for the next request on a connection before parking it
+PARK_AFTER = 0.002
 
 
 ###########################################################################
@@ -29,6 +47,190 @@ class BasicWebServer(BaseHTTPRequestHandler):
     '''
     A very basic web server to return the status information
     '''
+    # Allow persistent connections (only kept open by a concurrent server)
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    disable_nagle_algorithm = True
+
+    # Set when the connection is handed back to the server between requests
+    parked = False
+
+    # The response to send from a stream thread - (code, headers, body)
+    stream = None
+
+    #
+    # handle
+    #
+    def handle(self):
+        '''
+        Serve the requests on the connection.  If the server can watch idle
+        connections (PooledHTTPServer) the connection is handed back to it
+        once no request is waiting, so an idle keep-alive connection doesn't
+        hold a worker thread
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        self.parked = False
+        self.close_connection = True
+        self.handle_one_request()
+
+        while not self.close_connection:
+            if hasattr(self.server, "park") and not self.request_waiting(timeout=PARK_AFTER):
+                self.parked = True
+                return
+
+            self.handle_one_request()
+
+
+    #
+    # request_waiting
+    #
+    def request_waiting(self, timeout=0):
+        '''
+        Check if there is more to read on the connection
+
+        Parameters:
+            timeout: Seconds to wait for something to read
+
+        Return Value:
+            boolean: True if the next request (or the end of the connection)
+                can be read
+        '''
+        # Anything already buffered (a read that timed out would break the file)
+        self.connection.settimeout(0)
+        try:
+            if self.rfile.peek(1): return True
+
+        except OSError:
+            return True
+
+        finally:
+            self.connection.settimeout(self.timeout)
+
+        if not timeout: return False
+
+        return bool(select.select([ self.connection ], [], [], timeout)[0])
+
+
+    #
+    # finish
+    #
+    def finish(self):
+        '''
+        Finish with the connection (unless it has been parked)
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        if self.parked or self.stream: return
+
+        super().finish()
+
+    #
+    # send_body
+    #
+    def send_body(self, code=200, headers=[], body=b"", detach=True):
+        '''
+        Send a complete response with a Content-Length (or stream the body if
+        it is a generator)
+
+        Parameters:
+            code: The HTTP status code
+            headers: List of (header, value) tuples to send
+            body: The body of the response (bytes or a generator of bytes)
+            detach: If True, a stream that only ends when the connection is
+                closed is handed to the server to send from its own thread (if
+                the server supports it), so it doesn't hold a worker
+
+        Return Value:
+            None
+        '''
+        _chunked = ("Transfer-Encoding", "chunked") in headers
+
+        # HTTP/1.0 clients don't understand chunks
+        if _chunked and self.request_version == "HTTP/1.0":
+            headers = [ _header for _header in headers if _header[0] != "Transfer-Encoding" ]
+            _chunked = False
+
+        if detach and not _chunked and not isinstance(body, bytes) and hasattr(self.server, "reserve_stream"):
+            if self.server.reserve_stream():
+                self.stream = (code, headers, body)
+                self.close_connection = True
+                return
+
+            # Too many streams open
+            body.close()
+            (code, headers, body) = (503, [ ("Content-type", HTML_CONTENT_TYPE), ("Retry-After", "5") ], b"")
+
+        self.send_response(code)
+        for (_header, _value) in headers:
+            self.send_header(_header, _value)
+
+        if not isinstance(body, bytes):
+            self.send_stream(body=body, chunked=_chunked)
+            return
+
+        # A Not Modified response never has a body
+        if code != 304:
+            self.send_header("Content-Length", str(len(body)))
+
+        # A single threaded server can't hold a connection open for one client
+        if not getattr(self.server, "keep_alive", False):
+            self.send_header("Connection", "close")
+
+        self.end_headers()
+        if body: self.wfile.write(body)
+
+
+    #
+    # send_stream
+    #
+    def send_stream(self, body=None, chunked=False):
+        '''
+        Send the body from a generator.  The end of the body is marked by the
+        last chunk if it is chunked, otherwise by closing the connection
+
+        Parameters:
+            body: Generator of bytes
+            chunked: True to send the body with Transfer-Encoding: chunked
+                (the header must already have been sent)
+
+        Return Value:
+            None
+        '''
+        if not chunked or not getattr(self.server, "keep_alive", False):
+            self.send_header("Connection", "close")
+        self.end_headers()
+
+        try:
+            for _chunk in body:
+                # An empty chunk would end the body
+                if not _chunk: continue
+
+                if chunked: _chunk = b"%x\r\n%s\r\n" % (len(_chunk), _chunk)
+
+                self.wfile.write(_chunk)
+                self.wfile.flush()
+
+            if chunked: self.wfile.write(b"0\r\n\r\n")
+
+        except (ConnectionError, OSError):
+            self.close_connection = True
+
+        finally:
+            body.close()
+
+
+    #
+    # do_GET
+    #
     def do_GET(self):
         '''
         Perform the get action
@@ -39,18 +241,313 @@ class BasicWebServer(BaseHTTPRequestHandler):
         Return Value:
             None
         '''
-        # Only allow request to the root path
-        if self.path != "/":
-            self.send_response(405)
-            self.send_header("Content-type", "text/html")
-            self.end_headers()
+        # Only a server that sends streams from their own threads can serve them
+        (_code, _headers, _body) = build_response(path=self.path, headers=self.headers,
+                streams=hasattr(self.server, "reserve_stream"))
+        self.send_body(code=_code, headers=_headers, body=_body)
+
+
+###########################################################################
+#
+# PooledHTTPServer Class
+#
+###########################################################################
+class PooledHTTPServer(HTTPServer):
+    '''
+    A HTTP server that handles each connection on a bounded pool of threads.
+    Idle keep-alive connections are parked - watched by one thread with a
+    selector and only handed back to the pool when the next request arrives
+    (or closed once they have been idle for the keep-alive timeout).  Streams
+    are sent from their own threads (up to max_streams at once), so they
+    don't hold the workers either
+    '''
+    keep_alive = True
+
+    #
+    # __init__
+    #
+    def __init__(self, *args, max_workers=DEFAULT_MAX_WORKERS, max_streams=DEFAULT_MAX_STREAMS, **kwargs):
+        ''' Init method for class '''
+        super().__init__(*args, **kwargs)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                thread_name_prefix="status-web")
+        self.max_streams = max_streams
+
+        # Private Instance Attributes
+        self.__stream_lock = Lock()
+        self.__streams = 0
+        self.__idle_lock = Lock()
+        self.__parking = []
+        self.__closed = False
+        (self.__wake_recv, self.__wake_send) = socket.socketpair()
+        self.__wake_recv.setblocking(False)
+        self.__wake_send.setblocking(False)
+
+        self.__idle_thread = Thread(target=self.watch_idle, name="status-web-idle", daemon=True)
+        self.__idle_thread.start()
+
+
+    #
+    # process_request
+    #
+    def process_request(self, request, client_address):
+        '''
+        Hand the connection to the worker pool
+
+        Parameters:
+            request: The socket for the connection
+            client_address: The address of the client
+
+        Return Value:
+            None
+        '''
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+
+    #
+    # process_request_thread
+    #
+    def process_request_thread(self, request, client_address, handler=None):
+        '''
+        Serve the connection until it is closed or parked (runs in a worker
+        thread)
+
+        Parameters:
+            request: The socket for the connection
+            client_address: The address of the client
+            handler: The handler for a parked connection (None for a new
+                connection)
+
+        Return Value:
+            None
+        '''
+        _keep = False
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(request, client_address, self)
+            else:
+                try:
+                    handler.handle()
+                finally:
+                    handler.finish()
+
+            _keep = handler.parked
+            _stream = handler.stream is not None
+
+        except Exception:
+            self.handle_error(request, client_address)
+            _stream = False
+
+        if _stream:
+            Thread(target=self.run_stream, args=(handler,), name="status-web-stream", daemon=True).start()
+        elif _keep:
+            self.park(handler=handler)
+        else:
+            self.shutdown_request(request)
+
+
+    #
+    # reserve_stream
+    #
+    def reserve_stream(self):
+        '''
+        Reserve one of the streams that may be open at once
+
+        Parameters:
+            None
+
+        Return Value:
+            boolean: True if reserved, False if too many streams are open
+        '''
+        self.__stream_lock.acquire()
+        try:
+            if self.__streams >= self.max_streams: return False
+
+            self.__streams += 1
+            return True
+
+        finally:
+            self.__stream_lock.release()
+
+
+    #
+    # run_stream
+    #
+    def run_stream(self, handler=None):
+        '''
+        Send a stream and close the connection (runs in its own thread)
+
+        Parameters:
+            handler: The handler holding the stream to send
+
+        Return Value:
+            None
+        '''
+        (_code, _headers, _body) = handler.stream
+        try:
+            handler.send_body(code=_code, headers=_headers, body=_body, detach=False)
+
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+
+        finally:
+            handler.stream = None
+            try:
+                handler.finish()
+            except Exception:
+                pass
+
+            self.shutdown_request(handler.request)
+
+            self.__stream_lock.acquire()
+            self.__streams -= 1
+            self.__stream_lock.release()
+
+
+    #
+    # park
+    #
+    def park(self, handler=None):
+        '''
+        Watch an idle keep-alive connection until the next request arrives
+
+        Parameters:
+            handler: The handler for the connection
+
+        Return Value:
+            None
+        '''
+        self.__idle_lock.acquire()
+        _closed = self.__closed
+        if not _closed: self.__parking.append(handler)
+        self.__idle_lock.release()
+
+        if _closed:
+            self.close_parked(handler=handler)
             return
 
-        # Create the response
-        self.send_response(200)
-        self.send_header("Content-type", "application/json")
-        self.end_headers()
-        self.wfile.write(bytes(Status.export(), "utf-8"))
+        try:
+            self.__wake_send.send(b"\0")
+        except OSError:
+            pass
+
+
+    #
+    # close_parked
+    #
+    def close_parked(self, handler=None):
+        '''
+        Close a parked connection
+
+        Parameters:
+            handler: The handler for the connection
+
+        Return Value:
+            None
+        '''
+        handler.parked = False
+        try:
+            handler.finish()
+        except Exception:
+            pass
+
+        self.shutdown_request(handler.request)
+
+
+    #
+    # watch_idle
+    #
+    def watch_idle(self):
+        '''
+        Watch the parked connections, handing each to the pool when it can be
+        read and closing those idle for too long (runs in its own thread)
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        _selector = selectors.DefaultSelector()
+        _selector.register(self.__wake_recv, selectors.EVENT_READ)
+        _deadlines = {}
+
+        try:
+            while not self.__closed:
+                _timeout = max(0, min(_deadlines.values()) - time.monotonic()) if _deadlines else None
+                for (_key, _) in _selector.select(timeout=_timeout):
+                    if _key.fileobj is self.__wake_recv:
+                        try:
+                            while self.__wake_recv.recv(4096): pass
+                        except OSError:
+                            pass
+
+                        continue
+
+                    # The next request has arrived
+                    _handler = _key.data
+                    _selector.unregister(_key.fileobj)
+                    del _deadlines[_handler]
+                    try:
+                        self.executor.submit(self.process_request_thread, _handler.request,
+                                _handler.client_address, _handler)
+                    except RuntimeError:
+                        self.close_parked(handler=_handler)
+
+                self.__idle_lock.acquire()
+                _parking = self.__parking
+                self.__parking = []
+                self.__idle_lock.release()
+
+                _now = time.monotonic()
+                for _handler in _parking:
+                    _selector.register(_handler.request, selectors.EVENT_READ, _handler)
+                    _deadlines[_handler] = _now + (_handler.timeout or KEEPALIVE_TIMEOUT)
+
+                for (_handler, _deadline) in list(_deadlines.items()):
+                    if _deadline > _now: continue
+
+                    _selector.unregister(_handler.request)
+                    del _deadlines[_handler]
+                    self.close_parked(handler=_handler)
+
+        finally:
+            for _handler in list(_deadlines) + self.__parking:
+                self.close_parked(handler=_handler)
+
+            _selector.close()
+
+
+    #
+    # server_close
+    #
+    def server_close(self):
+        '''
+        Close the listening socket and release the worker pool
+
+        Parameters:
+            None
+
+        Return Value:
+            None
+        '''
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+        # Close the parked connections
+        self.__idle_lock.acquire()
+        self.__closed = True
+        self.__idle_lock.release()
+
+        try:
+            self.__wake_send.send(b"\0")
+        except OSError:
+            pass
+
+        self.__idle_thread.join(timeout=5)
+        self.__wake_send.close()
+        self.__wake_recv.close()
 
 
 ###########################################################################
@@ -61,18 +558,27 @@ class BasicWebServer(BaseHTTPRequestHandler):
 #
 # run_web_server
 #
-def run_web_server(hostname="localhost", port=8180):
+def run_web_server(hostname="localhost", port=8180, concurrent=True,
+        max_workers=DEFAULT_MAX_WORKERS, max_streams=DEFAULT_MAX_STREAMS):
     '''
     Run the web server (call from start_web_server)
 
     Parameters:
         hostname: The hostname/ip address for the server
         port: The port to listen on
+        concurrent: If true, serve connections concurrently with keep-alive
+        max_workers: The number of threads serving connections (if concurrent)
+        max_streams: The number of streams that may be open at once (if
+            concurrent)
 
     Return Value:
         None
     '''
-    Status.webserver = HTTPServer((hostname, port), BasicWebServer)
+    if concurrent:
+        Status.webserver = PooledHTTPServer((hostname, port), BasicWebServer,
+                max_workers=max_workers, max_streams=max_streams)
+    else:
+        Status.webserver = HTTPServer((hostname, port), BasicWebServer)
 
     try:
         Status.webserver.serve_forever()
@@ -86,7 +592,8 @@ def run_web_server(hostname="localhost", port=8180):
 #
 # start_web_server
 #
-def start_web_server(hostname="localhost", port=8180, threaded=True):
+def start_web_server(hostname="localhost", port=8180, threaded=True, concurrent=True,
+        max_workers=DEFAULT_MAX_WORKERS, max_streams=DEFAULT_MAX_STREAMS):
     '''
     Start the web server (threaded if required)
 
@@ -94,19 +601,31 @@ def start_web_server(hostname="localhost", port=8180, threaded=True):
         hostname: The hostname/ip address for the server
         port: The port to listen on
         threaded: If true, start a new thread to run the web server
+        concurrent: If true, serve connections concurrently on a bounded pool
+            of threads, keeping HTTP/1.1 connections alive between requests
+        max_workers: The number of threads serving connections (if concurrent)
+        max_streams: The number of streams that may be open at once (if
+            concurrent)
 
     Return Value:
         Process: The process running the web server. None if not forked.
     '''
+    _kwargs = {
+        "hostname": hostname,
+        "port": port,
+        "concurrent": concurrent,
+        "max_workers": max_workers,
+        "max_streams": max_streams,
+    }
+
     # See if we need to start a new thread
     if threaded:
-        Status.webserver_thread = Thread(target=run_web_server,
-                kwargs={ "hostname": hostname, "port": port })
+        Status.webserver_thread = Thread(target=run_web_server, kwargs=_kwargs)
         Status.webserver_thread.start()
 
     else:
         Status.webserver_thread = None
-        run_web_server(hostname=hostname, port=port)
+        run_web_server(**_kwargs)
 
     return Status.webserver_thread
 
@@ -128,8 +647,12 @@ def stop_web_server(thread=None, timeout=60):
     if timeout < 0: timeout = 0
     if timeout > 600: timeout = 600
 
-    # Try to end the web server
+    # End any streams first (a server without stream threads is blocked
+    # sending them, so it can't see the shutdown), then the web server and
+    # any streams opened in the meantime
+    close_streams()
     Status.webserver.shutdown()
+    close_streams()
 
     # Join and close the process to clean it up
     thread.join(timeout=timeout)
@@ -12,8 +12,13 @@
 '''
 # System Imports
 import pytest
-from src.application_status.application_status import Status
+import json
+from src.application_status.application_status import Status, ApplicationStatus
+from src.application_status.collector import Collector
 import time
+import threading
+import random
+import sys
 
 #
 # Globals
@@ -146,3 +151,332 @@ class TestAppStatus():
 
         # Stop the background updates
         Status.stop_updates()
+
+
+    #
+    # Export caching
+    #
+    def test_export_cached_until_changed(self):
+        _version = Status.version
+        _export = Status.export_bytes()
+
+        # Nothing changed - the same encoded payload is returned
+        assert Status.version == _version
+        assert Status.export_bytes() is _export
+
+        # A change bumps the version and rebuilds the payload
+        assert Status.set_static(name="exportVar", value="changed")
+        assert Status.version > _version
+        assert Status.export_bytes() is not _export
+        assert b'"exportVar": "changed"' in Status.export_bytes()
+        assert Status.export() == Status.export_bytes().decode("utf-8")
+
+        # Deletion also bumps the version
+        _version = Status.version
+        assert Status.delete(name="exportVar")
+        assert Status.version > _version
+        assert b"exportVar" not in Status.export_bytes()
+
+
+    #
+    # Subtree export
+    #
+    def test_export_subtree(self):
+        _status = ApplicationStatus()
+        _status.set_static(name="a.b.c", value=1)
+        _status.set_static(name="a.b.d", value=[1, 2])
+        _status.set_static(name="a.e", value="text")
+        _status.set_static(name="f.g", value=None)
+
+        assert _status.export() == json.dumps({ "a": { "b": { "c": 1, "d": [1, 2] }, "e": "text" }, "f": { "g": None } })
+        assert json.loads(_status.export_bytes(name="a.b")) == { "c": 1, "d": [1, 2] }
+        assert _status.export_bytes(name="a.e") == b'"text"'
+        assert _status.export_bytes(name="f.g") == b"null"
+        assert _status.export_bytes(name="a.x") is None
+        assert _status.export_bytes(name="a.e.x") is None
+
+        # Only the nodes on the path of a write are re-encoded
+        _other = _status.export_bytes(name="f")
+        _status.set_static(name="a.b.c", value=2)
+        assert _status.export_bytes(name="f") is _other
+        assert json.loads(_status.export_bytes(name="a.b"))["c"] == 2
+        assert json.loads(_status.export())["a"]["b"]["c"] == 2
+
+
+    #
+    # Only the changed members of a node are re-encoded
+    #
+    def test_export_members(self):
+        for _compact in (False, True):
+            _status = ApplicationStatus(compact=_compact)
+            _expected = {}
+            for _index in range(5):
+                _status.set_static(name=f"wide.k{_index}", value=_index)
+                _expected[f"k{_index}"] = _index
+
+            _status.set_static(name="wide.sub.x", value="a")
+            _expected["sub"] = { "x": "a" }
+            assert _status.export() == json.dumps({ "wide": _expected })
+
+            # Update, delete and re-add members between exports - the order
+            # must still match the dict
+            _status.set_static(name="wide.k1", value="one")
+            _status.delete(name="wide.k2")
+            _status.set_static(name="wide.k5", value=5)
+            _status.set_static(name="wide.sub.x", value="b")
+            _status.delete(name="wide.k3")
+            _status.set_static(name="wide.k3", value=[3])
+            _expected["k1"] = "one"
+            del _expected["k2"]
+            _expected["k5"] = 5
+            _expected["sub"]["x"] = "b"
+            del _expected["k3"]
+            _expected["k3"] = [3]
+            assert _status.export() == json.dumps({ "wide": _expected })
+
+            _status.set_static(name="wide.k0", value=0.5)
+            _expected["k0"] = 0.5
+            assert _status.export_bytes(name="wide") == json.dumps(_expected).encode("utf-8")
+            assert _status.export() == json.dumps({ "wide": _expected })
+
+
+    #
+    # Exports of wide nodes (cached in blocks) follow every change
+    #
+    def test_export_blocks(self):
+        for _compact in (False, True):
+            _status = ApplicationStatus(compact=_compact)
+            _random = random.Random(1)
+            _expected = {}
+            for _index in range(600):
+                _status.set_static(name=f"blocks.k{_index}", value=_index)
+                _expected[f"k{_index}"] = _index
+
+            assert _status.export() == json.dumps({ "blocks": _expected })
+
+            for _round in range(300):
+                _key = f"k{_random.randrange(800)}"
+                _action = _random.random()
+                if _action < 0.3 and _key in _expected and not isinstance(_expected[_key], dict):
+                    _status.delete(name=f"blocks.{_key}")
+                    del _expected[_key]
+                elif _action < 0.4 and _key not in _expected:
+                    _status.set_static(name=f"blocks.{_key}.sub", value=_round)
+                    _expected[_key] = { "sub": _round }
+                elif _key in _expected and isinstance(_expected[_key], dict):
+                    _status.set_static(name=f"blocks.{_key}.sub", value=_round)
+                    _expected[_key]["sub"] = _round
+                else:
+                    _status.set_static(name=f"blocks.{_key}", value=_round)
+                    _expected[_key] = _round
+
+                if _round % 7 == 0: assert _status.export() == json.dumps({ "blocks": _expected })
+
+            assert _status.export() == json.dumps({ "blocks": _expected })
+
+
+    #
+    # Export in chunks
+    #
+    def test_iter_export(self, tmp_path):
+        _status = ApplicationStatus()
+        for _index in range(1000):
+            _status.set_static(name=f"chunk.group{_index % 10}.value{_index}", value=_index)
+        _status.set_static(name="chunk.text", value="text")
+
+        # Nothing has been encoded yet, so the chunks are built as they go
+        _chunks = list(_status.iter_export(chunk_size=1000))
+        assert len(_chunks) > 10
+        assert b"".join(_chunks) == _status.export_bytes()
+        assert b"".join(_status.iter_export(name="chunk.group3")) == _status.export_bytes(name="chunk.group3")
+        assert list(_status.iter_export(name="chunk.text")) == [ b'"text"' ]
+        assert _status.iter_export(name="chunk.missing") is None
+
+        # The status can change between chunks
+        _status = ApplicationStatus()
+        for _index in range(100):
+            _status.set_static(name=f"chunk.value{_index}", value=_index)
+
+        _chunks = _status.iter_export(chunk_size=10)
+        _body = next(_chunks)
+        _status.delete(name="chunk.value99")
+        _status.set_static(name="chunk.value98", value="changed")
+        _body += b"".join(_chunks)
+        _export = json.loads(_body)["chunk"]
+        assert "value99" not in _export and _export["value98"] == "changed"
+
+        with open(tmp_path / "export.json", "wb") as _file:
+            _written = _status.export_to(fp=_file, chunk_size=100)
+
+        assert (tmp_path / "export.json").read_bytes() == _status.export_bytes()
+        assert _written == len(_status.export_bytes())
+        assert _status.export_to(fp=_file, name="missing") is None
+
+
+    #
+    # Index kept in sync with the tree
+    #
+    def test_index_in_sync(self):
+        _status = ApplicationStatus()
+        _status.set_static(name="idx.a.b", value=1)
+        _status.set_static(name="idx.a.b", value=2)
+        assert _status.get(name="idx.a.b") == 2
+        assert json.loads(_status.export())["idx"]["a"]["b"] == 2
+
+        # Deleted entries are removed from the index and can be created again
+        assert _status.delete(name="idx.a", subtree=True)
+        assert _status.get(name="idx.a.b") is None
+        _status.set_static(name="idx.a.b", value=3)
+        assert _status.get(name="idx.a.b") == 3
+
+        # A value still can't be nested under, or replace, a subtree
+        with pytest.raises(ValueError):
+            _status.set_static(name="idx.a.b.c", value=4)
+        with pytest.raises(ValueError):
+            _status.set_static(name="idx.a", value=4)
+
+
+    #
+    # Entries added at the same time under a new node all end up in the tree
+    #
+    def test_concurrent_new_nodes(self):
+        def add(status, barrier, index):
+            barrier.wait()
+            for _round in range(20):
+                status.set_static(name=f"race.r{_round}.c{index}", value=index)
+
+        # Switch threads as often as possible, to make the race likely
+        _interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(50):
+                _status = ApplicationStatus()
+                _barrier = threading.Barrier(8)
+                _threads = [ threading.Thread(target=add, args=(_status, _barrier, _index))
+                        for _index in range(8) ]
+                for _thread in _threads: _thread.start()
+                for _thread in _threads: _thread.join()
+
+                _export = json.loads(_status.export())["race"]
+                for _round in range(20):
+                    assert _export[f"r{_round}"] == { f"c{_index}": _index for _index in range(8) }
+
+        finally:
+            sys.setswitchinterval(_interval)
+
+
+    #
+    # Bounded pool of collector threads
+    #
+    def test_collector_pool(self):
+        _status = ApplicationStatus()
+        _status.collector_workers = 2
+        _release = threading.Event()
+
+        def slow_collector():
+            _release.wait(timeout=10)
+            return "done"
+
+        for _index in range(4):
+            _status.set(name=f"pool.value{_index}", func=slow_collector, update=600)
+
+        # Only two collectors can run at once, the rest wait in the queue
+        time.sleep(0.2)
+        assert _status.collector_pool_stats() == { "workers": 2, "active": 2, "queued": 2 }
+
+        _release.set()
+        time.sleep(0.2)
+        assert _status.collector_pool_stats() == { "workers": 2, "active": 0, "queued": 0 }
+        for _index in range(4):
+            assert _status.get(name=f"pool.value{_index}") == "done"
+            _status.delete(name=f"pool.value{_index}")
+
+
+    #
+    # The pool shut down while a job is being queued
+    #
+    def test_collector_pool_shutdown(self):
+        _status = ApplicationStatus()
+        assert _status.run_thread(func=lambda: None)
+
+        # Shut down the pool, as stop_updates would between the check and the submit
+        _status._ApplicationStatus__executor.shutdown(wait=True)
+
+        _collector = Collector(name="pool.shutdown", func=lambda: 1)
+        _status._dispatch_collector(collector=_collector)
+        assert not _collector.running
+        assert _status.collector_pool_stats()["queued"] == 0
+        assert not _status.run_thread(func=lambda: None)
+
+
+    #
+    # Changes since a version
+    #
+    def test_export_since(self):
+        _status = ApplicationStatus()
+        _status.set_static(name="a.b", value=1)
+        _status.set_static(name="a.c", value=2)
+        _version = _status.version
+
+        _status.set_static(name="a.b", value=3)
+        _status.set_static(name="a.d", value=4)
+        _status.delete(name="a.c")
+        _status.set_static(name="a.d", value=5)
+
+        _delta = json.loads(_status.export_since(version=_version))
+        assert _delta == { "version": _status.version, "instance": _status.instance_id, "full": False,
+                "set": { "a.b": 3, "a.d": 5 }, "deleted": [ "a.c" ] }
+
+        # Nothing changed
+        _delta = json.loads(_status.export_since(version=_status.version))
+        assert _delta["set"] == {} and _delta["deleted"] == []
+
+        # Unknown versions or instances get the full status
+        for (_since, _instance) in ((_status.version + 1, None), (_version, "other")):
+            _delta = json.loads(_status.export_since(version=_since, instance_id=_instance))
+            assert _delta["full"]
+            assert _delta["status"] == json.loads(_status.export())
+
+
+    #
+    # Compact layout works the same way
+    #
+    def test_compact(self):
+        _status = ApplicationStatus()
+        _compact = ApplicationStatus(compact=True)
+
+        for _target in (_status, _compact):
+            _target.set_static(name="conn.a.state", value="open")
+            _target.set_static(name="conn.a.bytes", value=10)
+            _target.set_static(name="conn.b.state", value="closed")
+            _target.set_static(name="conn.a.bytes", value=20)
+            _target.delete(name="conn.b.state")
+
+        assert _compact.export() == _status.export()
+        assert _compact.get(name="conn.a.bytes") == 20
+        assert sorted(_compact.items()) == sorted(_status.items())
+
+        # Setting the same value isn't a change
+        _version = _compact.version
+        _compact.set_static(name="conn.a.bytes", value=20)
+        assert _compact.version == _version
+
+        # Unless it is a list changed in place
+        for _target in (_status, _compact):
+            _list = [1]
+            _target.set_static(name="listed.list", value=_list)
+            _list.append(2)
+            _version = _target.version
+            _target.set_static(name="listed.list", value=_list)
+            assert _target.version > _version
+            assert json.loads(_target.export())["listed"]["list"] == [1, 2]
+
+            _version = _target.version
+            _target.set_static(name="listed.list", value=[1, 2])
+            assert _target.version == _version
+
+        # Nesting is checked without the index
+        _compact.set_static(name="conn.c.state", value="open")
+        assert list(json.loads(_compact.export_bytes(name="conn"))) == [ "a", "b", "c" ]
+        with pytest.raises(ValueError):
+            _compact.set_static(name="conn.a", value=1)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+'''
+*
+* test_asyncmode.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for the asyncio mode
+*
+'''
+# System Imports
+import pytest
+import asyncio
+import json
+import time
+from src.application_status.application_status import Status
+from src.application_status.async_web_server import start_async_web_server, stop_async_web_server
+
+#
+# Globals
+#
+PORT = 8181
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+async def raw_request(request=b""):
+    _reader, _writer = await asyncio.open_connection("127.0.0.1", PORT)
+    _writer.write(request)
+    await _writer.drain()
+
+    # Read the headers and then the body based on the content length
+    _head = await _reader.readuntil(b"\r\n\r\n")
+    _length = 0
+    for _line in _head.decode("iso-8859-1").split("\r\n"):
+        if _line.lower().startswith("content-length:"):
+            _length = int(_line.partition(":")[2])
+
+    _body = await _reader.readexactly(_length)
+    _writer.close()
+
+    return (_head, _body)
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Status
+#
+class TestAsyncMode():
+    #
+    # Coroutine collectors and the asyncio web server
+    #
+    def test_async_collector_and_server(self):
+        _counter = []
+
+        async def collector():
+            await asyncio.sleep(0)
+            _counter.append(1)
+            return len(_counter)
+
+        async def main():
+            Status.start_async_updates()
+            Status.set(name="async.counter", func=collector, update=0.1)
+            await start_async_web_server(hostname="127.0.0.1", port=PORT)
+
+            try:
+                await asyncio.sleep(0.35)
+                assert Status.get(name="async.counter") >= 3
+
+                (_head, _body) = await raw_request(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+                assert _head.startswith(b"HTTP/1.1 200")
+                assert json.loads(_body)["async"]["counter"] >= 3
+
+                (_head, _body) = await raw_request(b"PUT / HTTP/1.1\r\nHost: x\r\n\r\n")
+                assert _head.startswith(b"HTTP/1.1 501")
+                assert b"Connection: close" in _head
+
+                # The body of an unsupported request is never read as another request
+                _reader, _writer = await asyncio.open_connection("127.0.0.1", PORT)
+                _smuggled = b"GET /async HTTP/1.1\r\nHost: x\r\n\r\n"
+                _writer.write(b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s"
+                        % (len(_smuggled), _smuggled))
+                await _writer.drain()
+                _response = await asyncio.wait_for(_reader.read(), timeout=5)
+                assert _response.startswith(b"HTTP/1.1 501")
+                assert _response.count(b"HTTP/1.1") == 1
+                _writer.close()
+
+                # Deleting the entry cancels its task
+                assert Status.delete(name="async.counter")
+                _runs = len(_counter)
+                await asyncio.sleep(0.25)
+                assert len(_counter) == _runs
+
+            finally:
+                Status.stop_async_updates()
+                await stop_async_web_server()
+
+        asyncio.run(main())
+
+
+    #
+    # Server-Sent Events from the asyncio web server
+    #
+    def test_async_stream(self):
+        async def main():
+            await start_async_web_server(hostname="127.0.0.1", port=PORT)
+
+            try:
+                _reader, _writer = await asyncio.open_connection("127.0.0.1", PORT)
+                _writer.write(b"GET /stream HTTP/1.1\r\nHost: x\r\n\r\n")
+                await _writer.drain()
+
+                _head = await _reader.readuntil(b"\r\n\r\n")
+                assert b"text/event-stream" in _head
+                _event = await _reader.readuntil(b"\n\n")
+                assert b"event: snapshot" in _event
+
+                Status.set_static(name="asyncstream.value", value=5)
+                _event = await asyncio.wait_for(_reader.readuntil(b"\n\n"), timeout=5)
+                assert b"event: set" in _event
+                assert b'"name": "asyncstream.value", "value": 5' in _event
+                _writer.close()
+
+            finally:
+                await stop_async_web_server()
+                Status.delete(name="asyncstream", subtree=True)
+
+        asyncio.run(main())
+
+
+    #
+    # Streamed exports from the asyncio web server
+    #
+    def test_async_chunked(self):
+        async def main():
+            await start_async_web_server(hostname="127.0.0.1", port=PORT)
+            for _index in range(100):
+                Status.set_static(name=f"asyncchunked.value{_index}", value=_index)
+
+            Status.stream_exports = True
+            try:
+                _reader, _writer = await asyncio.open_connection("127.0.0.1", PORT)
+                for _ in range(2):
+                    _writer.write(b"GET /asyncchunked HTTP/1.1\r\nHost: x\r\n\r\n")
+                    await _writer.drain()
+
+                    _head = await _reader.readuntil(b"\r\n\r\n")
+                    assert b"Transfer-Encoding: chunked" in _head
+                    assert b"Connection: close" not in _head
+
+                    # Read the chunks up to the empty one
+                    _body = b""
+                    while True:
+                        _size = int(await _reader.readuntil(b"\r\n"), 16)
+                        _body += (await _reader.readexactly(_size + 2))[:-2]
+                        if not _size: break
+
+                    assert json.loads(_body)["value99"] == 99
+
+                _writer.close()
+
+                # HTTP/1.0 clients get the body up to the end of the connection
+                _reader, _writer = await asyncio.open_connection("127.0.0.1", PORT)
+                _writer.write(b"GET /asyncchunked HTTP/1.0\r\n\r\n")
+                await _writer.drain()
+                (_head, _, _body) = (await _reader.read()).partition(b"\r\n\r\n")
+                assert b"Transfer-Encoding" not in _head
+                assert json.loads(_body)["value0"] == 0
+                _writer.close()
+
+            finally:
+                Status.stream_exports = False
+                await stop_async_web_server()
+                Status.delete(name="asyncchunked", subtree=True)
+
+        asyncio.run(main())
+
+
+    #
+    # Lazy entries read on the event loop
+    #
+    def test_async_lazy(self):
+        _calls = []
+
+        async def async_probe():
+            await asyncio.sleep(0.2)
+            _calls.append(1)
+            return len(_calls)
+
+        def blocking_probe():
+            time.sleep(0.3)
+            return "done"
+
+        async def main():
+            Status.set_lazy(name="asynclazy.value", func=async_probe, ttl=60)
+            Status.set_lazy(name="asynclazy.blocking", func=blocking_probe, ttl=60)
+            await start_async_web_server(hostname="127.0.0.1", port=PORT)
+
+            _ticks = []
+            async def ticker():
+                while True:
+                    _ticks.append(1)
+                    await asyncio.sleep(0.01)
+
+            _ticker = asyncio.get_running_loop().create_task(ticker())
+            try:
+                # The server waits for the value without blocking the loop
+                (_head, _body) = await raw_request(b"GET /asynclazy/value HTTP/1.1\r\nHost: x\r\n\r\n")
+                assert _head.startswith(b"HTTP/1.1 200")
+                assert json.loads(_body) == 1
+                assert len(_ticks) >= 10
+
+                # Reading on the loop doesn't wait - the function is run on the pool
+                _start = time.monotonic()
+                assert Status.get(name="asynclazy.blocking") is None
+                assert time.monotonic() - _start < 0.1
+
+                await Status.refresh_async(name="asynclazy")
+                assert Status.get(name="asynclazy.blocking") == "done"
+                assert Status.collector_stats(name="asynclazy.value")["errors"] == 0
+                assert len(_calls) == 1
+
+            finally:
+                _ticker.cancel()
+                await stop_async_web_server()
+                Status.delete(name="asynclazy", subtree=True)
+
+        asyncio.run(main())
+
+
+    #
+    # Restarting the updates after a run was cancelled
+    #
+    def test_async_cancelled_run(self):
+        _calls = []
+
+        async def collector():
+            _calls.append(1)
+            if len(_calls) == 1: await asyncio.sleep(5)
+            return len(_calls)
+
+        async def main():
+            Status.start_async_updates()
+            Status.set(name="asynccancel.value", func=collector, update=0.1)
+
+            try:
+                # Stop while the first run is waiting
+                await asyncio.sleep(0.05)
+                Status.stop_async_updates()
+                await asyncio.sleep(0.05)
+                assert not Status.collector_stats(name="asynccancel.value")["running"]
+
+                Status.start_async_updates()
+                await asyncio.sleep(0.35)
+                assert Status.get(name="asynccancel.value") >= 2
+                assert Status.collector_stats(name="asynccancel.value")["overruns"] == 0
+
+            finally:
+                Status.stop_async_updates()
+                Status.delete(name="asynccancel", subtree=True)
+
+        asyncio.run(main())
@@ -11,6 +11,7 @@
 *
 '''
 import pytest
+import socket
 import time
 
 from src.application_status.web_server import start_web_server, stop_web_server
@@ -26,6 +27,27 @@ def pytest_configure(config):
     pytest.web_request = Web_Request()
 
 
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+#
+# wait_for_server
+#
+def wait_for_server(host="127.0.0.1", port=8180, timeout=5):
+    _end = time.monotonic() + timeout
+    while time.monotonic() < _end:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+
+        except OSError:
+            time.sleep(0.01)
+
+    raise TimeoutError(f"Web server not listening on {host}:{port}")
+
+
 ###########################################################################
 #
 # Fixtures
@@ -46,8 +68,8 @@ def pytest_configure(config):
 def new_request():
     _webserver = start_web_server()
 
-    # Give the web server a chance to start
-    time. sleep(1)
+    # Wait for the web server to start listening
+    wait_for_server()
 
     yield pytest.web_request
     stop_web_server(thread=_webserver, timeout=15)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+'''
+*
+* test_fork.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for forking after the status is set up
+*
+'''
+# System Imports
+import pytest
+import json
+import time
+import os
+import threading
+from src.application_status.application_status import ApplicationStatus
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def run_in_child(func=None):
+    '''
+    Fork, run the function in the child and return its result (JSON)
+    '''
+    (_read, _write) = os.pipe()
+    _pid = os.fork()
+    if _pid == 0:
+        os.close(_read)
+        try:
+            _result = func()
+        except BaseException as _error:
+            _result = { "error": repr(_error) }
+
+        os.write(_write, json.dumps(_result).encode("utf-8"))
+        os._exit(0)
+
+    os.close(_write)
+    _chunks = []
+    while True:
+        _chunk = os.read(_read, 65536)
+        if not _chunk: break
+        _chunks.append(_chunk)
+
+    os.close(_read)
+    os.waitpid(_pid, 0)
+
+    return json.loads(b"".join(_chunks))
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Forking
+#
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork not available")
+class TestFork():
+    #
+    # Collectors keep running in the child
+    #
+    def test_collectors_restart(self):
+        _status = ApplicationStatus()
+        _status.set(name="pid", func=os.getpid, update=0.05)
+        _status.start_updates()
+        time.sleep(0.1)
+
+        def child():
+            _end = time.monotonic() + 5
+            while time.monotonic() < _end:
+                if _status.get(name="pid") == os.getpid(): break
+                time.sleep(0.01)
+
+            return { "pid": os.getpid(), "value": _status.get(name="pid"),
+                    "thread": _status.update_thread is not None }
+
+        try:
+            _result = run_in_child(func=child)
+            assert _result["value"] == _result["pid"]
+            assert _result["thread"]
+
+            # The parent keeps its own value
+            assert _status.get(name="pid") == os.getpid()
+
+        finally:
+            _status.stop_updates()
+
+
+    #
+    # The child can change the status, without restarting the updates
+    #
+    def test_no_restart(self):
+        _status = ApplicationStatus()
+        _status.restart_after_fork = False
+        _status.set_static(name="a.b", value=1)
+        _status.set(name="c", func=lambda: 2, update=600)
+        _status.start_updates()
+
+        _end = time.monotonic() + 2
+        while _status.get(name="c") != 2 and time.monotonic() < _end:
+            time.sleep(0.01)
+
+        def child():
+            _status.set_static(name="a.b", value=3)
+            return { "thread": _status.update_thread is not None, "status": json.loads(_status.export()) }
+
+        try:
+            _result = run_in_child(func=child)
+            assert not _result["thread"]
+            assert _result["status"] == { "a": { "b": 3 }, "c": 2 }
+            assert _status.get(name="a.b") == 1
+
+        finally:
+            _status.stop_updates()
+
+
+    #
+    # A history lock held by another thread while forking is free in the child
+    #
+    def test_history_lock(self):
+        _status = ApplicationStatus()
+        _status.set_static(name="count", value=1)
+        _status.track_history(name="count")
+        _history = _status._ApplicationStatus__history_dict["count"]
+
+        _held = threading.Event()
+        _release = threading.Event()
+        def hold():
+            with _history._History__lock:
+                _held.set()
+                _release.wait()
+
+        _thread = threading.Thread(target=hold, daemon=True)
+        _thread.start()
+        _held.wait()
+
+        def child():
+            if not _history._History__lock.acquire(timeout=1): return { "free": False }
+            _history._History__lock.release()
+
+            _status.set_static(name="count", value=2)
+            _bucket_list = _status.history(name="count", period=60, step=60)
+            return { "free": True, "max": _bucket_list[0]["max"] }
+
+        try:
+            assert run_in_child(func=child) == { "free": True, "max": 2 }
+
+        finally:
+            _release.set()
+            _thread.join()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+'''
+*
+* test_history.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for the history of entries
+*
+'''
+# System Imports
+import pytest
+import requests
+import time
+from src.application_status.application_status import ApplicationStatus, Status
+from src.application_status.history import History
+
+#
+# Globals
+#
+BASE_URI="http://127.0.0.1:8180/"
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# History
+#
+class TestHistory():
+    #
+    # Buckets summarise the samples
+    #
+    def test_query(self):
+        _history = History(samples=4)
+        for (_time, _value) in ((10, 1), (11, 5), (12, 3), (25, 7), (26, 2)):
+            _history.add(timestamp=_time, value=_value)
+
+        # The oldest sample was replaced
+        assert len(_history) == 4
+
+        _buckets = _history.query(start=10, end=30, step=10)
+        assert _buckets[0] == { "time": 10, "min": 3.0, "max": 5.0, "avg": 4.0, "count": 2 }
+        assert _buckets[1] == { "time": 20, "min": 2.0, "max": 7.0, "avg": 4.0, "count": 2 }
+
+        # Empty buckets carry the last value
+        _buckets = _history.query(start=0, end=40, step=10)
+        assert _buckets[0]["avg"] is None
+        assert _buckets[3] == { "time": 30, "min": 2.0, "max": 2.0, "avg": 2.0, "count": 0 }
+
+        with pytest.raises(ValueError):
+            _history.query(start=0, end=10, step=0)
+
+
+    #
+    # Changes to a tracked entry are recorded
+    #
+    def test_track(self):
+        _status = ApplicationStatus()
+        _status.set_static(name="queue.depth", value=4)
+        _status.track_history(name="queue.depth", samples=100)
+        _status.set_static(name="queue.depth", value=8)
+        _status.set_static(name="queue.depth", value="not a number")
+        _status.set_static(name="queue.depth", value=2)
+
+        _buckets = _status.history(name="queue.depth", period=60, step=60)
+        assert _buckets == [ { "time": _buckets[0]["time"], "min": 2.0, "max": 8.0,
+                "avg": 14 / 3, "count": 3 } ]
+
+        assert _status.history(name="queue.other") is None
+        _status.delete(name="queue.depth")
+        assert _status.history(name="queue.depth") is None
+
+
+    #
+    # History endpoint
+    #
+    def test_endpoint(self, new_request):
+        Status.set_static(name="webhistory.depth", value=1)
+        Status.track_history(name="webhistory.depth")
+        Status.set_static(name="webhistory.depth", value=3)
+
+        _req = new_request.get(uri=f"{BASE_URI}_internal/history/webhistory/depth", params={ "range": 10, "step": 5 })
+        assert _req["name"] == "webhistory.depth"
+        assert len(_req["buckets"]) == 2
+        assert _req["buckets"][-1]["max"] == 3
+
+        assert requests.get(f"{BASE_URI}_internal/history/webhistory/missing").status_code == 404
+        assert requests.get(f"{BASE_URI}_internal/history/webhistory/depth", params={ "step": "x" }).status_code == 400
+        Status.delete(name="webhistory.depth")
+
+        # An entry called history is served like any other
+        Status.set_static(name="history.depth", value=5)
+        assert new_request.get(uri=f"{BASE_URI}history/depth") == 5
+        Status.delete(name="history.depth")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+'''
+*
+* test_imports.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for importing the package
+*
+'''
+# System Imports
+import pytest
+import subprocess
+import json
+import sys
+
+#
+# Globals
+#
+# Modules that should only be imported when the web servers are used
+HEAVY_MODULES = [ "asyncio", "concurrent.futures", "http.server", "socketserver", "email", "inspect", "logging" ]
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def run_python(code=""):
+    '''
+    Run code in a new interpreter, returning what it prints (as JSON)
+    '''
+    _result = subprocess.run([ sys.executable, "-c", code ], capture_output=True, text=True, check=True)
+    return json.loads(_result.stdout)
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Imports
+#
+class TestImports():
+    #
+    # Setting the status doesn't import the web servers
+    #
+    def test_cold_start(self):
+        _loaded = run_python(code=(
+                "import sys, json\n"
+                "from src.application_status import Status\n"
+                "Status.set_static(name='a.b', value=1)\n"
+                f"print(json.dumps([ m for m in {HEAVY_MODULES!r} if m in sys.modules ]))\n"))
+
+        assert _loaded == []
+
+
+    #
+    # The lazily loaded names can still be imported
+    #
+    def test_lazy_names(self):
+        _names = run_python(code=(
+                "import json\n"
+                "import src.application_status as package\n"
+                "from src.application_status import start_web_server, Metrics, SharedStatusRegion\n"
+                "print(json.dumps([ callable(start_web_server), type(Metrics).__name__,\n"
+                "        all(hasattr(package, name) for name in package.__all__), 'BasicWebServer' in dir(package) ]))\n"))
+
+        assert _names == [ True, "MetricsExporter", True, True ]
+
+        with pytest.raises(AttributeError):
+            import src.application_status as _package
+            _package.not_a_name
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+'''
+*
+* test_lazy.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+*
+* Specific tests for entries updated when read
+*
+'''
+# System Imports
+import pytest
+import threading
+import json
+import time
+from src.application_status.application_status import ApplicationStatus, Status
+from src.application_status.shared_status import SharedStatusRegion
+from src.application_status.stream import ChangeSubscriber, _next_events
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Lazy entries
+#
+class TestLazy():
+    #
+    # Only run when read, and the value is out of date
+    #
+    def test_ttl(self):
+        _status = ApplicationStatus()
+        _calls = []
+
+        def probe():
+            _calls.append(1)
+            return len(_calls)
+
+        assert _status.set_lazy(name="lazy.probe", func=probe, ttl=0.2)
+        time.sleep(0.1)
+        assert _calls == []
+
+        assert _status.get(name="lazy.probe") == 1
+        assert _status.get(name="lazy.probe") == 1
+        assert json.loads(_status.export())["lazy"]["probe"] == 1
+        assert _status.collector_stats(name="lazy.probe")["lazy"]
+
+        # Out of date - the next read (of any kind) runs it again
+        time.sleep(0.25)
+        assert json.loads(_status.export_bytes(name="lazy")) == { "probe": 2 }
+        assert dict(_status.items())["lazy.probe"] == 2
+        assert len(_calls) == 2
+
+        # A failed run leaves the value, and is tried again by the next reader
+        _status.set_lazy(name="lazy.failing", func=lambda: 1 / 0, ttl=60)
+        assert _status.get(name="lazy.failing") is None
+        assert _status.get(name="lazy.failing") is None
+        assert _status.collector_stats(name="lazy.failing")["errors"] == 2
+
+        assert _status.delete(name="lazy.probe")
+        assert _status.collector_stats(name="lazy.probe") is None
+
+        # Coroutine functions are run to completion
+        async def async_probe():
+            return "async"
+
+        _status.set_lazy(name="lazy.async", func=async_probe, ttl=60)
+        assert _status.get(name="lazy.async") == "async"
+
+
+    #
+    # Readers at the same time share one run
+    #
+    def test_single_flight(self):
+        _status = ApplicationStatus()
+        _calls = []
+
+        def slow_probe():
+            _calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        _status.set_lazy(name="lazy.slow", func=slow_probe, ttl=60)
+
+        _results = []
+        _threads = [ threading.Thread(target=lambda: _results.append(_status.get(name="lazy.slow")))
+                for _ in range(8) ]
+        for _thread in _threads: _thread.start()
+        for _thread in _threads: _thread.join()
+
+        assert len(_calls) == 1
+        assert _results == [ "value" ] * 8
+
+
+    #
+    # Out of date values are used while they are updated
+    #
+    def test_stale_while_revalidate(self):
+        _status = ApplicationStatus()
+        _release = threading.Event()
+        _calls = []
+
+        def probe():
+            _calls.append(1)
+            if len(_calls) > 1: _release.wait(timeout=5)
+            return len(_calls)
+
+        _status.set_lazy(name="lazy.swr", func=probe, ttl=0.1, stale_while_revalidate=True)
+
+        # There is no value yet, so the first reader waits
+        assert _status.get(name="lazy.swr") == 1
+
+        # The old value is returned straight away, and updated in the background
+        time.sleep(0.15)
+        _start = time.monotonic()
+        assert _status.get(name="lazy.swr") == 1
+        assert _status.get(name="lazy.swr") == 1
+        assert time.monotonic() - _start < 0.1
+
+        _release.set()
+        for _ in range(50):
+            if _status.get(name="lazy.swr") == 2: break
+            time.sleep(0.02)
+
+        assert _status.get(name="lazy.swr") == 2
+        assert len(_calls) == 2
+
+
+    #
+    # Replaced by a scheduled entry
+    #
+    def test_replace(self):
+        _status = ApplicationStatus()
+        _status.set_lazy(name="lazy.replaced", func=lambda: "lazy", ttl=60)
+        assert _status.get(name="lazy.replaced") == "lazy"
+
+        _status.set(name="lazy.replaced", func=lambda: "scheduled", update=600)
+        time.sleep(0.1)
+        assert _status.get(name="lazy.replaced") == "scheduled"
+        assert not _status.collector_stats(name="lazy.replaced")["lazy"]
+        _status.delete(name="lazy.replaced")
+
+
+    #
+    # Exports made in the background don't run lazy entries
+    #
+    def test_background_exports(self, tmp_path):
+        _calls = []
+
+        def probe():
+            _calls.append(1)
+            return len(_calls)
+
+        # Publishing to the shared region
+        _status = ApplicationStatus()
+        _status.set_lazy(name="lazy.shared", func=probe, ttl=60)
+        _region = SharedStatusRegion(path=str(tmp_path / "status"), slots=1, slot_size=256, create=True)
+        _status.share(region=_region, slot=0, interval=600)
+        assert _status.publish_shared()
+        assert _calls == []
+        assert _region.read_all() == { 0: { "lazy": { "shared": None } } }
+        _status.unshare()
+
+        # Resyncing a stream that fell behind
+        Status.set_lazy(name="lazystream.probe", func=probe, ttl=60)
+        _subscriber = ChangeSubscriber(max_buffered=1)
+        _subscriber.resync = True
+        assert b"event: snapshot" in _next_events(subscriber=_subscriber)
+        assert _calls == []
+
+        # Anything asking for the value runs it
+        assert _status.export_bytes(name="lazy") == b'{"shared": 1}'
+        assert Status.get(name="lazystream.probe") == 2
+        Status.delete(name="lazystream.probe")
+
+
+    #
+    # Readers wait at most the timeout, and runs of several entries overlap
+    #
+    def test_timeout(self):
+        _status = ApplicationStatus()
+        _release = threading.Event()
+
+        def hung_probe():
+            _release.wait(timeout=5)
+            return "late"
+
+        _status.set_lazy(name="lazy.hung", func=hung_probe, ttl=60, timeout=0.2)
+        try:
+            for _read in (lambda: _status.get(name="lazy.hung"), _status.export):
+                _start = time.monotonic()
+                _read()
+                assert time.monotonic() - _start < 0.5
+
+            assert _status.get(name="lazy.hung") is None
+
+        finally:
+            _release.set()
+
+        def slow_probe():
+            time.sleep(0.2)
+            return "slow"
+
+        for _index in range(4):
+            _status.set_lazy(name=f"slow.p{_index}", func=slow_probe, ttl=60)
+
+        _start = time.monotonic()
+        assert json.loads(_status.export_bytes(name="slow")) == { f"p{_index}": "slow" for _index in range(4) }
+        assert time.monotonic() - _start < 0.6
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+'''
+*
+* test_metrics.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for the Prometheus metrics
+*
+'''
+# System Imports
+import pytest
+from src.application_status.application_status import Status
+from src.application_status.metrics import Metrics
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Metrics
+#
+class TestMetrics():
+    #
+    # Numeric values are rendered as gauges
+    #
+    def test_render(self):
+        Status.set_static(name="metrics.pool.size", value=10)
+        Status.set_static(name="metrics.pool.load", value=0.5)
+        Status.set_static(name="metrics.pool.up", value=True)
+        Status.set_static(name="metrics.pool.name", value="not a number")
+
+        _text = Metrics.render().decode("utf-8")
+        assert "# TYPE metrics_pool_size gauge\nmetrics_pool_size 10\n" in _text
+        assert "metrics_pool_load 0.5\n" in _text
+        assert "metrics_pool_up 1\n" in _text
+        assert "metrics_pool_name" not in _text
+
+        # Unchanged status - the same render is returned
+        assert Metrics.render() is Metrics.render()
+
+        Status.set_static(name="metrics.pool.size", value=11)
+        assert "metrics_pool_size 11\n" in Metrics.render().decode("utf-8")
+        Status.delete(name="metrics", subtree=True)
+
+
+    #
+    # Labels extracted from the name
+    #
+    def test_label_rules(self):
+        Metrics.add_label_rule(pattern=r"metrics\.shard\.(?P<shard>[^.]+)\.connections",
+                metric="shard_connections")
+        Status.set_static(name="metrics.shard.a.connections", value=3)
+        Status.set_static(name="metrics.shard.b.connections", value=4)
+
+        _text = Metrics.render().decode("utf-8")
+        assert _text.count("# TYPE shard_connections gauge") == 1
+        assert 'shard_connections{shard="a"} 3\n' in _text
+        assert 'shard_connections{shard="b"} 4\n' in _text
+
+        Metrics.clear_label_rules()
+        assert "metrics_shard_a_connections 3\n" in Metrics.render().decode("utf-8")
+        Status.delete(name="metrics", subtree=True)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+'''
+*
+* test_scheduler.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for the scheduler
+*
+'''
+# System Imports
+import pytest
+import threading
+import time
+from src.application_status.scheduler import Scheduler
+from src.application_status.application_status import ApplicationStatus
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Scheduler
+#
+class TestScheduler():
+    #
+    # Jobs run in order of when they are due
+    #
+    def test_run_pending(self):
+        _runs = []
+        _scheduler = Scheduler()
+        _scheduler.add(name="slow", func=lambda: _runs.append("slow"), interval=10)
+        _scheduler.add(name="fast", func=lambda: _runs.append("fast"), interval=0.05)
+
+        # Nothing is due yet - the delay is until the first job
+        _delay = _scheduler.run_pending()
+        assert _runs == []
+        assert 0 < _delay <= 0.05
+
+        time.sleep(_delay)
+        _delay = _scheduler.run_pending()
+        assert _runs == [ "fast" ]
+        assert 0 < _delay <= 0.05
+
+        # Removed jobs don't run
+        assert _scheduler.remove(name="fast")
+        assert not _scheduler.remove(name="fast")
+        assert "fast" not in _scheduler
+        assert len(_scheduler) == 1
+        time.sleep(0.06)
+        _scheduler.run_pending()
+        assert _runs == [ "fast" ]
+
+
+    #
+    # Changes wake the runner
+    #
+    def test_wake(self):
+        _scheduler = Scheduler()
+        assert _scheduler.run_pending() is None
+
+        _thread = threading.Timer(0.1, lambda: _scheduler.add(name="job", func=lambda: None, interval=5))
+        _thread.start()
+
+        _start = time.monotonic()
+        assert _scheduler.wait(timeout=5)
+        assert time.monotonic() - _start < 1
+        _thread.join()
+
+        # Runners that can't wait on the scheduler are called instead
+        _woken = []
+        _scheduler.wake_func = lambda: _woken.append(1)
+        _scheduler.remove(name="job")
+        assert _woken == [ 1 ]
+
+
+    #
+    # Sub second updates and prompt stop
+    #
+    def test_sub_second_updates(self):
+        _status = ApplicationStatus()
+        _runs = []
+
+        def collector():
+            _runs.append(1)
+            return len(_runs)
+
+        _status.start_updates()
+        _status.set(name="fast.counter", func=collector, update=0.05)
+        time.sleep(0.5)
+        assert _status.get(name="fast.counter") >= 5
+
+        _start = time.monotonic()
+        _status.stop_updates()
+        assert time.monotonic() - _start < 0.5
+        _status.delete(name="fast.counter")
+
+
+    #
+    # Slow collectors don't run more than once at a time
+    #
+    def test_overrun(self):
+        _status = ApplicationStatus()
+        _lock = threading.Lock()
+        _state = { "running": 0, "max_running": 0, "runs": 0 }
+
+        def slow_collector():
+            with _lock:
+                _state["running"] += 1
+                _state["max_running"] = max(_state["max_running"], _state["running"])
+
+            time.sleep(0.2)
+
+            with _lock:
+                _state["running"] -= 1
+                _state["runs"] += 1
+                return _state["runs"]
+
+        _status.start_updates()
+        _status.set(name="slow.value", func=slow_collector, update=0.02)
+        time.sleep(0.7)
+        _status.stop_updates()
+
+        assert _state["max_running"] == 1
+        assert _state["runs"] >= 2
+        assert _status.collector_stats(name="slow.value")["overruns"] > 0
+        assert _status.collector_stats(name="missing") is None
+        _status.delete(name="slow.value")
+
+
+    #
+    # Runs that take too long are abandoned
+    #
+    def test_timeout(self):
+        _status = ApplicationStatus()
+        _release = threading.Event()
+        _calls = []
+
+        def stuck_collector():
+            _calls.append(1)
+            if len(_calls) == 1:
+                _release.wait(timeout=10)
+                return "late"
+
+            return "fresh"
+
+        _status.start_updates()
+        _status.set(name="stuck.value", func=stuck_collector, update=0.05, timeout=0.1)
+        time.sleep(0.4)
+
+        # The stuck run was abandoned, but no new run starts while it holds a thread
+        assert _status.collector_stats(name="stuck.value")["timeouts"] == 1
+        assert len(_calls) == 1
+        assert _status.get(name="stuck.value") is None
+
+        # The late value from the abandoned run isn't used, and the runs start again
+        _release.set()
+        time.sleep(0.2)
+        assert _status.get(name="stuck.value") == "fresh"
+
+        _status.stop_updates()
+        _status.delete(name="stuck.value")
+
+
+    #
+    # A hung collector doesn't take over the pool
+    #
+    def test_hung_collector(self):
+        _status = ApplicationStatus()
+        _release = threading.Event()
+        _healthy = []
+
+        def healthy_collector():
+            _healthy.append(1)
+            return len(_healthy)
+
+        _status.start_updates()
+        _status.set(name="hung.value", func=lambda: _release.wait(timeout=10), update=0.05, timeout=0.1)
+        _status.set(name="hung.healthy", func=healthy_collector, update=0.05)
+
+        try:
+            time.sleep(1)
+            _runs = len(_healthy)
+            time.sleep(1)
+
+            # Only the one hung run holds a thread (plus any healthy run), so the
+            # healthy collector keeps running
+            assert _status.collector_pool_stats()["active"] <= 2
+            assert _status.collector_pool_stats()["queued"] <= 1
+            assert len(_healthy) - _runs >= 10
+            assert _status.collector_stats(name="hung.value")["timeouts"] == 1
+
+        finally:
+            _release.set()
+            _status.stop_updates()
+            _status.delete(name="hung", subtree=True)
+
+
+    #
+    # Timing and health of collectors
+    #
+    def test_collector_stats(self):
+        _status = ApplicationStatus()
+        _calls = []
+
+        def flaky_collector():
+            _calls.append(1)
+            if len(_calls) % 2 == 0: raise RuntimeError("probe failed")
+            return len(_calls)
+
+        _status.start_updates()
+        _status.set(name="flaky.value", func=flaky_collector, update=0.05)
+        time.sleep(0.4)
+        _status.stop_updates()
+        time.sleep(0.05)
+
+        _stats = _status.collector_stats(name="flaky.value")
+        assert _stats["runs"] >= 4
+        assert _stats["errors"] >= 2
+        assert _stats["last_error"] == "RuntimeError: probe failed"
+        assert _stats["last_success"] and _stats["last_error_time"]
+        assert _stats["last_duration"] < 0.05
+        assert sum(_stats["latency_histogram"].values()) == _stats["runs"]
+        assert "flaky.value" in _status.collector_stats()
+        _status.delete(name="flaky.value")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+'''
+*
+* test_shared.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for sharing the status between processes
+*
+'''
+# System Imports
+import pytest
+import multiprocessing
+import asyncio
+import json
+from src.application_status.application_status import ApplicationStatus
+from src.application_status.shared_status import SharedStatusRegion
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def publish_worker(path, slot):
+    _region = SharedStatusRegion(path=path)
+    _status = ApplicationStatus()
+    _status.set_static(name="requests", value=slot + 1)
+    _status.set_static(name="worker.slot", value=slot)
+    _status.share(region=_region, slot=slot)
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Shared status
+#
+class TestSharedStatus():
+    #
+    # Publish and read a slot
+    #
+    def test_publish_read(self, tmp_path):
+        _region = SharedStatusRegion(path=str(tmp_path / "status"), slots=2, slot_size=256, create=True)
+        assert _region.read(slot=0) is None
+
+        _region.publish(slot=0, payload=b'{"a": 1}')
+        (_sequence, _, _, _payload) = _region.read(slot=0)
+        assert _sequence == 2
+        assert _payload == b'{"a": 1}'
+
+        _region.publish(slot=0, payload=b'{"a": 2}')
+        assert _region.read(slot=0)[0] == 4
+        assert _region.read_all() == { 0: { "a": 2 } }
+
+        with pytest.raises(ValueError):
+            _region.publish(slot=1, payload=b"x" * 256)
+
+        with pytest.raises(ValueError):
+            _region.publish(slot=2, payload=b"{}")
+
+
+    #
+    # Merge the status of several processes
+    #
+    def test_merge(self, tmp_path):
+        _region = SharedStatusRegion(path=str(tmp_path / "status"), slots=3, slot_size=256, create=True)
+        _region.publish(slot=0, payload=b'{"requests": 3, "db": {"open": 2}, "name": "a", "up": true}')
+        _region.publish(slot=2, payload=b'{"requests": 5, "db": {"open": 1}, "name": "b", "up": false}')
+
+        assert _region.merged(mode="namespace") == {
+            "worker-0": { "requests": 3, "db": { "open": 2 }, "name": "a", "up": True },
+            "worker-2": { "requests": 5, "db": { "open": 1 }, "name": "b", "up": False } }
+        assert _region.merged(mode="sum") == { "requests": 8, "db": { "open": 3 }, "name": "a", "up": True }
+        assert _region.merged(mode="max") == { "requests": 5, "db": { "open": 2 }, "name": "a", "up": True }
+
+        # Reused until a process publishes again
+        _body = _region.merged_bytes(mode="sum")
+        assert _region.merged_bytes(mode="sum") is _body
+        _region.publish(slot=0, payload=b'{"requests": 4}')
+        assert json.loads(_region.merged_bytes(mode="sum"))["requests"] == 9
+
+        with pytest.raises(ValueError):
+            _region.merged(mode="min")
+
+
+    #
+    # Worker processes publish to their own slots
+    #
+    def test_processes(self, tmp_path):
+        _path = str(tmp_path / "status")
+        _region = SharedStatusRegion(path=_path, slots=4, slot_size=4096, create=True)
+
+        _context = multiprocessing.get_context("spawn")
+        _processes = [ _context.Process(target=publish_worker, args=(_path, _slot)) for _slot in range(3) ]
+        for _process in _processes: _process.start()
+        for _process in _processes: _process.join(timeout=30)
+
+        _merged = _region.merged(mode="namespace")
+        assert sorted(_merged) == [ "worker-0", "worker-1", "worker-2" ]
+        assert _merged["worker-1"]["worker"]["slot"] == 1
+        assert _region.merged(mode="sum")["requests"] == 6
+
+
+    #
+    # Published every interval in asyncio mode
+    #
+    def test_publish_async(self, tmp_path):
+        _region = SharedStatusRegion(path=str(tmp_path / "status"), slots=1, slot_size=256, create=True)
+
+        async def main():
+            _status = ApplicationStatus()
+            _status.start_async_updates()
+            _status.share(region=_region, slot=0, interval=0.05)
+            try:
+                _status.set_static(name="requests", value=1)
+                await asyncio.sleep(0.2)
+                assert _region.read_all() == { 0: { "requests": 1 } }
+
+                _status.set_static(name="requests", value=2)
+                await asyncio.sleep(0.2)
+                assert _region.read_all() == { 0: { "requests": 2 } }
+
+            finally:
+                _status.unshare()
+                _status.stop_async_updates()
+
+        asyncio.run(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+'''
+*
+* test_snapshot.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for saving and restoring snapshots
+*
+'''
+# System Imports
+import pytest
+import json
+import asyncio
+import time
+from src.application_status.application_status import ApplicationStatus, SNAPSHOT_HEADER
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Snapshots
+#
+class TestSnapshot():
+    #
+    # Save and restore the status
+    #
+    def test_round_trip(self, tmp_path):
+        _path = str(tmp_path / "status.snap")
+
+        _status = ApplicationStatus()
+        _status.set_static(name="a.b", value=[1, "two", 3.0])
+        _status.set_static(name="a.c", value=None)
+        _status.set_static(name="d", value=True)
+        assert _status.save_snapshot(path=_path)
+
+        # Unchanged, so not saved again
+        assert not _status.save_snapshot(path=_path)
+
+        _restored = ApplicationStatus()
+        assert _restored.load_snapshot(path=_path) == 3
+        assert json.loads(_restored.export()) == json.loads(_status.export())
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+    #
+    # Missing and damaged snapshots
+    #
+    def test_invalid(self, tmp_path, caplog):
+        _status = ApplicationStatus()
+        assert _status.load_snapshot(path=str(tmp_path / "missing")) == 0
+
+        _path = tmp_path / "status.snap"
+        _status.set_static(name="a", value=1)
+        _status.save_snapshot(path=str(_path))
+
+        # Damaged, cut short, or not a snapshot - logged and ignored
+        _good = _path.read_bytes()
+        _damaged = bytearray(_good)
+        _damaged[-1] ^= 0xff
+        for _data in (bytes(_damaged), _good[:-1], _good[:5], b"", b"APPSNAP1\0\0\0\0garbage"):
+            _path.write_bytes(_data)
+            _restored = ApplicationStatus()
+            caplog.clear()
+            assert _restored.load_snapshot(path=str(_path)) == 0
+            assert "Ignoring invalid snapshot" in caplog.text
+            assert _restored.export() == "{}"
+
+        # The body is plain JSON
+        _path.write_bytes(_good)
+        assert json.loads(_good[SNAPSHOT_HEADER.size:])["entries"] == [ [ "a", 1, None ] ]
+        assert ApplicationStatus().load_snapshot(path=str(_path)) == 1
+
+
+    #
+    # Fresh restored values aren't collected again until due
+    #
+    def test_warm_restart(self, tmp_path):
+        _path = str(tmp_path / "status.snap")
+        _calls = []
+
+        def collect():
+            _calls.append(time.monotonic())
+            return len(_calls)
+
+        _status = ApplicationStatus()
+        _status.set(name="fresh", func=collect, update=600)
+        _status.set(name="stale", func=lambda: "old", update=0.5)
+        time.sleep(0.1)
+        _status.save_snapshot(path=_path)
+        time.sleep(0.5)
+
+        _calls.clear()
+        _restored = ApplicationStatus()
+        _restored.load_snapshot(path=_path)
+        _restored.set(name="fresh", func=collect, update=600)
+        _restored.set(name="stale", func=lambda: "new", update=0.5)
+        time.sleep(0.1)
+
+        assert _calls == []
+        assert _restored.get(name="fresh") == 1
+        assert _restored.get(name="stale") == "new"
+        assert _restored.collector_stats(name="fresh")["runs"] == 0
+
+
+    #
+    # A collector returning the same value still has its last run saved
+    #
+    def test_same_value(self, tmp_path):
+        _path = tmp_path / "status.snap"
+
+        _status = ApplicationStatus()
+        _status.set(name="probe", func=lambda: "up", update=0.1)
+        time.sleep(0.05)
+        assert _status.save_snapshot(path=str(_path))
+        _saved = json.loads(_path.read_bytes()[SNAPSHOT_HEADER.size:])["entries"][0][2]
+        _version = _status.version
+
+        _status.start_updates()
+        time.sleep(0.25)
+        _status.stop_updates()
+        assert _status.version == _version
+        assert _status.save_snapshot(path=str(_path))
+
+        _updated = json.loads(_path.read_bytes()[SNAPSHOT_HEADER.size:])["entries"][0][2]
+        assert _updated > _saved
+        _status.delete(name="probe")
+
+
+    #
+    # Snapshots are saved when the updates stop
+    #
+    def test_persist(self, tmp_path):
+        _path = str(tmp_path / "status.snap")
+
+        _status = ApplicationStatus()
+        _status.persist(path=_path, interval=600)
+        _status.start_updates()
+        _status.set_static(name="a", value=1)
+        _status.stop_updates()
+
+        _restored = ApplicationStatus()
+        assert _restored.load_snapshot(path=_path) == 1
+        assert _restored.get(name="a") == 1
+
+
+    #
+    # Snapshots are saved in asyncio mode
+    #
+    def test_persist_async(self, tmp_path):
+        _path = tmp_path / "status.snap"
+
+        async def main():
+            _status = ApplicationStatus()
+            _status.start_async_updates()
+            _status.persist(path=str(_path), interval=0.1)
+            _status.set_static(name="a", value=1)
+            await asyncio.sleep(0.3)
+            assert _path.exists()
+
+            _status.set_static(name="a", value=2)
+            _status.stop_async_updates()
+
+        asyncio.run(main())
+
+        _restored = ApplicationStatus()
+        assert _restored.load_snapshot(path=str(_path)) == 1
+        assert _restored.get(name="a") == 2
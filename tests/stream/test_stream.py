@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+'''
+*
+* test_stream.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for the Server-Sent Events stream
+*
+'''
+# System Imports
+import pytest
+import http.client
+import threading
+import json
+import time
+from src.application_status.application_status import Status
+from src.application_status.stream import ChangeSubscriber, close_streams
+from src.application_status.web_server import PooledHTTPServer, BasicWebServer, DEFAULT_MAX_WORKERS
+from src.application_status.web_server import start_web_server, stop_web_server
+from tests.conftest import wait_for_server
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def read_event(response=None):
+    _event = {}
+    while True:
+        _line = response.readline().decode("utf-8").rstrip("\n")
+        if not _line:
+            if _event: return _event
+            continue
+
+        if _line.startswith(":"): continue
+        (_field, _, _value) = _line.partition(": ")
+        _event[_field] = _value
+
+
+def open_stream(headers={}):
+    _conn = http.client.HTTPConnection("127.0.0.1", 8180, timeout=5)
+    _conn.request("GET", "/stream", headers=headers)
+    _resp = _conn.getresponse()
+    assert _resp.status == 200
+    assert _resp.getheader("Content-type") == "text/event-stream"
+
+    return (_conn, _resp)
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Stream
+#
+class TestStream():
+    #
+    # Snapshot then changes
+    #
+    def test_stream(self, new_request):
+        Status.set_static(name="stream.value", value=1)
+        (_conn, _resp) = open_stream()
+
+        _event = read_event(response=_resp)
+        assert _event["event"] == "snapshot"
+        assert json.loads(_event["data"])["stream"]["value"] == 1
+
+        Status.set_static(name="stream.value", value=2)
+        _event = read_event(response=_resp)
+        assert _event["event"] == "set"
+        assert json.loads(_event["data"]) == { "name": "stream.value", "value": 2 }
+        _last_id = _event["id"]
+
+        Status.delete(name="stream.value")
+        _event = read_event(response=_resp)
+        assert _event["event"] == "delete"
+        assert json.loads(_event["data"]) == { "name": "stream.value" }
+        _conn.close()
+
+        # Resume - only the changes after the last event are sent
+        Status.set_static(name="stream.other", value="x")
+        (_conn, _resp) = open_stream(headers={ "Last-Event-ID": _last_id })
+        assert read_event(response=_resp)["event"] == "delete"
+        _event = read_event(response=_resp)
+        assert json.loads(_event["data"]) == { "name": "stream.other", "value": "x" }
+        _conn.close()
+
+        # An unknown ID gets a snapshot
+        (_conn, _resp) = open_stream(headers={ "Last-Event-ID": "unknown-1" })
+        assert read_event(response=_resp)["event"] == "snapshot"
+        _conn.close()
+        Status.delete(name="stream", subtree=True)
+
+
+    #
+    # Slow subscribers are resynced rather than buffering forever
+    #
+    def test_subscriber_overflow(self):
+        _notified = []
+        _subscriber = ChangeSubscriber(notify=lambda: _notified.append(1), max_buffered=3)
+        for _version in range(5):
+            _subscriber.push((_version, "name", _version, False))
+
+        assert len(_notified) == 5
+        assert _subscriber.take() == (True, [])
+
+        _subscriber.push((6, "name", 6, False))
+        assert _subscriber.take() == (False, [ (6, "name", 6, False) ])
+
+
+    #
+    # Streams don't hold the web server's workers
+    #
+    def test_many_streams(self, new_request):
+        Status.set_static(name="streams.value", value=1)
+
+        # More streams than worker threads
+        _stream_list = [ open_stream() for _ in range(DEFAULT_MAX_WORKERS + 4) ]
+        for (_, _resp) in _stream_list:
+            assert read_event(response=_resp)["event"] == "snapshot"
+
+        _start = time.monotonic()
+        assert new_request.get(uri="http://127.0.0.1:8180/streams") == { "value": 1 }
+        assert time.monotonic() - _start < 1
+
+        # Every stream still gets the changes
+        Status.set_static(name="streams.value", value=2)
+        for (_conn, _resp) in _stream_list:
+            assert read_event(response=_resp)["event"] == "set"
+            _conn.close()
+
+        Status.delete(name="streams", subtree=True)
+
+
+    #
+    # Streams over the limit are refused
+    #
+    def test_stream_limit(self):
+        _server = PooledHTTPServer(("127.0.0.1", 8182), BasicWebServer, max_streams=1)
+        _thread = threading.Thread(target=_server.serve_forever, daemon=True)
+        _thread.start()
+
+        try:
+            _conn = http.client.HTTPConnection("127.0.0.1", 8182, timeout=5)
+            _conn.request("GET", "/stream")
+            _resp = _conn.getresponse()
+            assert _resp.status == 200
+            read_event(response=_resp)
+
+            _other = http.client.HTTPConnection("127.0.0.1", 8182, timeout=5)
+            _other.request("GET", "/stream")
+            _refused = _other.getresponse()
+            assert _refused.status == 503
+            _refused.read()
+            _other.close()
+
+            # Other requests are still served
+            _other = http.client.HTTPConnection("127.0.0.1", 8182, timeout=5)
+            _other.request("GET", "/")
+            assert _other.getresponse().status == 200
+            _other.close()
+            _conn.close()
+
+        finally:
+            _server.shutdown()
+            close_streams()
+            _server.server_close()
+
+
+    #
+    # A single threaded server refuses streams (one would hold its only thread)
+    #
+    def test_single_threaded(self):
+        _thread = start_web_server(hostname="127.0.0.1", port=8183, concurrent=False)
+        wait_for_server(port=8183)
+
+        try:
+            _conn = http.client.HTTPConnection("127.0.0.1", 8183, timeout=5)
+            _conn.request("GET", "/stream")
+            _resp = _conn.getresponse()
+            assert _resp.status == 503
+            _resp.read()
+            _conn.close()
+
+            _conn = http.client.HTTPConnection("127.0.0.1", 8183, timeout=5)
+            _conn.request("GET", "/")
+            assert _conn.getresponse().status == 200
+            _conn.close()
+
+        finally:
+            _start = time.monotonic()
+            stop_web_server(thread=_thread, timeout=5)
+            assert time.monotonic() - _start < 5
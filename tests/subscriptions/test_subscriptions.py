@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+'''
+*
+* test_subscriptions.py
+*
+* Copyright (c) 2025 Iocane Pty Ltd
+*
+* @author: Jason Piszcyk
+* 
+* Specific tests for change subscriptions
+*
+'''
+# System Imports
+import pytest
+import threading
+import time
+from src.application_status.application_status import ApplicationStatus
+
+#
+# Globals
+#
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def wait_for(condition=None, timeout=2):
+    _end = time.monotonic() + timeout
+    while time.monotonic() < _end:
+        if condition(): return True
+        time.sleep(0.01)
+
+    return False
+
+
+###########################################################################
+#
+# The tests...
+#
+###########################################################################
+#
+# Subscriptions
+#
+class TestSubscriptions():
+    #
+    # Only changes under the prefix are passed on
+    #
+    def test_prefix(self):
+        _status = ApplicationStatus()
+        _changes = []
+        _threads = set()
+
+        def callback(changes):
+            _threads.add(threading.get_ident())
+            _changes.extend((_name, _value, _deleted) for (_, _name, _value, _deleted) in changes)
+
+        _subscription = _status.subscribe(prefix="db.pool", callback=callback)
+        _status.set_static(name="db.pool.size", value=1)
+        _status.set_static(name="db.poolx", value=1)
+        _status.set_static(name="db.other", value=1)
+        _status.delete(name="db.pool.size")
+
+        assert wait_for(lambda: len(_changes) == 2)
+        assert _changes == [ ("db.pool.size", 1, False), ("db.pool.size", None, True) ]
+
+        # Called off the writer's thread
+        assert threading.get_ident() not in _threads
+
+        assert _status.unsubscribe(subscription=_subscription)
+        assert not _status.unsubscribe(subscription=_subscription)
+        _status.set_static(name="db.pool.size", value=2)
+        time.sleep(0.1)
+        assert len(_changes) == 2
+
+
+    #
+    # Writing the same value isn't a change
+    #
+    def test_equal_writes_suppressed(self):
+        _status = ApplicationStatus()
+        _batches = []
+        _status.subscribe(prefix="", callback=_batches.append)
+
+        _status.set_static(name="value", value=1)
+        _version = _status.version
+        _status.set_static(name="value", value=1)
+        assert _status.version == _version
+
+        # A different type is a change (1 == 1.0)
+        _status.set_static(name="value", value=1.0)
+        assert _status.version == _version + 1
+
+        assert wait_for(lambda: sum(len(_batch) for _batch in _batches) == 2)
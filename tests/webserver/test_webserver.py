@@ -12,8 +12,14 @@
 '''
 # System Imports
 import pytest
+import requests
+import http.client
+import json
+import time
 from pytest import web_request
 from src.application_status.application_status import Status
+from src.application_status.shared_status import SharedStatusRegion
+from src.application_status.web_response import parse_since
 
 #
 # Globals
@@ -38,8 +44,12 @@ class TestWebServer():
         new_request.standard_invalid_method_test(uri=f"{BASE_URI}", valid_methods=["get"])
 
     def test_invalid_methods_any_path(self, new_request):
-        # Nothing is allowed
-        new_request.standard_invalid_method_test(uri=f"{BASE_URI}any", valid_methods=[])
+        # Only GET is allowed (paths map to entries in the status)
+        new_request.standard_invalid_method_test(uri=f"{BASE_URI}any", valid_methods=["get"])
+
+    def test_not_found(self, new_request):
+        with pytest.raises(requests.exceptions.HTTPError, match=r"404 Client Error.*"):
+            new_request.get(uri=f"{BASE_URI}doesnot/exist")
 
 
 
@@ -61,3 +71,246 @@ class TestWebServer():
         assert _req
         assert _var_name in _req
         assert _req[_var_name] == _var_string
+
+
+    #
+    # Persistent connections
+    #
+    def test_keep_alive(self, new_request):
+        Status.set_static(name="keepalive", value="yes")
+
+        # Two requests on the same connection, each with a Content-Length
+        _conn = http.client.HTTPConnection("127.0.0.1", 8180, timeout=5)
+        for _ in range(2):
+            _conn.request("GET", "/")
+            _resp = _conn.getresponse()
+            _body = _resp.read()
+            assert _resp.status == 200
+            assert _resp.version == 11
+            assert int(_resp.getheader("Content-Length")) == len(_body)
+            assert not _resp.will_close
+            assert b'"keepalive": "yes"' in _body
+
+        # An idle connection doesn't block other clients
+        assert new_request.get(uri=f"{BASE_URI}")["keepalive"] == "yes"
+        _conn.close()
+
+
+    #
+    # Idle keep-alive connections don't hold the workers
+    #
+    def test_idle_connections(self, new_request):
+        Status.set_static(name="idle", value="yes")
+
+        # More idle connections than worker threads
+        _conn_list = []
+        for _ in range(12):
+            _conn = http.client.HTTPConnection("127.0.0.1", 8180, timeout=5)
+            _conn.request("GET", "/idle")
+            _resp = _conn.getresponse()
+            assert _resp.read() == b'"yes"'
+            assert not _resp.will_close
+            _conn_list.append(_conn)
+
+        _start = time.monotonic()
+        assert new_request.get(uri=f"{BASE_URI}idle") == "yes"
+        assert time.monotonic() - _start < 1
+
+        # The parked connections still serve requests
+        for _conn in _conn_list:
+            _conn.request("GET", "/idle")
+            assert _conn.getresponse().read() == b'"yes"'
+            _conn.close()
+
+        Status.delete(name="idle")
+
+
+    #
+    # Subtree requests
+    #
+    def test_subtree(self, new_request):
+        Status.set_static(name="db.pool.size", value=10)
+        Status.set_static(name="db.pool.free", value=4)
+        Status.set_static(name="db.name", value="main")
+
+        assert new_request.get(uri=f"{BASE_URI}db/pool") == { "size": 10, "free": 4 }
+        assert new_request.get(uri=f"{BASE_URI}db/pool/") == { "size": 10, "free": 4 }
+        assert new_request.get(uri=f"{BASE_URI}db/pool/free") == 4
+        assert new_request.get(uri=f"{BASE_URI}db")["name"] == "main"
+
+
+    #
+    # Conditional requests
+    #
+    def test_etag_not_modified(self, new_request):
+        Status.set_static(name="etagvalue", value=1)
+
+        _resp = requests.get(f"{BASE_URI}")
+        assert _resp.status_code == 200
+        _etag = _resp.headers["ETag"]
+
+        # Unchanged - no body is sent
+        _resp = requests.get(f"{BASE_URI}", headers={ "If-None-Match": _etag })
+        assert _resp.status_code == 304
+        assert _resp.content == b""
+        assert _resp.headers["ETag"] == _etag
+
+        # Each content coding has its own ETag
+        for _index in range(100):
+            Status.set_static(name=f"etagpad.value{_index}", value=f"Value number {_index}")
+
+        _plain = requests.get(f"{BASE_URI}", headers={ "Accept-Encoding": "identity" }).headers["ETag"]
+        _gzip = requests.get(f"{BASE_URI}", headers={ "Accept-Encoding": "gzip" }).headers["ETag"]
+        _deflate = requests.get(f"{BASE_URI}", headers={ "Accept-Encoding": "deflate" }).headers["ETag"]
+        assert len({ _plain, _gzip, _deflate }) == 3
+        assert _gzip.endswith('-gzip"')
+
+        _resp = requests.get(f"{BASE_URI}", headers={ "Accept-Encoding": "deflate", "If-None-Match": _gzip })
+        assert _resp.status_code == 200
+        _resp = requests.get(f"{BASE_URI}", headers={ "Accept-Encoding": "gzip", "If-None-Match": _gzip })
+        assert _resp.status_code == 304
+        Status.delete(name="etagpad", subtree=True)
+        _etag = requests.get(f"{BASE_URI}").headers["ETag"]
+
+        # Changed - the full response is sent with a new ETag
+        Status.set_static(name="etagvalue", value=2)
+        _resp = requests.get(f"{BASE_URI}", headers={ "If-None-Match": _etag })
+        assert _resp.status_code == 200
+        assert _resp.headers["ETag"] != _etag
+        assert _resp.json()["etagvalue"] == 2
+
+
+    #
+    # Compression
+    #
+    def test_compressed(self, new_request):
+        for _index in range(100):
+            Status.set_static(name=f"compress.value{_index}", value=f"Value number {_index}")
+
+        # requests decompresses the body automatically
+        _resp = requests.get(f"{BASE_URI}compress", headers={ "Accept-Encoding": "gzip" })
+        assert _resp.headers["Content-Encoding"] == "gzip"
+        assert int(_resp.headers["Content-Length"]) < len(_resp.content)
+        assert _resp.json()["value99"] == "Value number 99"
+
+        _resp = requests.get(f"{BASE_URI}compress", headers={ "Accept-Encoding": "deflate" })
+        assert _resp.headers["Content-Encoding"] == "deflate"
+        assert _resp.json()["value0"] == "Value number 0"
+
+        _resp = requests.get(f"{BASE_URI}compress", headers={ "Accept-Encoding": "identity" })
+        assert "Content-Encoding" not in _resp.headers
+        assert _resp.json()["value0"] == "Value number 0"
+
+        _resp = requests.get(f"{BASE_URI}compress", headers={ "Accept-Encoding": "gzip;q=0" })
+        assert "Content-Encoding" not in _resp.headers
+
+
+    #
+    # Streamed exports
+    #
+    def test_chunked(self, new_request):
+        for _index in range(100):
+            Status.set_static(name=f"chunked.value{_index}", value=f"Value number {_index}")
+
+        Status.stream_exports = True
+        try:
+            # Chunked responses keep the connection open
+            _conn = http.client.HTTPConnection("127.0.0.1", 8180, timeout=5)
+            for _ in range(2):
+                _conn.request("GET", "/chunked")
+                _resp = _conn.getresponse()
+                assert _resp.status == 200
+                assert _resp.getheader("Transfer-Encoding") == "chunked"
+                assert _resp.getheader("Content-Length") is None
+                assert not _resp.will_close
+                assert json.loads(_resp.read())["value99"] == "Value number 99"
+
+            _conn.request("GET", "/chunked/missing")
+            _resp = _conn.getresponse()
+            _resp.read()
+            assert _resp.status == 404
+            _conn.close()
+
+            _resp = requests.get(f"{BASE_URI}chunked", headers={ "Accept-Encoding": "gzip" })
+            assert _resp.headers["Content-Encoding"] == "gzip"
+            assert _resp.json()["value0"] == "Value number 0"
+
+        finally:
+            Status.stream_exports = False
+
+        # Not streamed by default
+        _resp = requests.get(f"{BASE_URI}chunked")
+        assert "Transfer-Encoding" not in _resp.headers
+        assert _resp.json()["value0"] == "Value number 0"
+        Status.delete(name="chunked", subtree=True)
+
+
+    #
+    # Collector health
+    #
+    def test_collectors_endpoint(self, new_request):
+        Status.set(name="webcollector", func=lambda: "collected", update=600)
+        time.sleep(0.1)
+
+        _req = new_request.get(uri=f"{BASE_URI}_internal/collectors")
+        assert _req["webcollector"]["runs"] == 1
+        assert _req["webcollector"]["errors"] == 0
+        Status.delete(name="webcollector")
+
+
+    #
+    # Prometheus metrics
+    #
+    def test_metrics_endpoint(self, new_request):
+        Status.set_static(name="webmetric.count", value=42)
+
+        _resp = requests.get(f"{BASE_URI}metrics")
+        assert _resp.status_code == 200
+        assert _resp.headers["Content-type"].startswith("text/plain")
+        assert "webmetric_count 42\n" in _resp.text
+
+
+    #
+    # Changes since a version
+    #
+    def test_since(self, new_request):
+        Status.set_static(name="sincevalue", value=1)
+        _etag = requests.get(f"{BASE_URI}").headers["ETag"]
+
+        Status.set_static(name="sincevalue", value=2)
+        _req = new_request.get(uri=f"{BASE_URI}", params={ "since": _etag.strip('"') })
+        assert not _req["full"]
+        assert _req["set"] == { "sincevalue": 2 }
+
+        # The ETag of a compressed response can be used too
+        assert parse_since(path="/?since=ab12-7-gzip") == (7, "ab12")
+        assert parse_since(path='/?since=W/"ab12-7"') == (7, "ab12")
+        assert parse_since(path="/?since=7") == (7, None)
+
+
+    #
+    # Merged status of the processes sharing the status
+    #
+    def test_workers_endpoint(self, new_request, tmp_path):
+        _resp = requests.get(f"{BASE_URI}_internal/workers")
+        assert _resp.status_code == 404
+
+        _region = SharedStatusRegion(path=str(tmp_path / "status"), slots=2, slot_size=4096, create=True)
+        _region.publish(slot=1, payload=b'{"requests": 7}')
+        Status.set_static(name="requests", value=3)
+        Status.share(region=_region, slot=0)
+
+        try:
+            _req = new_request.get(uri=f"{BASE_URI}_internal/workers")
+            assert _req["worker-1"] == { "requests": 7 }
+            assert _req["worker-0"]["requests"] == 3
+
+            _req = new_request.get(uri=f"{BASE_URI}_internal/workers", params={ "mode": "sum" })
+            assert _req["requests"] == 10
+
+            _resp = requests.get(f"{BASE_URI}_internal/workers", params={ "mode": "min" })
+            assert _resp.status_code == 400
+
+        finally:
+            Status.unshare()
+            Status.delete(name="requests")